@@ -28,10 +28,19 @@ bl_info = {
 
 import os
 import sys
+import time
+import zlib
+import struct
+import hashlib
+import threading
 import bpy
 import bpy.utils.previews
+from array import array
+from functools import wraps
+from collections import deque, OrderedDict
+from queue import SimpleQueue
 from bpy.types import Operator, Menu, Panel, PropertyGroup, AddonPreferences, Scene, WindowManager, BlendData
-from bpy.props import StringProperty, EnumProperty
+from bpy.props import StringProperty, EnumProperty, BoolProperty, IntProperty
 
 #--------------------------------------------------------------------------------------
 # A D D O N   P R E F E R E N C E S
@@ -46,6 +55,70 @@ class SculptAlphasManagerPreferences(AddonPreferences):
         subtype='FILE_PATH',
         description = 'Main Folder containing the alphas textures used for sculpt brushes'
     )
+
+    use_thumbnail_cache: BoolProperty(
+        name="Thumbnail Cache",
+        default=True,
+        description = 'Keep small copies of the alpha thumbnails on disk, so large alphas are only decoded once'
+    )
+
+    thumbnail_cache_size: IntProperty(
+        name="Cache Size (MB)",
+        min=16,
+        max=8192,
+        default=256,
+        description = 'The disk space the thumbnail cache may use, least recently used thumbnails are removed first'
+    )
+
+    preview_pool_size: IntProperty(
+        name="Kept Categories",
+        min=1,
+        max=64,
+        default=8,
+        description = 'How many categories keep their thumbnails loaded, so going back to them is instant'
+    )
+
+    preview_pool_items: IntProperty(
+        name="Kept Thumbnails",
+        min=100,
+        max=100000,
+        default=3000,
+        description = 'How many thumbnails may stay loaded in total, about 70 KB of memory each'
+    )
+
+    use_persistent_texture: BoolProperty(
+        name="Reuse Brush Texture",
+        default=True,
+        description = 'Keep one texture per brush and mode and only change its image, instead of making a new texture for every alpha picked'
+    )
+
+    image_pool_size: IntProperty(
+        name="Kept Alphas",
+        min=1,
+        max=256,
+        default=16,
+        description = 'How many picked alphas stay loaded, so picking them again is instant'
+    )
+
+    use_proxy_textures: BoolProperty(
+        name="Proxy Alphas",
+        default=False,
+        description = 'Put a small copy of a large alpha on the brush right away, and swap in the full alpha once it is loaded'
+    )
+
+    proxy_size: IntProperty(
+        name="Proxy Size",
+        min=64,
+        max=4096,
+        default=512,
+        description = 'The longest side of the proxy alphas, in pixels'
+    )
+
+    use_warm_up: BoolProperty(
+        name="Warm Up Library",
+        default=True,
+        description = 'List the category folders in the background after Blender starts, so the first panel draw doesn\'t wait for the disk'
+    )
     
     def draw(self, context):
         layout = self.layout
@@ -57,6 +130,381 @@ class SculptAlphasManagerPreferences(AddonPreferences):
         col = layout.column(align=True)
         col.label(text="LIBRARY PATH:")
         col.prop(self, "sculpt_alphas_library")
+        row = layout.row(align=True)
+        row.prop(self, "use_thumbnail_cache")
+        row.prop(self, "thumbnail_cache_size")
+        row = layout.row(align=True)
+        row.prop(self, "preview_pool_size")
+        row.prop(self, "preview_pool_items")
+        row = layout.row(align=True)
+        row.prop(self, "use_persistent_texture")
+        row.prop(self, "image_pool_size")
+        row = layout.row(align=True)
+        row.prop(self, "use_proxy_textures")
+        row.prop(self, "proxy_size")
+        layout.prop(self, "use_warm_up")
+        draw_startup_report(layout, self)
+
+#--------------------------------------------------------------------------------------
+# L I B R A R Y   C A T A L O G
+#--------------------------------------------------------------------------------------
+
+# Valid file extensions
+image_extensions = (".jpeg", ".jpg", ".png", ".tif", ".tiff", ".psd")
+
+class LibraryCatalog:
+    """Keeps the category folders and alpha files of the library in memory.
+
+    A directory is listed once and only listed again when its modification time changes,
+    which is checked at most once every check_interval seconds.
+    """
+
+    def __init__(self, check_interval=1.0):
+        self.check_interval = check_interval
+        self.entries = {}
+
+    def scan(self, directory):
+        """Return (folders, images) of directory, both empty if it can't be read"""
+        directory = os.path.normpath(directory)
+        entry = self.entries.get(directory)
+        now = time.monotonic()
+
+        if entry is not None and now - entry["checked"] < self.check_interval:
+            return entry["folders"], entry["images"]
+
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            self.entries.pop(directory, None)
+            return [], []
+
+        if entry is None or entry["mtime"] != mtime:
+            listing = read_directory(directory)
+            if listing is None:
+                return [], []
+            entry = self.add_listing(directory, mtime, *listing)
+
+        entry["checked"] = now
+        return entry["folders"], entry["images"]
+
+    def add_listing(self, directory, mtime, folders, images):
+        """Put the folders and images listed in directory, here or in a worker, in a new entry"""
+        entry = {"mtime": mtime, "folders": folders, "images": images, "checked": time.monotonic()}
+        self.entries[directory] = entry
+        return entry
+
+library_catalog = LibraryCatalog()
+
+def read_directory(directory):
+    """Sorted folders and images of directory, or None if it can't be read. Safe in worker threads"""
+    folders = []
+    images = []
+    try:
+        with os.scandir(directory) as dir_entries:
+            for dir_entry in dir_entries:
+                if dir_entry.is_dir():
+                    folders.append(dir_entry.name)
+                elif dir_entry.name.lower().endswith(image_extensions):
+                    images.append(dir_entry.name)
+    except OSError:
+        return None
+
+    folders.sort(key=str.lower)
+    images.sort(key=str.lower)
+    return folders, images
+
+#--------------------------------------------------------------------------------------
+# T H U M B N A I L   C A C H E
+#--------------------------------------------------------------------------------------
+
+def thumbnail_cache_directory():
+    # The user's cache directory of the platform
+    if sys.platform == "win32":
+        cache = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+    elif sys.platform == "darwin":
+        cache = os.path.join(os.path.expanduser("~"), "Library", "Caches")
+    else:
+        cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+
+    return os.path.join(cache, "blender_sculpt_alphas_manager", "thumbnails")
+
+def write_png(filepath, width, height, rgba):
+    """Write 8 bit RGBA pixels, stored bottom row first like Blender does, to a PNG file"""
+    stride = width * 4
+    rows = b"".join(b"\x00" + rgba[y * stride:(y + 1) * stride] for y in reversed(range(height)))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+    png = (b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows, 6))
+        + chunk(b"IEND", b""))
+
+    temp_path = filepath + ".tmp"
+    with open(temp_path, "wb") as file:
+        file.write(png)
+    os.replace(temp_path, filepath)
+
+class ThumbnailCache:
+    """Small copies of the alpha thumbnails, kept on disk and reused across sessions.
+
+    A thumbnail is named after a hash of its source path followed by a hash of the
+    source size and modification time, so a changed alpha never matches its old
+    thumbnail. Outdated and least recently used thumbnails are removed by prune.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.budget = 256 * 1024 * 1024
+        self.files = None
+        # Thumbnails already marked as used in this session
+        self.touched = set()
+        self.pending = deque()
+
+    def thumbnail_path(self, filepath, stat):
+        source = os.path.normcase(os.path.abspath(filepath))
+        path_hash = hashlib.sha1(source.encode("utf-8", "surrogateescape")).hexdigest()[:20]
+        stamp_hash = hashlib.sha1(("%d:%d" % (stat.st_size, stat.st_mtime_ns)).encode()).hexdigest()[:12]
+        return os.path.join(self.directory, path_hash + "_" + stamp_hash + ".png")
+
+    def lookup(self, filepath):
+        """Return the cached thumbnail of filepath (or None) and the stat of filepath"""
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None, None
+
+        if self.files is None:
+            try:
+                self.files = set(os.listdir(self.directory))
+            except OSError:
+                self.files = set()
+
+        thumbnail = self.thumbnail_path(filepath, stat)
+        name = os.path.basename(thumbnail)
+        if name not in self.files:
+            return None, stat
+
+        # Used thumbnails are the last ones to be removed, marked once per session
+        if name not in self.touched:
+            self.touched.add(name)
+            try:
+                os.utime(thumbnail)
+            except OSError:
+                self.files.discard(name)
+                return None, stat
+
+        return thumbnail, stat
+
+    def store(self, preview, filepath, stat):
+        width, height = preview.image_size
+        if not width or not height:
+            return
+
+        pixels = array('i', bytes(width * height * 4))
+        preview.image_pixels.foreach_get(pixels)
+
+        thumbnail = self.thumbnail_path(filepath, stat)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            write_png(thumbnail, width, height, pixels.tobytes())
+        except OSError:
+            return
+
+        name = os.path.basename(thumbnail)
+        if self.files is not None:
+            self.files.add(name)
+        self.touched.add(name)
+
+    def prune(self):
+        """Remove outdated thumbnails, then the least recently used ones while over budget"""
+        try:
+            with os.scandir(self.directory) as dir_entries:
+                thumbnails = [(entry.stat().st_mtime, entry.stat().st_size, entry) for entry in dir_entries if entry.name.endswith(".png")]
+        except OSError:
+            return
+
+        thumbnails.sort(key=lambda thumbnail: thumbnail[0], reverse=True)
+
+        kept = []
+        sources = set()
+        removed = []
+        for mtime, size, entry in thumbnails:
+            path_hash = entry.name.split("_")[0]
+            if path_hash in sources:
+                removed.append(entry)
+            else:
+                sources.add(path_hash)
+                kept.append((size, entry))
+
+        total_size = sum(size for size, entry in kept)
+        while kept and total_size > self.budget:
+            size, entry = kept.pop()
+            removed.append(entry)
+            total_size -= size
+
+        for entry in removed:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+            if self.files is not None:
+                self.files.discard(entry.name)
+
+thumbnail_cache = ThumbnailCache(thumbnail_cache_directory())
+
+def flush_thumbnail_cache():
+    pending = thumbnail_cache.pending
+    # Write for a few milliseconds at a time, to keep the interface responsive
+    deadline = time.monotonic() + 0.01
+
+    while pending and time.monotonic() < deadline:
+        pcoll, name, filepath, stat = pending.popleft()
+        preview = pcoll.get(name)
+        if preview is not None:
+            thumbnail_cache.store(preview, filepath, stat)
+
+    if pending:
+        return 0.05
+
+    thumbnail_cache.budget = bpy.context.preferences.addons[__name__].preferences.thumbnail_cache_size * 1024 * 1024
+    thumbnail_cache.prune()
+    return None
+
+def load_preview(context, pcoll, name, filepath):
+    if not context.preferences.addons[__name__].preferences.use_thumbnail_cache:
+        return pcoll.load(name, filepath, 'IMAGE')
+
+    thumbnail, stat = thumbnail_cache.lookup(filepath)
+
+    if thumbnail is not None:
+        return pcoll.load(name, thumbnail, 'IMAGE')
+
+    preview = pcoll.load(name, filepath, 'IMAGE')
+
+    # Previews can't be read back while the panel is drawn, cache it a bit later
+    if stat is not None:
+        thumbnail_cache.pending.append((pcoll, name, filepath, stat))
+        if not bpy.app.timers.is_registered(flush_thumbnail_cache):
+            bpy.app.timers.register(flush_thumbnail_cache, first_interval=0.5)
+
+    return preview
+
+#--------------------------------------------------------------------------------------
+# S T A R T U P
+#--------------------------------------------------------------------------------------
+
+class StartupReport:
+    """What loading the add-on cost, and when its library was ready.
+
+    register doesn't touch the disk, the category folders are listed after startup
+    in a worker thread, and warm_up_library adds them to the catalog.
+    """
+
+    def __init__(self):
+        self.registered = None
+        self.register_time = 0.0
+        # Seconds after register and duration of the first panel draw
+        self.first_draw = None
+        # (directory, listing) of the folders listed by the worker, None while not warming up
+        self.listed = None
+        self.warm_up_time = 0.0
+        self.warm_up_folders = 0
+        self.warm_up_ready = None
+
+    def since_register(self):
+        return time.perf_counter() - self.registered if self.registered is not None else 0.0
+
+startup = StartupReport()
+
+def timed_first_draw(function):
+    """Record in the startup report when the panel was first drawn and how long it took"""
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        if startup.first_draw is not None:
+            return function(*args, **kwargs)
+
+        since_register = startup.since_register()
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            startup.first_draw = (since_register, time.perf_counter() - start)
+
+    return wrapper
+
+def list_library(root, listed):
+    """List the library folder, then its category folders, into listed. Runs in a worker thread"""
+    try:
+        pending = [root]
+        while pending and startup.listed is listed:
+            directory = pending.pop(0)
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+
+            listing = read_directory(directory)
+            if listing is None:
+                continue
+
+            if directory == root:
+                pending.extend(os.path.join(root, name) for name in listing[0])
+            listed.put((directory, (mtime,) + listing))
+    finally:
+        listed.put((None, None))
+
+def warm_up_library():
+    preferences = bpy.context.preferences.addons[__name__].preferences
+    lib_path = preferences.sculpt_alphas_library
+
+    if not preferences.use_warm_up or not lib_path:
+        startup.listed = None
+        return None
+
+    # Listed in a worker, only added to the catalog here
+    if startup.listed is None:
+        startup.listed = SimpleQueue()
+        threading.Thread(target=list_library, args=(os.path.normpath(lib_path), startup.listed),
+            name="sculpt_alphas_warm_up", daemon=True).start()
+        return 0.02
+
+    listed = startup.listed
+    start = time.perf_counter()
+    # Add for a few milliseconds at a time, to keep the interface responsive
+    deadline = start + 0.005
+
+    while not listed.empty() and time.perf_counter() < deadline:
+        directory, listing = listed.get()
+
+        if directory is None:
+            startup.listed = None
+            startup.warm_up_time += time.perf_counter() - start
+            startup.warm_up_ready = startup.since_register()
+            return None
+
+        # Listed meanwhile by the panel, with the same content
+        entry = library_catalog.entries.get(directory)
+        if entry is None or entry["mtime"] != listing[0]:
+            library_catalog.add_listing(directory, *listing)
+        startup.warm_up_folders += 1
+
+    startup.warm_up_time += time.perf_counter() - start
+    return 0.02
+
+def draw_startup_report(layout, preferences):
+    col = layout.box().column(align=True)
+    col.label(text="Register: %.2f ms, no library access" % (startup.register_time * 1000.0))
+
+    if startup.first_draw is not None:
+        col.label(text="First Panel Draw: %.1f ms, %.1f s after register" % (startup.first_draw[1] * 1000.0, startup.first_draw[0]))
+
+    if startup.warm_up_ready is not None:
+        col.label(text="Library warm up: %d folders in %.1f ms, ready %.1f s after register" % (
+            startup.warm_up_folders, startup.warm_up_time * 1000.0, startup.warm_up_ready))
+    elif not preferences.use_warm_up:
+        col.label(text="Library warm up: off, folders are listed when first shown")
 
 #--------------------------------------------------------------------------------------
 # F U N C T I O N A L I T I E S
@@ -65,14 +513,56 @@ class SculptAlphasManagerPreferences(AddonPreferences):
 # CATEGORIES PREVIEWS FUNCTION
 def preview_sub_folders_categories(self, context):
     lib_path = context.preferences.addons[__name__].preferences.sculpt_alphas_library
-        
-    list_of_category_folders = []
-    for folder in os.listdir(lib_path):
-        if os.path.isdir(os.path.join(lib_path, folder)):
-            list_of_category_folders.append(folder)
+
+    if not lib_path:
+        return []
+
+    list_of_category_folders = library_catalog.scan(lib_path)[0]
 
     return [(name, name, "") for name in list_of_category_folders]
 
+# CATEGORY PREVIEWS POOL
+class PreviewPool:
+    """One preview collection per category folder, least recently shown first.
+
+    Going back to a category reuses its thumbnails. Once there are more than
+    max_collections collections, or more than max_items thumbnails in all, the
+    least recently shown ones are removed, never the one just shown.
+    """
+
+    def __init__(self):
+        self.collections = OrderedDict()
+
+    def get(self, directory):
+        pcoll = self.collections.get(directory)
+
+        if pcoll is None:
+            pcoll = bpy.utils.previews.new()
+            pcoll.my_previews_dir = directory
+            pcoll.my_previews = ()
+            pcoll.my_previews_images = None
+            self.collections[directory] = pcoll
+
+        self.collections.move_to_end(directory)
+
+        return pcoll
+
+    def trim(self, max_collections, max_items):
+        # The last collection is the one just shown
+        while len(self.collections) > 1:
+            if len(self.collections) <= max_collections and sum(len(pcoll) for pcoll in self.collections.values()) <= max_items:
+                break
+
+            old_directory, old_pcoll = self.collections.popitem(last=False)
+            bpy.utils.previews.remove(old_pcoll)
+
+    def clear(self):
+        for pcoll in self.collections.values():
+            bpy.utils.previews.remove(pcoll)
+        self.collections.clear()
+
+preview_pool = PreviewPool()
+
 # CATEGORY ITEMS PREVIEWS FUNCTION
 def preview_items_in_folders(self, context):
     enum_items = []
@@ -80,33 +570,34 @@ def preview_items_in_folders(self, context):
     if context is None:
         return enum_items
 
-    wm = context.window_manager
-    lib_path = context.preferences.addons[__name__].preferences.sculpt_alphas_library
+    preferences = context.preferences.addons[__name__].preferences
+    lib_path = preferences.sculpt_alphas_library
     selected_category_name = bpy.data.scenes["Scene"].category_pointer_prop.Categories
     directory = os.path.join(lib_path, selected_category_name)
 
-    pcoll = preview_collections["main"]
+    pcoll = preview_pool.get(directory)
 
-    if directory == pcoll.my_previews_dir:
+    image_paths = library_catalog.scan(directory)[1] if lib_path and selected_category_name else []
+
+    # The catalog keeps the same list until the folder changes
+    if image_paths is pcoll.my_previews_images:
         return pcoll.my_previews
 
-    if directory and os.path.exists(directory):
-        image_paths = []
-        for fn in os.listdir(directory):
-            if fn.lower().endswith(".jpeg") or fn.lower().endswith(".jpg") or fn.lower().endswith(".png") or fn.lower().endswith(".tif") or fn.lower().endswith(".psd"):
-                image_paths.append(fn)
-
-        for i, name in enumerate(image_paths):
-            filepath = os.path.join(directory, name)
-            icon = pcoll.get(name)
-            if not icon:
-                thumb = pcoll.load(name, filepath, 'IMAGE')
-            else:
-                thumb = pcoll[name]
-            enum_items.append((name, name, "", thumb.icon_id, i))
+    for i, name in enumerate(image_paths):
+        filepath = os.path.join(directory, name)
+        icon = pcoll.get(name)
+        if not icon:
+            thumb = load_preview(context, pcoll, name, filepath)
+        else:
+            thumb = pcoll[name]
+        enum_items.append((name, name, "", thumb.icon_id, i))
 
     pcoll.my_previews = enum_items
-    pcoll.my_previews_dir = directory
+    pcoll.my_previews_images = image_paths
+
+    # Within budget once the thumbnails of this category are loaded
+    preview_pool.trim(preferences.preview_pool_size, preferences.preview_pool_items)
+
     return pcoll.my_previews
 
 # OPEN CATEGORY FOLDER
@@ -128,46 +619,252 @@ class OpenCategoryFolder(bpy.types.Operator):
         
         return {'FINISHED'}
 
+# ALPHA IMAGES POOL
+class ImagePool:
+    """Alpha images loaded for the brushes, least recently picked first.
+
+    Picking a pooled alpha again only rebinds the brush texture to it. Past the pool
+    size, the least recently picked alphas that nothing uses are removed. Images are
+    kept by name and checked before use, as they may be removed by a file load.
+    """
+
+    def __init__(self):
+        self.images = OrderedDict()
+
+    def lookup(self, filepath):
+        image = bpy.data.images.get(self.images.get(filepath, ""))
+
+        if image is None or os.path.normpath(bpy.path.abspath(image.filepath)) != filepath:
+            self.images.pop(filepath, None)
+            return None
+
+        return image
+
+    def get(self, filepath):
+        filepath = os.path.normpath(filepath)
+        image = self.lookup(filepath)
+
+        if image is None:
+            image = bpy.data.images.load(filepath, check_existing=True)
+            self.images[filepath] = image.name
+
+        self.images.move_to_end(filepath)
+        return image
+
+    def trim(self, size):
+        for filepath in list(self.images):
+            if len(self.images) <= size:
+                break
+
+            image = self.lookup(filepath)
+            if image is not None and image.users == 0:
+                bpy.data.images.remove(image)
+                del self.images[filepath]
+
+    def clear(self):
+        self.images.clear()
+
+image_pool = ImagePool()
+
+# Brush settings and texture name of each paint mode
+paint_modes = {
+    'SCULPT': ("sculpt", "Sculpt"),
+    'PAINT_TEXTURE': ("image_paint", "Texture Paint"),
+    'PAINT_VERTEX': ("vertex_paint", "Vertex Paint"),
+}
+
+# Names of the alpha textures, by brush name and paint mode
+brush_texture_names = {}
+
+# BRUSH TEXTURE
+def brush_texture(brush, mode):
+    """The alpha texture of brush in mode, made on first use and reused from then on"""
+    key = (brush.name, mode)
+
+    def is_brush_texture(texture):
+        return (texture is not None
+            and texture.get("sculpt_alphas_brush") == brush.name and texture.get("sculpt_alphas_mode") == mode)
+
+    texture = bpy.data.textures.get(brush_texture_names.get(key, ""))
+
+    if not is_brush_texture(texture):
+        # Made in an earlier session, or renamed since
+        texture = next((texture for texture in bpy.data.textures if is_brush_texture(texture)), None)
+
+        if texture is None:
+            texture = bpy.data.textures.new("%s %s Alpha" % (brush.name, paint_modes[mode][1]), 'IMAGE')
+            texture["sculpt_alphas_brush"] = brush.name
+            texture["sculpt_alphas_mode"] = mode
+
+        brush_texture_names[key] = texture.name
+
+    return texture
+
+# PROXY CACHES, BY PROXY SIZE
+proxy_caches = {}
+# Alphas with more pixels get no proxy, copying them would stall Blender, their thumbnail stands in
+proxy_max_pixels = 4096 * 4096
+# Seconds without picks before the proxies of the swapped alphas are saved
+proxy_save_delay = 1.0
+
+def proxy_cache(size):
+    cache = proxy_caches.get(size)
+    if cache is None:
+        directory = os.path.join(os.path.dirname(thumbnail_cache.directory), "proxies", str(size))
+        cache = proxy_caches[size] = ThumbnailCache(directory)
+    return cache
+
+# LOAD PROXY ALPHA
+def load_proxy_image(filepath, size):
+    """A small copy of the alpha at filepath (or its thumbnail until there is one), or None"""
+    proxy, stat = proxy_cache(size).lookup(filepath)
+    if proxy is None and stat is not None:
+        proxy, stat = thumbnail_cache.lookup(filepath)
+    if proxy is None:
+        return None
+
+    try:
+        image = bpy.data.images.load(proxy)
+    except RuntimeError:
+        return None
+
+    image.name = os.path.basename(filepath) + " Proxy"
+    image["sculpt_alphas_proxy"] = filepath
+    return image
+
+# SAVE PROXY ALPHA
+def save_proxy_image(image, filepath, size):
+    cache = proxy_cache(size)
+    proxy, stat = cache.lookup(filepath)
+    width, height = image.size
+    scale = size / max(width, height, 1)
+
+    # Already saved, small enough to load quickly, or too big to copy
+    if proxy is not None or stat is None or scale >= 1.0 or width * height > proxy_max_pixels:
+        return
+
+    proxy = cache.thumbnail_path(filepath, stat)
+    copy = image.copy()
+    try:
+        copy.scale(max(1, round(width * scale)), max(1, round(height * scale)))
+        os.makedirs(cache.directory, exist_ok=True)
+        copy.filepath_raw = proxy
+        copy.file_format = 'PNG'
+        copy.save()
+    except (RuntimeError, OSError):
+        return
+    finally:
+        bpy.data.images.remove(copy)
+
+    if cache.files is not None:
+        cache.files.add(os.path.basename(proxy))
+
+    cache.budget = bpy.context.preferences.addons[__name__].preferences.thumbnail_cache_size * 1024 * 1024
+    cache.prune()
+
+# Proxies on the brushes waiting for their full alpha: texture name, proxy name, file path
+pending_proxies = deque()
+# Swapped alphas whose proxy is still to save: image name, file path, proxy size
+unsaved_proxies = deque()
+# perf_counter of the last swap
+last_proxy_swap = 0.0
+
+def swap_proxy_images():
+    global last_proxy_swap
+
+    if not pending_proxies:
+        return None
+
+    texture_name, proxy_name, filepath = pending_proxies.popleft()
+    texture = bpy.data.textures.get(texture_name)
+    proxy = bpy.data.images.get(proxy_name)
+
+    # Proxies replaced by another pick meanwhile are only removed
+    if texture is not None and proxy is not None and texture.image == proxy:
+        try:
+            image = image_pool.get(filepath)
+        except RuntimeError:
+            return 0.0 if pending_proxies else None
+
+        texture.image = image
+
+        # Saved once no alpha was picked for a while
+        unsaved_proxies.append((image.name, filepath, bpy.context.preferences.addons[__name__].preferences.proxy_size))
+        last_proxy_swap = time.perf_counter()
+        if not bpy.app.timers.is_registered(save_proxy_images):
+            bpy.app.timers.register(save_proxy_images, first_interval=proxy_save_delay)
+
+    if proxy is not None and proxy.users == 0:
+        bpy.data.images.remove(proxy)
+
+    return 0.0 if pending_proxies else None
+
+def save_proxy_images():
+    if not unsaved_proxies:
+        return None
+
+    # Not while alphas are being picked
+    idle = time.perf_counter() - last_proxy_swap
+    if pending_proxies or idle < proxy_save_delay:
+        return max(proxy_save_delay - idle, 0.1)
+
+    image_name, filepath, size = unsaved_proxies.popleft()
+    image = bpy.data.images.get(image_name)
+
+    # Removed since, or replaced by another file of the same name
+    if image is not None and os.path.normpath(bpy.path.abspath(image.filepath)) == filepath:
+        save_proxy_image(image, filepath, size)
+
+    return 0.1 if unsaved_proxies else None
+
 # ASSIGN TEXTURE
 def assignTexture(self, context):
 
-    lib_path = context.preferences.addons[__name__].preferences.sculpt_alphas_library
+    preferences = context.preferences.addons[__name__].preferences
+    lib_path = preferences.sculpt_alphas_library
     selected_category_name = bpy.data.scenes["Scene"].category_pointer_prop.Categories
     selected_alpha = bpy.context.window_manager.items_in_folders
     texname_no_extension = os.path.splitext(selected_alpha)[0]
 
-    if bpy.context.mode == 'SCULPT':
-        if bpy.context.tool_settings.sculpt.brush.texture is not None:
-            sculpt_tex = bpy.context.tool_settings.sculpt.brush.texture
-            bpy.data.textures.remove(sculpt_tex, do_unlink=True, do_id_user=True, do_ui_user=True)
+    if bpy.context.mode not in paint_modes:
+        return {'FINISHED'}
 
-        bpy.data.images.load(os.path.join(lib_path, selected_category_name, selected_alpha), check_existing=True)
-        image_to_texture = bpy.data.textures.new(texname_no_extension, 'IMAGE')
-        image_to_texture.image = bpy.data.images[selected_alpha]
-        
-        bpy.context.tool_settings.sculpt.brush.texture = bpy.data.textures[texname_no_extension]
+    brush = getattr(bpy.context.tool_settings, paint_modes[bpy.context.mode][0]).brush
+    filepath = os.path.join(lib_path, selected_category_name, selected_alpha)
 
-    if bpy.context.mode == 'PAINT_TEXTURE':
-        if bpy.context.tool_settings.image_paint.brush.texture is not None:
-            paint_tex = bpy.context.tool_settings.image_paint.brush.texture
-            bpy.data.textures.remove(paint_tex, do_unlink=True, do_id_user=True, do_ui_user=True)
+    # Only the image of the brush texture changes, no datablock is made or removed
+    if preferences.use_persistent_texture:
+        filepath = os.path.normpath(filepath)
+        proxy = None
 
-        bpy.data.images.load(os.path.join(lib_path, selected_category_name, selected_alpha), check_existing=True)
-        image_to_texture = bpy.data.textures.new(texname_no_extension, 'IMAGE')
-        image_to_texture.image = bpy.data.images[selected_alpha]
-        
-        bpy.context.tool_settings.image_paint.brush.texture = bpy.data.textures[texname_no_extension]
+        # A small copy goes on the brush until the full alpha is loaded
+        if preferences.use_proxy_textures and image_pool.lookup(filepath) is None:
+            proxy = load_proxy_image(filepath, preferences.proxy_size)
 
-    if bpy.context.mode == 'PAINT_VERTEX':
-        if bpy.context.tool_settings.vertex_paint.brush.texture is not None:
-            vertpaint_tex = bpy.context.tool_settings.vertex_paint.brush.texture
-            bpy.data.textures.remove(vertpaint_tex, do_unlink=True, do_id_user=True, do_ui_user=True)
+        image = proxy if proxy is not None else image_pool.get(filepath)
+        texture = brush_texture(brush, bpy.context.mode)
 
-        bpy.data.images.load(os.path.join(lib_path, selected_category_name, selected_alpha), check_existing=True)
-        image_to_texture = bpy.data.textures.new(texname_no_extension, 'IMAGE')
-        image_to_texture.image = bpy.data.images[selected_alpha]
-        
-        bpy.context.tool_settings.vertex_paint.brush.texture = bpy.data.textures[texname_no_extension]
+        if texture.image != image:
+            texture.image = image
+        if brush.texture != texture:
+            brush.texture = texture
+
+        if proxy is not None:
+            pending_proxies.append((texture.name, proxy.name, filepath))
+            if not bpy.app.timers.is_registered(swap_proxy_images):
+                bpy.app.timers.register(swap_proxy_images, first_interval=0.1)
+
+        image_pool.trim(preferences.image_pool_size)
+        return {'FINISHED'}
+
+    if brush.texture is not None:
+        bpy.data.textures.remove(brush.texture, do_unlink=True, do_id_user=True, do_ui_user=True)
+
+    bpy.data.images.load(filepath, check_existing=True)
+    image_to_texture = bpy.data.textures.new(texname_no_extension, 'IMAGE')
+    image_to_texture.image = bpy.data.images[selected_alpha]
+
+    brush.texture = bpy.data.textures[texname_no_extension]
 
     return {'FINISHED'}
 
@@ -181,6 +878,7 @@ class CategoryPropertyScene(bpy.types.PropertyGroup):
 # T E X T U R E   P A N E L   E X T E N S I O N
 #--------------------------------------------------------------------------------------
 
+@timed_first_draw
 def sculpt_alphas_categories_prepend(self, context):
     layout = self.layout
     
@@ -200,9 +898,14 @@ classes = (
     CategoryPropertyScene
 )
 
-preview_collections = {}
-
 def register():
+    started = time.perf_counter()
+    startup.first_draw = None
+    startup.listed = None
+    startup.warm_up_time = 0.0
+    startup.warm_up_folders = 0
+    startup.warm_up_ready = None
+
     from bpy.utils import register_class
     for cls in classes:
         register_class(cls)
@@ -211,10 +914,11 @@ def register():
 
     Scene.category_pointer_prop = bpy.props.PointerProperty(type = CategoryPropertyScene)
 
-    pcoll = bpy.utils.previews.new()
-    pcoll.my_previews_dir = ""
-    pcoll.my_previews = ()
-    preview_collections["main"] = pcoll
+    # The library is listed once Blender is up, not while it starts
+    bpy.app.timers.register(warm_up_library, first_interval=2.0, persistent=True)
+
+    startup.registered = time.perf_counter()
+    startup.register_time = startup.registered - started
 
 def unregister():
     from bpy.utils import unregister_class
@@ -223,9 +927,26 @@ def unregister():
 
     bpy.types.VIEW3D_PT_tools_brush_texture.remove(sculpt_alphas_categories_prepend)
 
-    for pcoll in preview_collections.values():
-        bpy.utils.previews.remove(pcoll)
-    preview_collections.clear()
+    if bpy.app.timers.is_registered(warm_up_library):
+        bpy.app.timers.unregister(warm_up_library)
+    # The worker stops once its queue is no longer the current one
+    startup.listed = None
+
+    if bpy.app.timers.is_registered(flush_thumbnail_cache):
+        bpy.app.timers.unregister(flush_thumbnail_cache)
+    thumbnail_cache.pending.clear()
+
+    preview_pool.clear()
+    image_pool.clear()
+    brush_texture_names.clear()
+
+    if bpy.app.timers.is_registered(swap_proxy_images):
+        bpy.app.timers.unregister(swap_proxy_images)
+    pending_proxies.clear()
+
+    if bpy.app.timers.is_registered(save_proxy_images):
+        bpy.app.timers.unregister(save_proxy_images)
+    unsaved_proxies.clear()
 
 if __name__ == "__main__":
     register()
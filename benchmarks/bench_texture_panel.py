@@ -0,0 +1,429 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENCE BLOCK #####
+
+"""Times the texture panel callbacks on a synthetic library, without Blender.
+
+Runs the add-ons against the bpy stand-in of bpy_stub.py and reports, for every
+callback, the latency percentiles of a call and the file system calls it made
+(stat, scandir, listdir, open, ...). Cold runs start from an empty catalog and
+preview pool, warm runs repeat the call on an unchanged library.
+
+    python benchmarks/bench_texture_panel.py --categories 20 --files 500 --depth 2
+    python benchmarks/bench_texture_panel.py --json bench_output.json
+    python benchmarks/bench_texture_panel.py --baseline bench_output.json
+
+With --baseline, the run fails if a p50 latency grew by more than --tolerance
+or a callback makes more file system calls than in the baseline.
+"""
+
+import argparse
+import builtins
+import importlib.util
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+benchmarks_directory = os.path.dirname(os.path.abspath(__file__))
+repository_directory = os.path.dirname(benchmarks_directory)
+sys.path.insert(0, benchmarks_directory)
+
+import bpy_stub
+from synthetic_library import generate_library
+
+texture_module_name = "textures_manager_no_mask_b_preview_refresh"
+alphas_module_name = "Sculpt_Alphas_Manager"
+
+#--------------------------------------------------------------------------------------
+# F I L E   S Y S T E M   C A L L S
+#--------------------------------------------------------------------------------------
+
+class FileSystemCounter:
+    """Counts the calls made through the os functions that reach the file system.
+
+    os.path.isdir, exists, getmtime and friends go through os.stat and are counted
+    as such. Calls made by worker threads while a callback runs are counted too.
+    """
+
+    os_functions = ("stat", "lstat", "scandir", "listdir", "mkdir", "makedirs", "remove", "replace", "utime", "rename")
+
+    def __init__(self):
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        self.originals = {}
+
+    def wrap(self, name, function):
+        counts = self.counts
+        lock = self.lock
+
+        def counted(*args, **kwargs):
+            with lock:
+                counts[name] += 1
+            return function(*args, **kwargs)
+
+        return counted
+
+    def install(self):
+        for name in self.os_functions:
+            self.originals[(os, name)] = getattr(os, name)
+            setattr(os, name, self.wrap(name, getattr(os, name)))
+        for module in (builtins, io):
+            self.originals[(module, "open")] = module.open
+            module.open = self.wrap("open", module.open)
+
+    def uninstall(self):
+        for (module, name), function in self.originals.items():
+            setattr(module, name, function)
+        self.originals.clear()
+
+    def take(self):
+        """Return the calls counted since the last take"""
+        with self.lock:
+            counts = Counter(self.counts)
+            self.counts.clear()
+        return counts
+
+#--------------------------------------------------------------------------------------
+# B L E N D E R   S T A N D - I N
+#--------------------------------------------------------------------------------------
+
+def import_addon(name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(repository_directory, name + ".py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def property_defaults(cls):
+    """Default values of the properties declared as annotations of cls"""
+    values = {}
+    for name, (args, kwargs) in getattr(cls, "__annotations__", {}).items():
+        values[name] = bpy_stub.Collection(kwargs["type"]) if kwargs.get("collection") else kwargs.get("default")
+    return values
+
+class Brush(bpy_stub.ID):
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.texture = None
+        self.mask_texture = None
+        self.image_texture = None
+        self.procedural_texture = None
+        self.use_procedural_textures = False
+        self.use_library_preview = True
+        self.brush_texture = SimpleNamespace(
+            category='.',
+            sub_category='.',
+            child_folder='.',
+            folder_path='',
+            items_in_selected_category='NONE',
+            items_procedural_textures='NONE',
+            quick_item='NONE',
+            search='',
+            sort_by='NAME',
+            channels='ALL',
+            min_resolution=0,
+            page=0,
+        )
+
+def new_context(bpy, library, texture_module, alphas_module):
+    texture_preferences = SimpleNamespace(**property_defaults(texture_module.PreferencesTextureFilePaths))
+    texture_preferences.sculpting_texture_directory = library
+    alphas_preferences = SimpleNamespace(**property_defaults(alphas_module.SculptAlphasManagerPreferences))
+    alphas_preferences.sculpt_alphas_library = library
+
+    brush = bpy.data.brushes.add(Brush("Draw"))
+    tool_settings = SimpleNamespace(
+        sculpt=SimpleNamespace(brush=brush),
+        vertex_paint=SimpleNamespace(brush=brush),
+        image_paint=SimpleNamespace(brush=brush),
+    )
+
+    context = SimpleNamespace(
+        mode='SCULPT',
+        object=SimpleNamespace(mode='SCULPT'),
+        sculpt_object=None,
+        tool_settings=tool_settings,
+        preferences=SimpleNamespace(addons={
+            texture_module.__name__: SimpleNamespace(preferences=texture_preferences),
+            alphas_module.__name__: SimpleNamespace(preferences=alphas_preferences),
+        }),
+        window_manager=SimpleNamespace(windows=[]),
+    )
+
+    scene = SimpleNamespace(name="Scene", category_pointer_prop=SimpleNamespace(Categories=''))
+    bpy.data.scenes.items["Scene"] = scene
+    bpy.context = context
+
+    return context, brush
+
+#--------------------------------------------------------------------------------------
+# M E A S U R E M E N T S
+#--------------------------------------------------------------------------------------
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+class Benchmark:
+
+    def __init__(self, counter, settle):
+        self.counter = counter
+        self.settle = settle
+        self.results = {}
+
+    def measure(self, name, function, iterations, before=None):
+        """Time iterations calls of function, before() runs untimed ahead of each call"""
+        latencies = []
+        fs_calls = Counter()
+
+        for i in range(iterations):
+            if before is not None:
+                before(i)
+            self.settle()
+            self.counter.take()
+
+            start = time.perf_counter()
+            function(i)
+            latencies.append(time.perf_counter() - start)
+
+            fs_calls.update(self.counter.take())
+
+        latencies.sort()
+        self.results[name] = {
+            "calls": iterations,
+            "p50_ms": percentile(latencies, 0.50) * 1000.0,
+            "p90_ms": percentile(latencies, 0.90) * 1000.0,
+            "p99_ms": percentile(latencies, 0.99) * 1000.0,
+            "max_ms": latencies[-1] * 1000.0,
+            "fs_per_call": sum(fs_calls.values()) / iterations,
+            "fs_calls": dict(sorted(fs_calls.items())),
+        }
+
+def report(results, out=sys.stdout):
+    header = "%-44s %6s %9s %9s %9s %9s %8s  %s" % ("callback", "calls", "p50 ms", "p90 ms", "p99 ms", "max ms", "fs/call", "fs calls")
+    print(header, file=out)
+    print("-" * len(header), file=out)
+    for name, result in results.items():
+        fs_calls = " ".join("%s=%d" % item for item in result["fs_calls"].items())
+        print("%-44s %6d %9.3f %9.3f %9.3f %9.3f %8.1f  %s" % (
+            name, result["calls"], result["p50_ms"], result["p90_ms"], result["p99_ms"],
+            result["max_ms"], result["fs_per_call"], fs_calls), file=out)
+
+def compare(results, baseline, tolerance):
+    """Return the regressions of results against a baseline run"""
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if result["p50_ms"] > old["p50_ms"] * tolerance and result["p50_ms"] - old["p50_ms"] > 0.05:
+            regressions.append("%s: p50 %.3f ms, was %.3f ms" % (name, result["p50_ms"], old["p50_ms"]))
+        if result["fs_per_call"] > old["fs_per_call"] + 0.5:
+            regressions.append("%s: %.1f file system calls per call, was %.1f" % (name, result["fs_per_call"], old["fs_per_call"]))
+    return regressions
+
+#--------------------------------------------------------------------------------------
+# S C E N A R I O S
+#--------------------------------------------------------------------------------------
+
+def run_benchmarks(args, library, categories):
+    counter = FileSystemCounter()
+    counter.install()
+
+    bpy = bpy_stub.install()
+    textures = import_addon(texture_module_name)
+    alphas = import_addon(alphas_module_name)
+
+    context, brush = new_context(bpy, library, textures, alphas)
+    brush_texture = brush.brush_texture
+    panel = SimpleNamespace(layout=bpy_stub.Layout())
+    # Category identifiers are the folder names
+    category_names = [os.path.basename(directory) for directory in categories]
+
+    def settle():
+        # Let the thumbnail loader and the other timers finish their work, untimed
+        bpy.app.timers.run()
+
+    def cold_start(i):
+        textures.library_catalog.invalidate()
+        textures.preview_pool.clear()
+        textures.last_texture_draw = (None, {})
+
+    def select_category(i):
+        brush_texture.category = category_names[i % len(category_names)]
+        brush_texture.sub_category = textures.no_folder
+        brush_texture.items_in_selected_category = 'NONE'
+
+    iterations = args.iterations
+    bench = Benchmark(counter, settle)
+
+    try:
+        bench.measure("preview_folders_textures cold",
+            lambda i: textures.preview_folders_textures(brush_texture, context), iterations, before=cold_start)
+        bench.measure("preview_folders_textures warm",
+            lambda i: textures.preview_folders_textures(brush_texture, context), iterations)
+
+        def cold_category(i):
+            cold_start(i)
+            select_category(i)
+
+        bench.measure("preview_category_items cold",
+            lambda i: textures.preview_category_items(brush_texture, context), iterations, before=cold_category)
+        bench.measure("preview_category_items switch",
+            lambda i: textures.preview_category_items(brush_texture, context), iterations, before=select_category)
+        select_category(0)
+        bench.measure("preview_category_items warm",
+            lambda i: textures.preview_category_items(brush_texture, context), iterations)
+
+        bench.measure("texture_register_draw cold",
+            lambda i: textures.texture_register_draw(panel, context), iterations, before=cold_category)
+        bench.measure("texture_register_draw switch",
+            lambda i: textures.texture_register_draw(panel, context), iterations, before=select_category)
+        select_category(0)
+        bench.measure("texture_register_draw warm",
+            lambda i: textures.texture_register_draw(panel, context), iterations)
+
+        select_category(0)
+        items = [item[0] for item in textures.preview_category_items(brush_texture, context)[1:]]
+
+        def select_item(i):
+            brush_texture.items_in_selected_category = items[i % len(items)] if items else 'NONE'
+
+        bench.measure("assign_texture",
+            lambda i: textures.assign_texture(brush_texture, context), iterations, before=select_item)
+
+        if args.search:
+            brush_texture.search = args.search
+            bench.measure("texture_register_draw search",
+                lambda i: textures.texture_register_draw(panel, context), iterations)
+            brush_texture.search = ''
+
+        # Registering touches no file, the library is listed by the warm up timer afterwards
+        def unregister(i):
+            if bpy.app.timers.is_registered(textures.warm_up_library):
+                textures.unregister()
+
+        bench.measure("register", lambda i: textures.register(), iterations, before=unregister)
+        textures.unregister()
+
+        # Until the library is ready, walked by a worker and added by the drain timer
+        def warm_up(i):
+            while textures.warm_up_library() is not None:
+                textures.drain_library_walks()
+                time.sleep(0.001)
+
+        # The textures picked above are recent ones, the library counts as browsed so it's walked
+        textures.library_browsed = True
+
+        def cold_warm_up(i):
+            cold_start(i)
+            textures.startup.begin()
+
+        bench.measure("warm_up_library", warm_up, iterations, before=cold_warm_up)
+        textures.library_walker.shutdown()
+        if bpy.app.timers.is_registered(textures.drain_library_walks):
+            bpy.app.timers.unregister(textures.drain_library_walks)
+
+        # The older add-on, same library
+        scene = bpy.data.scenes["Scene"]
+
+        def select_alphas_category(i):
+            scene.category_pointer_prop.Categories = os.path.basename(categories[i % len(categories)])
+
+        def cold_alphas_category(i):
+            alphas.library_catalog.entries.clear()
+            alphas.preview_pool.clear()
+            select_alphas_category(i)
+
+        bench.measure("alphas preview_items_in_folders cold",
+            lambda i: alphas.preview_items_in_folders(None, context), iterations, before=cold_alphas_category)
+        select_alphas_category(0)
+        bench.measure("alphas preview_items_in_folders warm",
+            lambda i: alphas.preview_items_in_folders(None, context), iterations)
+    finally:
+        counter.uninstall()
+        textures.thumbnail_loader.shutdown()
+        textures.library_search.shutdown()
+        textures.stop_library_watcher()
+
+    return bench.results
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the texture panel callbacks on a synthetic library")
+    parser.add_argument("--library", help="an existing library to use instead of a synthetic one")
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument("--files", type=int, default=200, help="images per folder")
+    parser.add_argument("--depth", type=int, default=1, help="levels of sub folders below a category")
+    parser.add_argument("--sub-folders", type=int, default=3, help="sub folders per folder")
+    parser.add_argument("--iterations", type=int, default=50, help="timed calls per callback")
+    parser.add_argument("--search", default="rock", help="query of the search scenario, empty to skip it")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="allowed p50 growth against the baseline")
+    args = parser.parse_args()
+
+    work_directory = tempfile.mkdtemp(prefix="textures_manager_bench_")
+    # Keep the thumbnail caches of the add-ons out of the user's cache
+    os.environ["XDG_CACHE_HOME"] = os.path.join(work_directory, "cache")
+
+    try:
+        if args.library:
+            library = os.path.abspath(args.library)
+            categories = sorted(entry.path for entry in os.scandir(library) if entry.is_dir())
+        else:
+            library = os.path.join(work_directory, "library")
+            start = time.perf_counter()
+            categories = generate_library(library, args.categories, args.files, args.depth, args.sub_folders)
+            print("Library of %d categories, %d images per folder, depth %d, written in %.1f s" % (
+                len(categories), args.files, args.depth, time.perf_counter() - start))
+
+        if not categories:
+            parser.error("the library has no category folders")
+
+        results = run_benchmarks(args, library, categories)
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+
+    report(results)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"arguments": vars(args), "results": results}, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions against %s:" % args.baseline)
+            for regression in regressions:
+                print("  " + regression)
+            sys.exit(1)
+        print("\nNo regressions against %s" % args.baseline)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,487 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENCE BLOCK #####
+
+"""Stand-in for the parts of bpy the add-ons use, so they can be timed without Blender.
+
+Only the surfaces the two add-on modules touch are provided, and they do the
+least work possible: previews never decode anything, layouts draw nothing and
+data-blocks are plain objects. install() puts the stand-in in sys.modules and
+must be called before the add-ons are imported.
+"""
+
+import os
+import sys
+import time
+import types
+import struct
+import zlib
+from itertools import count
+
+#--------------------------------------------------------------------------------------
+# P R E V I E W S
+#--------------------------------------------------------------------------------------
+
+icon_ids = count(1000)
+
+class ForeachArray:
+    """The foreach_get / foreach_set side of a bpy_prop_array"""
+
+    def __init__(self, owner, name):
+        self.owner = owner
+        self.name = name
+
+    def foreach_get(self, buffer):
+        pixels = getattr(self.owner, self.name)
+        for i in range(min(len(buffer), len(pixels))):
+            buffer[i] = pixels[i]
+
+    def foreach_set(self, buffer):
+        setattr(self.owner, self.name, list(buffer))
+
+class ImagePreview:
+
+    def __init__(self, filepath=None):
+        self.icon_id = next(icon_ids)
+        self.filepath = filepath
+        self._image_size = (0, 0)
+        self._icon_size = (0, 0)
+        self._image_pixels = []
+        self._icon_pixels = []
+
+    @property
+    def image_size(self):
+        # Blender decodes the image here, the stand-in only pretends to
+        if self.filepath is not None and self._image_size == (0, 0):
+            self._image_size = (128, 128)
+            self._image_pixels = [-1] * (128 * 128)
+        return self._image_size
+
+    @image_size.setter
+    def image_size(self, size):
+        self._image_size = tuple(size)
+
+    @property
+    def icon_size(self):
+        if self.filepath is not None and self._icon_size == (0, 0):
+            self._icon_size = (32, 32)
+            self._icon_pixels = [-1] * (32 * 32)
+        return self._icon_size
+
+    @icon_size.setter
+    def icon_size(self, size):
+        self._icon_size = tuple(size)
+
+    @property
+    def image_pixels(self):
+        return ForeachArray(self, "_image_pixels")
+
+    @property
+    def icon_pixels(self):
+        return ForeachArray(self, "_icon_pixels")
+
+class ImagePreviewCollection(dict):
+
+    def new(self, name):
+        if name in self:
+            raise KeyError("key %r already exists" % name)
+        preview = self[name] = ImagePreview()
+        return preview
+
+    def load(self, name, filepath, filetype, force_reload=False):
+        if name in self and not force_reload:
+            raise KeyError("key %r already exists" % name)
+        preview = self[name] = ImagePreview(filepath)
+        return preview
+
+    def close(self):
+        self.clear()
+
+def previews_new():
+    return ImagePreviewCollection()
+
+def previews_remove(pcoll):
+    pcoll.close()
+
+#--------------------------------------------------------------------------------------
+# D A T A
+#--------------------------------------------------------------------------------------
+
+def png_bytes(width, height):
+    """A blank grayscale PNG"""
+    rows = b"\x00" * ((width + 1) * height)
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+    return (b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b""))
+
+class ID:
+
+    def __init__(self, name):
+        self._name = name
+        # The blend data collection holding the datablock, kept up to date on rename
+        self.collection = None
+        self.users = 0
+        self.use_fake_user = False
+        # Custom properties
+        self.properties = {}
+
+    def as_pointer(self):
+        return id(self)
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        collection = self.collection
+        if collection is None:
+            self._name = name
+            return
+        del collection.items[self._name]
+        self._name = collection.unique_name(name)
+        collection.items[self._name] = self
+
+    def get(self, key, default=None):
+        return self.properties.get(key, default)
+
+    def __getitem__(self, key):
+        return self.properties[key]
+
+    def __setitem__(self, key, value):
+        self.properties[key] = value
+
+    def __contains__(self, key):
+        return key in self.properties
+
+class Image(ID):
+
+    def __init__(self, name, filepath):
+        super().__init__(name)
+        self.filepath = filepath
+        # Blender knows the size once the pixels are decoded, the stand-in makes one up
+        self.size = (1024, 1024) if filepath else (0, 0)
+        self.channels = 4
+        self.is_float = False
+        self.filepath_raw = filepath
+        self.file_format = 'PNG'
+        self.has_data = bool(filepath)
+
+    def buffers_free(self):
+        self.has_data = False
+
+    def copy(self):
+        images = sys.modules["bpy"].data.images
+        image = images.add(Image(images.unique_name(self.name), self.filepath))
+        image.size = self.size
+        return image
+
+    def scale(self, width, height):
+        self.size = (width, height)
+
+    def save(self):
+        # A valid, if blank, image of the right size
+        width, height = self.size
+        with open(self.filepath_raw, "wb") as file:
+            file.write(png_bytes(width, height))
+
+class Texture(ID):
+
+    def __init__(self, name, type):
+        super().__init__(name)
+        self.type = type
+        self._image = None
+        self.preview = ImagePreview()
+
+    @property
+    def image(self):
+        return self._image
+
+    @image.setter
+    def image(self, image):
+        # Images are freed by the add-ons once unused, so their users are counted
+        if self._image is not None:
+            self._image.users -= 1
+        if image is not None:
+            image.users += 1
+        self._image = image
+
+class IDCollection:
+
+    def __init__(self):
+        self.items = {}
+
+    def __iter__(self):
+        return iter(list(self.items.values()))
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, name):
+        return name in self.items
+
+    def __getitem__(self, name):
+        return self.items[name]
+
+    def get(self, name, default=None):
+        return self.items.get(name, default)
+
+    def unique_name(self, name):
+        unique = name
+        number = 1
+        while unique in self.items:
+            unique = "%s.%03d" % (name, number)
+            number += 1
+        return unique
+
+    def add(self, datablock):
+        datablock.collection = self
+        self.items[datablock.name] = datablock
+        return datablock
+
+    def remove(self, datablock, do_unlink=True, do_id_user=True, do_ui_user=True):
+        self.items.pop(datablock.name, None)
+        datablock.collection = None
+
+class Images(IDCollection):
+
+    def load(self, filepath, check_existing=False):
+        name = os.path.basename(filepath)
+        if check_existing:
+            for image in self.items.values():
+                if image.filepath == filepath:
+                    return image
+        # Blender reads the file header here
+        os.stat(filepath)
+        return self.add(Image(self.unique_name(name), filepath))
+
+    def new(self, name, width, height, alpha=False, float_buffer=False):
+        image = self.add(Image(self.unique_name(name), ""))
+        image.size = (width, height)
+        return image
+
+class Textures(IDCollection):
+
+    def new(self, name, type):
+        return self.add(Texture(self.unique_name(name), type))
+
+class BlendData:
+
+    def __init__(self):
+        self.images = Images()
+        self.textures = Textures()
+        self.brushes = IDCollection()
+        self.scenes = IDCollection()
+
+#--------------------------------------------------------------------------------------
+# U I
+#--------------------------------------------------------------------------------------
+
+class Layout:
+    """Accepts every layout call and draws nothing"""
+
+    def __getattr__(self, name):
+        return self.element
+
+    def element(self, *args, **kwargs):
+        return Layout()
+
+class DrawFunctions(list):
+    """Panel draw functions, appended and prepended like the real panel types"""
+
+    def append(self, function):
+        super().append(function)
+
+    def prepend(self, function):
+        self.insert(0, function)
+
+def panel_type():
+    panel = type("Panel", (), {})
+    functions = DrawFunctions()
+    panel.append = functions.append
+    panel.prepend = functions.prepend
+    panel.remove = functions.remove
+    panel.draw = None
+    return panel
+
+#--------------------------------------------------------------------------------------
+# A P P
+#--------------------------------------------------------------------------------------
+
+class Timers:
+    """bpy.app.timers, run by hand with run() instead of by an event loop"""
+
+    def __init__(self):
+        self.functions = {}
+
+    def register(self, function, first_interval=0.0, persistent=False):
+        self.functions[function] = persistent
+
+    def unregister(self, function):
+        del self.functions[function]
+
+    def is_registered(self, function):
+        return function in self.functions
+
+    def run(self, timeout=10.0):
+        """Call the registered timers until the ones that finish on their own are done.
+
+        Persistent timers (the library watcher) never finish, they are called once.
+        Returns the number of calls made.
+        """
+        calls = 0
+        deadline = time.monotonic() + timeout
+        functions = list(self.functions)
+
+        while functions and time.monotonic() < deadline:
+            intervals = []
+            for function in functions:
+                calls += 1
+                interval = function()
+                if interval is None:
+                    self.functions.pop(function, None)
+                else:
+                    intervals.append(interval)
+
+            functions = [function for function, persistent in self.functions.items() if not persistent]
+            if functions and intervals:
+                time.sleep(min(min(intervals), 0.02))
+
+        return calls
+
+class Handlers:
+
+    def __init__(self):
+        self.depsgraph_update_post = []
+        self.load_post = []
+        self.save_pre = []
+
+    @staticmethod
+    def persistent(function):
+        return function
+
+#--------------------------------------------------------------------------------------
+# I N S T A L L
+#--------------------------------------------------------------------------------------
+
+def prop(*args, **kwargs):
+    return (args, kwargs)
+
+def collection_prop(*args, **kwargs):
+    return (args, dict(kwargs, collection=True))
+
+class Collection(list):
+    """Collection property, its items hold the defaults of the item type"""
+
+    def __init__(self, item_type):
+        super().__init__()
+        self.item_type = item_type
+
+    def add(self):
+        item = types.SimpleNamespace(**{name: kwargs.get("default", "")
+            for name, (args, kwargs) in getattr(self.item_type, "__annotations__", {}).items()})
+        self.append(item)
+        return item
+
+    def remove(self, index):
+        del self[index]
+
+    def move(self, from_index, to_index):
+        self.insert(to_index, self.pop(from_index))
+
+def install():
+    """Put the stand-in modules in sys.modules and return the bpy stand-in"""
+    if "bpy" in sys.modules:
+        return sys.modules["bpy"]
+
+    bpy = types.ModuleType("bpy")
+
+    bpy_types = types.ModuleType("bpy.types")
+    for name in ("Operator", "Menu", "Panel", "PropertyGroup", "AddonPreferences", "UIList", "OperatorFileListElement"):
+        setattr(bpy_types, name, type(name, (), {}))
+    for name in ("Brush", "Scene", "WindowManager", "Object"):
+        setattr(bpy_types, name, type(name, (), {}))
+    bpy_types.BlendData = BlendData
+    bpy_types.Texture = Texture
+    bpy_types.Image = Image
+    bpy_types.ID = ID
+    bpy_types.VIEW3D_PT_tools_brush_texture = panel_type()
+    bpy_types.USERPREF_PT_file_paths_data = panel_type()
+
+    bpy_props = types.ModuleType("bpy.props")
+    for name in ("StringProperty", "EnumProperty", "BoolProperty", "IntProperty", "FloatProperty",
+                 "PointerProperty"):
+        setattr(bpy_props, name, prop)
+    bpy_props.CollectionProperty = collection_prop
+
+    bpy_utils = types.ModuleType("bpy.utils")
+    bpy_utils.register_class = lambda cls: None
+    bpy_utils.unregister_class = lambda cls: None
+    previews = types.ModuleType("bpy.utils.previews")
+    previews.new = previews_new
+    previews.remove = previews_remove
+    previews.ImagePreviewCollection = ImagePreviewCollection
+    bpy_utils.previews = previews
+
+    bpy_app = types.ModuleType("bpy.app")
+    bpy_app.timers = Timers()
+    bpy_app.handlers = Handlers()
+    bpy_app.background = True
+    bpy_app.binary_path = ""
+    bpy_app.version = (2, 91, 0)
+
+    bpy_path = types.ModuleType("bpy.path")
+    bpy_path.abspath = lambda path, start=None, library=None: path
+    bpy_path.ensure_ext = lambda filepath, ext, case_sensitive=False: filepath if filepath.lower().endswith(ext) else filepath + ext
+
+    bpy_msgbus = types.ModuleType("bpy.msgbus")
+    bpy_msgbus.subscribe_rna = lambda **kwargs: None
+    bpy_msgbus.clear_by_owner = lambda owner: None
+
+    bpy.types = bpy_types
+    bpy.props = bpy_props
+    bpy.utils = bpy_utils
+    bpy.app = bpy_app
+    bpy.msgbus = bpy_msgbus
+    bpy.path = bpy_path
+    bpy.data = BlendData()
+    bpy.context = None
+
+    bl_ui = types.ModuleType("bl_ui")
+    paint_common = types.ModuleType("bl_ui.properties_paint_common")
+    paint_common.brush_texture_settings = lambda layout, brush, sculpt: None
+    bl_ui.properties_paint_common = paint_common
+
+    sys.modules.update({
+        "bpy": bpy,
+        "bpy.types": bpy_types,
+        "bpy.props": bpy_props,
+        "bpy.utils": bpy_utils,
+        "bpy.utils.previews": previews,
+        "bpy.app": bpy_app,
+        "bpy.msgbus": bpy_msgbus,
+        "bpy.path": bpy_path,
+        "bl_ui": bl_ui,
+        "bl_ui.properties_paint_common": paint_common,
+    })
+
+    return bpy
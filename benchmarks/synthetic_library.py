@@ -0,0 +1,116 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENCE BLOCK #####
+
+"""Synthetic alpha libraries for the benchmarks.
+
+A library has `categories` top level folders. Every folder holds `files` images
+and, down to `depth` levels, `sub_folders` folders of its own. The images are
+small but valid PNG files with varied names, so labels, search and header
+probing all have something real to work on.
+
+    python synthetic_library.py DIRECTORY --categories 20 --files 200 --depth 2
+"""
+
+import argparse
+import os
+import random
+import struct
+import zlib
+
+# Words the image names are made of
+words = (
+    "rock", "stone", "crack", "skin", "pore", "scale", "bark", "wood", "cloth", "fabric",
+    "noise", "brush", "stroke", "dirt", "rust", "metal", "scratch", "leather", "fold", "wrinkle",
+    "grain", "cliff", "sand", "mud", "ice", "lava", "coral", "moss", "tile", "brick",
+)
+
+# Name styles found in real libraries
+name_styles = (
+    lambda a, b, n: "%s_%s_%02d" % (a, b, n),
+    lambda a, b, n: "%s%s%d" % (a.capitalize(), b.capitalize(), n),
+    lambda a, b, n: "%s %s %d" % (a, b, n),
+    lambda a, b, n: "%s-%s-%03d" % (a.upper(), b, n),
+)
+
+extensions = (".png", ".png", ".png", ".jpg", ".tif")
+
+def png_bytes(width, height, seed):
+    """A grayscale PNG of width x height, different for every seed"""
+    rows = b"".join(b"\x00" + bytes((x * 7 + y * 3 + seed) & 0xff for x in range(width)) for y in range(height))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+    return (b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows, 6))
+        + chunk(b"IEND", b""))
+
+def image_names(rng, count):
+    names = set()
+    while len(names) < count:
+        a, b = rng.sample(words, 2)
+        style = rng.choice(name_styles)
+        names.add(style(a, b, rng.randrange(1000)) + rng.choice(extensions))
+    return sorted(names)
+
+def folder_name(rng, level, index):
+    # Mixed case folder names, so paths built from category identifiers are checked on case sensitive systems
+    return "%s_%s_%02d" % (rng.choice(words).capitalize(), "ABCDEFGH"[level], index)
+
+def fill_folder(rng, directory, files, image_size):
+    os.makedirs(directory, exist_ok=True)
+    for seed, name in enumerate(image_names(rng, files)):
+        with open(os.path.join(directory, name), "wb") as file:
+            file.write(png_bytes(image_size, image_size, seed))
+
+def generate_library(root, categories=10, files=100, depth=1, sub_folders=3, image_size=16, seed=0):
+    """Write a library to root and return its category directories"""
+    rng = random.Random(seed)
+    category_directories = []
+
+    def fill_tree(directory, level):
+        fill_folder(rng, directory, files, image_size)
+        if level < depth:
+            for index in range(sub_folders):
+                fill_tree(os.path.join(directory, folder_name(rng, level + 1, index)), level + 1)
+
+    for index in range(categories):
+        directory = os.path.join(root, folder_name(rng, 0, index))
+        fill_tree(directory, 0)
+        category_directories.append(directory)
+
+    return category_directories
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic alpha library")
+    parser.add_argument("directory")
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument("--files", type=int, default=100, help="images per folder")
+    parser.add_argument("--depth", type=int, default=1, help="levels of sub folders below a category")
+    parser.add_argument("--sub-folders", type=int, default=3, help="sub folders per folder")
+    parser.add_argument("--image-size", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    directories = generate_library(args.directory, args.categories, args.files, args.depth,
+                                   args.sub_folders, args.image_size, args.seed)
+    print("%d categories written to %s" % (len(directories), args.directory))
+
+if __name__ == "__main__":
+    main()
@@ -26,15 +26,330 @@ bl_info = {
     "category": "Textures"
 }
 
-import bpy, os, sys, string, re
+import bpy, os, sys, string, re, time, hashlib, struct, zlib, json, builtins, threading, mmap, subprocess, argparse
 import bpy.utils.previews
-from bpy.types import Operator, Menu, Panel, PropertyGroup, AddonPreferences, BlendData, Brush
-from bpy.props import StringProperty, EnumProperty, BoolProperty, IntProperty
+from array import array
+from collections import deque, OrderedDict
+from queue import SimpleQueue
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+from bisect import bisect_left
+from bpy.types import Operator, Menu, Panel, PropertyGroup, AddonPreferences, BlendData, Brush, OperatorFileListElement
+from bpy.props import StringProperty, EnumProperty, BoolProperty, IntProperty, CollectionProperty
 from bl_ui.properties_paint_common import brush_texture_settings
     
+#--------------------------------------------------------------------------------------
+# P R O F I L I N G
+#--------------------------------------------------------------------------------------
+
+# PROFILE RECORD
+class ProfileRecord:
+    """Calls, time and file system operations of one callback, nested callbacks included"""
+
+    __slots__ = ('kind', 'calls', 'total', 'longest', 'fs_ops')
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.calls = 0
+        self.total = 0.0
+        self.longest = 0.0
+        self.fs_ops = 0
+
+# PROFILER
+class Profiler:
+    """Opt-in call counts, time and file system operations of the add-on callbacks.
+
+    Disabled, a profiled callback costs one attribute check. Enabled, every file
+    system operation the add-on makes through its fs_ helpers is counted for every
+    profiled callback running on the same thread. Nothing outside the add-on is
+    wrapped, other add-ons and Blender itself are neither counted nor touched.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.records = {}
+        self.started = time.time()
+        self.lock = threading.Lock()
+        # Records of the profiled callbacks running, per thread
+        self.local = threading.local()
+
+    def stack(self):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def count_fs(self):
+        """Count one file system operation for the profiled callbacks running on this thread"""
+        stack = getattr(self.local, 'stack', None)
+        if stack:
+            with self.lock:
+                for record in stack:
+                    record.fs_ops += 1
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+
+    def call(self, name, kind, function, args, kwargs):
+        with self.lock:
+            record = self.records.get(name)
+            if record is None:
+                record = self.records[name] = ProfileRecord(kind)
+
+        stack = self.stack()
+        stack.append(record)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            with self.lock:
+                record.calls += 1
+                record.total += elapsed
+                record.longest = max(record.longest, elapsed)
+
+    def reset(self):
+        with self.lock:
+            self.records.clear()
+        self.started = time.time()
+
+    def sorted_records(self):
+        """Name and record of every profiled callback, most time consuming first"""
+        with self.lock:
+            return sorted(self.records.items(), key=lambda item: item[1].total, reverse=True)
+
+    def as_dict(self):
+        callbacks = {}
+        for name, record in self.sorted_records():
+            callbacks[name] = {
+                "kind": record.kind,
+                "calls": record.calls,
+                "total_ms": record.total * 1000.0,
+                "mean_ms": record.total * 1000.0 / record.calls if record.calls else 0.0,
+                "max_ms": record.longest * 1000.0,
+                "fs_ops": record.fs_ops,
+            }
+
+        return {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "duration_s": time.time() - self.started,
+            "callbacks": callbacks,
+        }
+
+profiler = Profiler()
+
+# COUNTED FILE SYSTEM FUNCTION
+def counted_fs(module, name):
+    """module.name, counted by the profiler while it's enabled"""
+    def counted(*args, **kwargs):
+        if profiler.enabled:
+            profiler.count_fs()
+        return getattr(module, name)(*args, **kwargs)
+
+    counted.__name__ = "fs_" + name
+    return counted
+
+# Every file system operation of the add-on goes through these
+fs_stat = counted_fs(os, 'stat')
+fs_scandir = counted_fs(os, 'scandir')
+fs_listdir = counted_fs(os, 'listdir')
+fs_isdir = counted_fs(os.path, 'isdir')
+fs_isfile = counted_fs(os.path, 'isfile')
+fs_exists = counted_fs(os.path, 'exists')
+fs_open = counted_fs(builtins, 'open')
+
+# PROFILED DECORATOR
+def profiled(kind):
+    """Record the calls of the decorated callback while profiling is enabled"""
+    def decorator(function):
+        name = function.__qualname__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return function(*args, **kwargs)
+            return profiler.call(name, kind, function, args, kwargs)
+
+        return wrapper
+
+    return decorator
+
+# UPDATE PROFILING FUNCTION
+def update_profiling(self, context):
+    profiler.set_enabled(self.use_profiling)
+
+# DRAW PROFILE FUNCTION
+def draw_profile(layout):
+    records = profiler.sorted_records()
+
+    box = layout.box()
+    col = box.column(align=True)
+
+    if not records:
+        col.label(text="Nothing recorded yet, use the texture panel to record its callbacks", icon='INFO')
+        return
+
+    row = col.row()
+    row.label(text="Callback")
+    for heading in ("Kind", "Calls", "Total ms", "Mean ms", "Max ms", "FS Ops"):
+        row.label(text=heading)
+
+    for name, record in records:
+        row = col.row()
+        row.label(text=name)
+        row.label(text=record.kind.title())
+        row.label(text="%d" % record.calls)
+        row.label(text="%.1f" % (record.total * 1000.0))
+        row.label(text="%.2f" % (record.total * 1000.0 / max(record.calls, 1)))
+        row.label(text="%.1f" % (record.longest * 1000.0))
+        row.label(text="%d" % record.fs_ops)
+
+#--------------------------------------------------------------------------------------
+# S T A R T U P
+#--------------------------------------------------------------------------------------
+
+# Seconds between registering and listing the library, so Blender starts first
+warm_up_delay = 2.0
+
+# STARTUP REPORT
+class StartupReport:
+    """What loading the add-on cost, and when its library was ready.
+
+    register only hooks the add-on into Blender, it doesn't touch the disk. The library
+    is listed after startup by the library walker, in a worker thread, so the first
+    panel draw finds it listed without Blender waiting for it.
+    """
+
+    def __init__(self):
+        # perf_counter at the end of register, and how long register took
+        self.registered = None
+        self.register_time = 0.0
+        # Seconds after register and duration of the first call of each timed function
+        self.first_calls = {}
+        # Roots being walked, None before the walk started and once it's done
+        self.warm_up = None
+        self.warming = False
+        # Time spent adding the listed folders on the main thread
+        self.warm_up_time = 0.0
+        self.warm_up_folders = 0
+        # Seconds after register the library was listed, None until then
+        self.warm_up_ready = None
+
+    def begin(self):
+        self.first_calls.clear()
+        self.warm_up = None
+        self.warming = True
+        self.warm_up_time = 0.0
+        self.warm_up_folders = 0
+        self.warm_up_ready = None
+
+    def end(self, started):
+        self.registered = time.perf_counter()
+        self.register_time = self.registered - started
+
+    def since_register(self):
+        return time.perf_counter() - self.registered if self.registered is not None else 0.0
+
+    def finish_warm_up(self):
+        self.warm_up = None
+        self.warming = False
+        self.warm_up_ready = self.since_register()
+
+    def stop(self):
+        self.warm_up = None
+        self.warming = False
+
+startup = StartupReport()
+
+# TIMED FIRST CALL DECORATOR
+def timed_first_call(label):
+    """Record in the startup report when the decorated function was first called and how long it took"""
+    def decorator(function):
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if label in startup.first_calls:
+                return function(*args, **kwargs)
+
+            since_register = startup.since_register()
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                startup.first_calls[label] = (since_register, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+# WARM UP LIBRARY TIMER
+def warm_up_library():
+    preferences = bpy.context.preferences.addons[__name__].preferences
+
+    if not preferences.use_warm_up:
+        startup.stop()
+        return None
+
+    # Only the quick access thumbnails are shown, the library is walked once it's browsed
+    if startup.warm_up is None and quick_access_pending(preferences):
+        return 1.0
+
+    if startup.warm_up is None:
+        # The thumbnail cache folder is listed once, ahead of the first thumbnail
+        if preferences.use_thumbnail_cache:
+            thumbnail_loader.submit(thumbnail_cache.list_files)
+
+        roots = []
+        for path_folder in ('sculpting_texture_directory', 'vertex_paint_texture_directory', 'texture_paint_texture_directory'):
+            root = getattr(preferences, path_folder)
+            # A prebuilt catalog lists the whole library at once
+            if root and os.path.normpath(root) not in roots and shared_library(root) is None:
+                roots.append(os.path.normpath(root))
+
+        # Walked in a worker, drain_library_walks adds the folders to the catalog
+        for root in roots:
+            library_walker.request(root)
+        startup.warm_up = roots
+
+    if any(root in library_walker.walking for root in startup.warm_up):
+        return 0.1
+
+    startup.finish_warm_up()
+    return None
+
+# DRAW STARTUP REPORT FUNCTION
+def draw_startup_report(layout, preferences):
+    box = layout.box()
+    col = box.column(align=True)
+
+    col.label(text="Register: %.2f ms, no library access" % (startup.register_time * 1000.0))
+
+    for label, (since_register, duration) in sorted(startup.first_calls.items()):
+        col.label(text="%s: %.1f ms, %.1f s after register" % (label, duration * 1000.0, since_register))
+
+    if startup.warm_up_ready is not None:
+        col.label(text="Library warm up: %d folders, %.1f ms on the main thread, ready %.1f s after register" % (
+            startup.warm_up_folders, startup.warm_up_time * 1000.0, startup.warm_up_ready))
+    elif startup.warming and startup.warm_up is None and quick_access_pending(preferences):
+        col.label(text="Library warm up: waiting for the library to be browsed, quick access only")
+    elif startup.warming:
+        col.label(text="Library warm up: %d folders listed so far" % startup.warm_up_folders, icon='TIME')
+    elif not preferences.use_warm_up:
+        col.label(text="Library warm up: off, folders are listed when first shown")
+
 #--------------------------------------------------------------------------------------
 # A D D O N   P R E F E R E N C E S
 #--------------------------------------------------------------------------------------
+
+# TEXTURE SHORTCUT
+class TextureShortcut(PropertyGroup):
+    """An image of the library kept in the favorites or the recent textures"""
+
+    filepath: StringProperty(
+        name="File Path",
+        subtype='FILE_PATH',
+    )
     
 class PreferencesTextureFilePaths(AddonPreferences):
 
@@ -80,7 +395,166 @@ class PreferencesTextureFilePaths(AddonPreferences):
         default=8,        
         description='The scale of the texture UI preview'
     )                 
+
+    use_thumbnail_cache: BoolProperty(
+        name="Thumbnail Cache",
+        default=True,
+        description='Keep small copies of the texture previews on disk, so large textures are only decoded once'
+    )
+
+    thumbnail_cache_size: IntProperty(
+        name="Cache Size (MB)",
+        min=16,
+        max=8192,
+        default=256,
+        description='The disk space the thumbnail cache may use, least recently used thumbnails are removed first'
+    )
+
+    preview_pool_size: IntProperty(
+        name="Kept Folders",
+        min=1,
+        max=64,
+        default=8,
+        description='How many folders keep their previews loaded, so going back to them is instant'
+    )
+
+    preview_pool_items: IntProperty(
+        name="Kept Previews",
+        min=100,
+        max=100000,
+        default=3000,
+        description='How many previews may stay loaded in total, about 70 KB of memory each'
+    )
+
+    use_paging: BoolProperty(
+        name="Paging",
+        default=False,
+        description='Show large folders one page at a time, only the thumbnails of the page shown and its neighbours are loaded'
+    )
+
+    page_size: IntProperty(
+        name="Page Size",
+        min=10,
+        max=1000,
+        default=100,
+        description='How many textures a page shows'
+    )
+
+    max_image_size: IntProperty(
+        name="Max Image Size",
+        min=0,
+        default=16384,
+        subtype='PIXEL',
+        description='Images wider or taller than this are left out of the previews, 0 for no limit'
+    )
+
+    duplicate_threshold: IntProperty(
+        name="Duplicate Distance",
+        min=0,
+        max=24,
+        default=6,
+        description='How many of the 64 bits of their perceptual hashes two images may differ by and still be near duplicates'
+    )
+
+    use_warm_up: BoolProperty(
+        name="Warm Up Library",
+        default=True,
+        description='List the library folders in the background after Blender starts, so the first panel draw doesn\'t wait for the disk'
+    )
+
+    use_library_watcher: BoolProperty(
+        name="Watch Library",
+        default=True,
+        description='Show textures added, removed or changed in the library folders while Blender is running'
+    )
+
+    use_persistent_texture: BoolProperty(
+        name="Reuse Brush Texture",
+        default=True,
+        description='Keep one texture per brush and mode and only change its image, instead of creating a texture for every image picked'
+    )
+
+    image_pool_size: IntProperty(
+        name="Kept Images",
+        min=1,
+        max=256,
+        default=16,
+        description='How many picked images stay loaded, so picking them again is instant'
+    )
+
+    image_memory_budget: IntProperty(
+        name="Image Memory (MB)",
+        min=64,
+        max=65536,
+        default=2048,
+        description='The memory the images loaded from the library may use. Past it, the least recently picked images no brush uses are freed'
+    )
+
+    show_image_memory: BoolProperty(
+        name="Show Image Memory",
+        default=False,
+        description='Show the memory used by the images loaded from the library, by folder'
+    )
+
+    prefetch_count: IntProperty(
+        name="Prefetch",
+        min=0,
+        max=16,
+        default=2,
+        description='How many images before and after the picked one are loaded ahead, so stepping through a category is instant. 0 turns prefetching off'
+    )
+
+    prefetch_budget: IntProperty(
+        name="Prefetch Memory (MB)",
+        min=16,
+        max=16384,
+        default=512,
+        description='The memory the images loaded ahead may use'
+    )
+
+    use_proxy_textures: BoolProperty(
+        name="Proxy Textures",
+        default=False,
+        description='Put a small copy of a large image on the brush right away, and swap in the full image once it is loaded'
+    )
+
+    proxy_size: IntProperty(
+        name="Proxy Size",
+        min=64,
+        max=4096,
+        default=512,
+        description='The longest side of the proxy images, in pixels'
+    )
+
+    use_profiling: BoolProperty(
+        name="Profiling",
+        default=False,
+        description='Record the calls, time and file system operations of the texture panel callbacks',
+        update=update_profiling
+    )
     
+    use_quick_access: BoolProperty(
+        name="Quick Access",
+        default=True,
+        description='Show the favorite and recent textures above the library, the library is only listed once it is browsed'
+    )
+
+    recent_count: IntProperty(
+        name="Recent Textures",
+        min=0,
+        max=100,
+        default=12,
+        description='How many of the last picked textures are kept for quick access'
+    )
+
+    favorites: CollectionProperty(
+        type=TextureShortcut,
+    )
+
+    recents: CollectionProperty(
+        type=TextureShortcut,
+    )
+
     def draw(self, context):
         layout = self.layout
         prefs = context.preferences
@@ -88,6 +562,83 @@ class PreferencesTextureFilePaths(AddonPreferences):
         row = layout.row(align=True)
         row.prop(self, "show_labels")         
         row.prop(self, "preview_scale")
+
+        row = layout.row(align=True)
+        row.prop(self, "use_thumbnail_cache")
+        row_enabled = row.row(align=True)
+        row_enabled.enabled = self.use_thumbnail_cache
+        row_enabled.prop(self, "thumbnail_cache_size")
+        row_enabled.operator("texture_thumbnails.build_atlases", text='', icon='RENDERLAYERS')
+        row_enabled.operator("texture_thumbnails.clear_cache", text='', icon='TRASH')
+
+        row = layout.row(align=True)
+        row.prop(self, "preview_pool_size")
+        row.prop(self, "preview_pool_items")
+
+        row = layout.row(align=True)
+        row.prop(self, "use_paging")
+        row_enabled = row.row(align=True)
+        row_enabled.enabled = self.use_paging
+        row_enabled.prop(self, "page_size")
+
+        row = layout.row(align=True)
+        row.prop(self, "max_image_size")
+
+        row = layout.row(align=True)
+        row.operator("texture_library.find_duplicates", icon='VIEWZOOM')
+        row.prop(self, "duplicate_threshold")
+
+        if library_duplicates.analysed:
+            draw_duplicates(layout)
+
+        row = layout.row(align=True)
+        row.prop(self, "use_library_watcher")
+        row.prop(self, "use_warm_up")
+        draw_startup_report(layout, self)
+
+        row = layout.row(align=True)
+        row.prop(self, "use_persistent_texture")
+        row_enabled = row.row(align=True)
+        row_enabled.enabled = self.use_persistent_texture
+        row_enabled.prop(self, "image_pool_size")
+
+        row = layout.row(align=True)
+        row.prop(self, "show_image_memory")
+        row.prop(self, "image_memory_budget")
+        row.operator("texture_images.free_unused", text='', icon='TRASH')
+
+        if self.show_image_memory:
+            draw_image_memory(layout, context, self.image_memory_budget)
+
+        row = layout.row(align=True)
+        row.enabled = self.use_persistent_texture
+        row.prop(self, "prefetch_count")
+        row.prop(self, "prefetch_budget")
+
+        row = layout.row(align=True)
+        row.enabled = self.use_persistent_texture
+        row.prop(self, "use_proxy_textures")
+        row_enabled = row.row(align=True)
+        row_enabled.enabled = self.use_proxy_textures
+        row_enabled.prop(self, "proxy_size")
+
+        row = layout.row(align=True)
+        row.prop(self, "use_quick_access")
+        row_enabled = row.row(align=True)
+        row_enabled.enabled = self.use_quick_access
+        row_enabled.prop(self, "recent_count")
+        row_enabled.label(text="%d Favorites" % len(self.favorites))
+        row_enabled.operator("texture_quick.clear_recents", text='', icon='TRASH')
+
+        row = layout.row(align=True)
+        row.prop(self, "use_profiling")
+        row_enabled = row.row(align=True)
+        row_enabled.enabled = self.use_profiling
+        row_enabled.operator("texture_profile.reset", text='', icon='LOOP_BACK')
+        row_enabled.operator("texture_profile.export", text='', icon='EXPORT')
+
+        if self.use_profiling:
+            draw_profile(layout)
                 
         row = layout.row(align=True)                
         row.label(text="Set file paths in Preferences > File Paths > Data")
@@ -112,80 +663,197 @@ def texture_file_paths(self, context):
     col.prop(preferences, "vertex_paint_texture_directory", text="Vertex Paint Textures")
     col.prop(preferences, "texture_paint_texture_directory", text="Texture Paint Textures")
     
+# TEXTURE STATE
+class TextureState:
+    """Mode, brush, library path and categories of the texture panel.
+
+    Every value is resolved on first use only and then kept, so all the helpers
+    share one lookup. Lazy resolution also matters for the enum items callbacks:
+    the categories callback only asks for the library path and never reads the
+    category enum that it is building itself.
+    """
+
+    __slots__ = ('context', 'mode', 'generation', 'memo', '_values')
+
+    def __init__(self, context):
+        self.context = context
+        self.mode = context.object.mode
+        self.generation = None
+        # Values derived from the state (enum items, found sub categories, ...)
+        self.memo = {}
+        self._values = {}
+
+    def _get(self, name, resolve):
+        values = self._values
+        if name not in values:
+            values[name] = resolve()
+        return values[name]
+
+    @property
+    def brush(self):
+        def resolve():
+            tool = self.context.tool_settings
+            # Get brush by current mode
+            if self.mode == 'SCULPT':
+                return tool.sculpt.brush
+            elif self.mode == 'VERTEX_PAINT':
+                return tool.vertex_paint.brush
+            elif self.mode == 'TEXTURE_PAINT':
+                return tool.image_paint.brush
+        return self._get('brush', resolve)
+
+    @property
+    def lib_path_folder(self):
+        def resolve():
+            if self.mode == 'SCULPT':
+                return 'sculpting_texture_directory'
+            elif self.mode == 'VERTEX_PAINT':
+                return 'vertex_paint_texture_directory'
+            elif self.mode == 'TEXTURE_PAINT':
+                return 'texture_paint_texture_directory'
+        return self._get('lib_path_folder', resolve)
+
+    @property
+    def lib_path(self):
+        def resolve():
+            preferences = self.context.preferences.addons[__name__].preferences
+            path_folder = self.lib_path_folder
+            return getattr(preferences, path_folder) if path_folder else ''
+        return self._get('lib_path', resolve)
+
+    @property
+    def category(self):
+        return self._get('category', lambda: self.brush.brush_texture.category)
+
+    @property
+    def sub_category(self):
+        return self._get('sub_category', lambda: self.brush.brush_texture.sub_category)
+
+    @property
+    def folder_path(self):
+        return self._get('folder_path', lambda: self.brush.brush_texture.folder_path)
+
+    @property
+    def search(self):
+        return self._get('search', lambda: self.brush.brush_texture.search.strip())
+
+    @property
+    def category_directory(self):
+        return os.path.join(self.lib_path, self.category)
+
+    @property
+    def directory(self):
+        """The folder whose images are shown in the preview"""
+        # Search results are named by their path in the library
+        if self.search:
+            return self.lib_path
+
+        sub_category = self.sub_category
+        # Use the sub category, if one other than the category itself is selected,
+        # and the folders picked below it
+        if sub_category != no_folder and sub_category != self.category:
+            return os.path.join(self.lib_path, self.category, sub_category, *folder_path_parts(self.folder_path))
+        return self.category_directory
+
+    @property
+    def key(self):
+        return (self.mode, self.brush.as_pointer(), self.lib_path, self.category, self.sub_category, self.folder_path, self.search)
+
+# Identifier of the None item of the folder selectors. No listing holds a folder named
+# like it, so a folder named NONE is still a folder, and joined to a path it's harmless
+no_folder = "."
+
+# FOLDER PATH PARTS FUNCTION
+def folder_path_parts(folder_path):
+    # Folders below the sub category are stored with forward slashes on every platform
+    return [part for part in folder_path.split("/") if part]
+
+# Snapshot shared by every helper during a panel draw or an update callback
+active_texture_state = None
+# Key and results of the previous draw, reused when nothing they depend on changed
+last_texture_draw = (None, {})
+
+# TEXTURE STATE FUNCTION
+def texture_state(self, context):
+    # Inside a draw or an update callback, share its snapshot
+    if active_texture_state is not None:
+        return active_texture_state
+
+    return TextureState(context)
+
+# ENTER TEXTURE STATE FUNCTION
+def enter_texture_state(self, context):
+    global active_texture_state
+
+    # Nested calls use the outer snapshot
+    if active_texture_state is not None:
+        return None
+
+    active_texture_state = TextureState(context)
+
+    return active_texture_state
+
+# LEAVE TEXTURE STATE FUNCTION
+def leave_texture_state(state):
+    global active_texture_state
+
+    if state is not None and state is active_texture_state:
+        # The context is only valid during the callback
+        state.context = None
+        active_texture_state = None
+
+# BEGIN TEXTURE DRAW FUNCTION
+def begin_texture_draw(self, context):
+    global last_texture_draw
+
+    state = enter_texture_state(self, context)
+
+    if state is None:
+        return None
+
+    # Only the library folders the panel lists are checked for changes
+    if state.lib_path:
+        load_library(state.lib_path)
+        state.generation = library_catalog.refresh(state.lib_path, state.category_directory, state.directory)
+
+    # Same mode, brush, categories and library content as the previous draw, reuse the folder items
+    key = (state.generation, state.key)
+    previous_key, previous_memo = last_texture_draw
+    if key == previous_key:
+        for name in ('folders', 'sub_folders', 'child_folders', 'found_sub_categories'):
+            if name in previous_memo:
+                state.memo.setdefault(name, previous_memo[name])
+
+    last_texture_draw = (key, state.memo)
+
+    return state
+
 # LIB PATH FUNCTION
 def lib_path(self, context):
-    mode = context.object.mode
-    preferences = context.preferences.addons[__name__].preferences
-            
-    if mode == 'SCULPT':
-        lib_path = preferences.sculpting_texture_directory
-    elif mode == 'VERTEX_PAINT':
-        lib_path = preferences.vertex_paint_texture_directory         
-    elif mode == 'TEXTURE_PAINT':
-        lib_path = preferences.texture_paint_texture_directory
-                
-    return lib_path
+    return texture_state(self, context).lib_path
 
 # LIB PATH FOLDER FUNCTION
 def lib_path_folder(self, context):
-    mode = context.object.mode
-    
-    if mode == 'SCULPT':
-        lib_path_folder = 'sculpting_texture_directory'
-    elif mode == 'VERTEX_PAINT':
-        lib_path_folder = 'vertex_paint_texture_directory'         
-    elif mode == 'TEXTURE_PAINT':
-        lib_path_folder = 'texture_paint_texture_directory'
-                
-    return lib_path_folder
+    return texture_state(self, context).lib_path_folder
 
 # BRUSH MODE FUNCTION
 def brush_mode(self, context):
-    mode = context.object.mode
-    tool = context.tool_settings
-
-    # Get brush by current mode            
-    if mode == 'SCULPT':
-        brush_mode = tool.sculpt.brush
-    elif mode == 'VERTEX_PAINT':
-        brush_mode = tool.vertex_paint.brush        
-    elif mode == 'TEXTURE_PAINT':
-        brush_mode = tool.image_paint.brush
-                
-    return brush_mode
+    return texture_state(self, context).brush
 
 # TEXTURE FOLDER CATEGORIES FUNCTION
 def category_pointer(self, context):
-    brush = brush_mode(self, context)
-    
-    category_pointer = brush.brush_texture.category
-                        
-    return category_pointer
+    return texture_state(self, context).category
 
 # TEXTURE SUB FOLDER CATEGORIES FUNCTION
 def sub_category_pointer(self, context):
-    brush = brush_mode(self, context)
-    
-    sub_category_pointer = brush.brush_texture.sub_category
-                        
-    return sub_category_pointer
+    return texture_state(self, context).sub_category
 
 # TEXTURE SAME CATEGORY AND SUB FOLDER CATEGORY FUNCTION
 def main_sub_category_pointer(self, context):
-    brush = brush_mode(self, context)
-    
-    cat_subcat_same = False
-    
-    category_pointer = brush.brush_texture.category    
-    sub_category_pointer = brush.brush_texture.sub_category
+    state = texture_state(self, context)
 
     # Check to see if the selected category and sub category is the same
-    if sub_category_pointer == category_pointer:
-        cat_subcat_same = True
-    else:
-        cat_subcat_same = False
-                                                
-    return cat_subcat_same
+    return state.sub_category == state.category
 
 # SELECTED TEXTURE FUNCTION
 def selected_texture(self, context):
@@ -195,29 +863,35 @@ def selected_texture(self, context):
                
     return selected_texture                       
 
-# FIX LABELS FUNCTION
-def fix_labels(self, context, current_labels):
-    fix_labels = current_labels
-   
+# Label patterns, compiled once
+upper_case_pattern = re.compile(r"([A-Z])")
+number_pattern = re.compile(r"\d+|\D+")
+
+# FORMAT LABEL FUNCTION
+@lru_cache(maxsize=65536)
+def format_label(name):
     # Remove file extension
-    remove_ext = fix_labels.split('.')[0]
+    remove_ext = name.split('.')[0]
     # Remove underscore
     under = remove_ext.replace("_", " ")
     # Separate capital words
-    sep_by_upper = re.sub( r"([A-Z])", r" \1", under).split()
-    join_sep_cap = " ".join(sep_by_upper)           
+    join_sep_cap = " ".join(upper_case_pattern.sub(r" \1", under).split())
     # Capitalize all words
     cap_words = string.capwords(join_sep_cap)
     # Separate numbers from words
-    sep_num = re.findall('\d+|\D+', cap_words)
-    num_join = " ".join(sep_num).replace("  ", " ")
-        
-    fix_labels = num_join    
-    
-    
-    return fix_labels
+    return " ".join(number_pattern.findall(cap_words)).replace("  ", " ")
+
+# TEXTURE NAME FUNCTION
+def texture_name(filepath):
+    """Name of the texture made for the image at filepath, the same wherever it's picked or imported from"""
+    return format_label(os.path.splitext(os.path.basename(filepath))[0])
+
+# FIX LABELS FUNCTION
+def fix_labels(self, context, current_labels):
+    return format_label(current_labels)
 
 # SYNC PREVIEW WITH SELECTED IMAGE FUNCTION
+@profiled('UPDATE')
 def sync_image_preview(self, context):
     brush = brush_mode(self, context)   
     procedurals = preview_procedural_items(self, context)
@@ -226,9 +900,11 @@ def sync_image_preview(self, context):
     # If using image_texture    
     if self.image_texture:
         selected_item_preview = brush.brush_texture.items_in_selected_category
-        selected_item_image = brush.image_texture.image.name
+        selected_item_image = texture_image_name(brush.image_texture)
+        # Images picked outside the folder shown, from quick access, have no item to select
+        pcoll = preview_pool.current
         # Update the preview, if the selected image texture and preview is not the same                
-        if selected_item_image != selected_item_preview:
+        if selected_item_image != selected_item_preview and pcoll is not None and selected_item_image in pcoll.my_items_index:
             brush.brush_texture.items_in_selected_category = selected_item_image
                  
     # If using procedurals   
@@ -240,245 +916,3762 @@ def sync_image_preview(self, context):
             brush.brush_texture.items_procedural_textures = selected_item_image     
             
 #--------------------------------------------------------------------------------------
-# F O L D E R    F U N C T I O N A L I T I E S
+# L I B R A R Y    C A T A L O G
 #--------------------------------------------------------------------------------------
 
-# FOUND SUB CATEGORIES FUNCTION
-def found_sub_categories(self, context):
-    found_sub_categories = False
-        
-    # The selected category path                                
-    path = (lib_path(self, context) + category_pointer(self, context) + "\\")              
-
-    # See if selected category path is not empty
-    if len(os.listdir(path)) != 0:
-        for folder in os.listdir(path):
-            # Check for folders in selected category
-            if os.path.isdir(path + folder):                                    
-                found_sub_categories = True
-    else:        
-        found_sub_categories = False
-            
-    return found_sub_categories
-             
-# TEXTURE CATEGORIES FOLDER ITEMS FUNCTION
-def preview_folders_textures(self, context):
-                
-    list_of_category_folders = []
-    categories = []       
-    no_items_in_folder = [('NONE', 'None', 'None')]    
-                    
-    if not lib_path(self, context):
-        return no_items_in_folder
+# Valid file extensions
+image_extensions = ('.jpeg', '.jpg', '.png', '.tif', '.tiff', '.psd')
 
-    else:
-        # Get items in the selected category               
-        for folder in os.listdir(lib_path(self, context)):
-            if os.path.isdir(lib_path(self, context) + folder):                
-                list_of_category_folders.append(folder)
-
-        # Append the categories and fix labels                              
-        for name in list_of_category_folders:                                       
-            cap_name = fix_labels(self, context, current_labels=name)
-                                                
-            categories.append((name.upper(), cap_name, ""))
-                                             
-    return categories
+# CATALOG ENTRY
+class CatalogEntry:
+    """Folders and image files found in one library directory, with their labels"""
 
+    __slots__ = ('directory', 'mtime', 'checked', 'folders', 'images', 'labels', 'items', 'info', 'source')
 
-# TEXTURE CATEGORIES SUB FOLDER ITEMS FUNCTION
-def preview_sub_folders_textures(self, context):
-    category = category_pointer(self, context)                    
-    
-    folder_files = False
-                       
-    list_of_sub_category_folders = []
-    sub_categories = []          
-    no_items_in_folder = [('NONE', 'None', 'None')]    
-                    
-    if not lib_path(self, context):
-        return no_items_in_folder
-                  
-    else:
-        # The selected category path                                
-        path = (lib_path(self, context) + category_pointer(self, context) + "\\")              
+    def __init__(self, directory, mtime, folders, images, info=None, labels=None):
+        self.directory = directory
+        self.mtime = mtime
+        self.checked = time.monotonic()
+        self.folders = folders
+        self.images = images
+        # Labels are formatted once per listing, not in every enum items callback
+        if labels is None:
+            labels = {name: format_label(name) for name in folders}
+            labels.update((name, format_label(name)) for name in images)
+        self.labels = labels
+        # Enum items built from this listing, by kind
+        self.items = {}
+        # Header of the images probed so far, by name
+        self.info = info if info is not None else {}
+        # Shared catalog the entry was read from, None if listed here
+        self.source = None
 
-        # If selected category path is empty, return None 
-        if len(os.listdir(path)) == 0:
-            return no_items_in_folder
-    
-        for folder in os.listdir(path):
-            # Check for no folders in selected category
-            if not os.path.isdir(path + folder):                           
-                folder_files = False
-            # Check for both folders and files in selected category                
-            elif os.path.isfile(path + folder) or os.path.isdir(path + folder):                           
-                folder_files = True              
-                
-        # Add the selected category to sub categories and make it default, if both sub categories and files found or no folders found                            
-        if not folder_files or folder_files:                  
-            #list_of_sub_category_folders.append(category)                                
-            list_of_sub_category_folders.append('None')
-                        
-        # Get folders in the selected category                                        
-        for folder in os.listdir(path):
-            if os.path.isdir(path + folder):                
-                list_of_sub_category_folders.append(folder)
-
-        # Append the sub categories and fix labels                                 
-        for name in list_of_sub_category_folders:                
-            cap_name = fix_labels(self, context, current_labels=name)
-                                            
-            sub_categories.append((name.upper(), cap_name, ""))        
-            
-                                             
-    return sub_categories
-                        
-#--------------------------------------------------------------------------------------
-# P R E V I E W    F U N C T I O N A L I T I E S
-#--------------------------------------------------------------------------------------
-            
-# TEXTURE ITEMS PREVIEW FUNCTION
-def preview_category_items(self, context):
-    brush = brush_mode(self, context)        
-    enum_items = []
-    # Valid file extensions   
-    extensions = ('.jpeg', '.jpg', '.png', '.tif', '.tiff', '.psd')
-    
-    if context is None:        
-        return enum_items
+# LIBRARY CATALOG
+class LibraryCatalog:
+    """Keeps the folders and images of every visited library directory in memory.
 
-    # Adds a NONE item
-    enum_items.append(('NONE', 'None', 'None', 'TEXTURE', 0))
-        
-    is_sub_folders = preview_sub_folders_textures(self, context)
-    same_categories = main_sub_category_pointer(self, context)
-    sub_category = brush.brush_texture.sub_category
-    
-    # Path if there's sub categories and the selected category is not the same as the selected sub category    
-    if is_sub_folders is not None and not same_categories and sub_category != 'NONE':        
-        directory = os.path.join(lib_path(self, context), category_pointer(self, context), sub_category_pointer(self, context))                                  
-    else:
-        directory = os.path.join(lib_path(self, context), category_pointer(self, context))  
-
-    if "textures" not in preview_collections_textures:
-        pcoll = bpy.utils.previews.new()       
-        pcoll.my_previews_dir = ""
-        pcoll.my_previews = ()
-        preview_collections_textures["textures"] = pcoll             
-    else:             
-        pcoll = preview_collections_textures["textures"]
-        
-    # New previews if path is different, needed for poll to show correct preview textures    
-    if directory != pcoll.my_previews_dir:
-        bpy.utils.previews.remove(pcoll)
-        pcoll = bpy.utils.previews.new()       
-        pcoll.my_previews_dir = ""
-        pcoll.my_previews = ()
-        preview_collections_textures["textures"] = pcoll
-    # If nothing is changed, show current previews                
-    else: 
-        return pcoll.my_previews
+    A directory is listed once and only listed again when its modification time changes.
+    The modification time itself is checked at most once every check_interval seconds,
+    so repeated redraws don't hit the disk (or the network share) at all. Directories
+    followed by the library watcher aren't checked at all, the watcher applies their
+    changes to the catalog instead.
+    """
 
-    if directory == pcoll.my_previews_dir:
-        return pcoll.my_previews
-                        
-    if directory and os.path.exists(directory):
-        image_paths = []
-                                
-        for fn in os.listdir(directory):
-            if fn.endswith(extensions):
-                image_paths.append(fn)
-
-        for i, name in enumerate(image_paths):
-            filepath = os.path.join(directory, name)
-         
-            icon = pcoll.get(name)
-                       
-            if not icon:
-                thumb = pcoll.load(name, filepath, 'IMAGE')                                                                                                                   
+    def __init__(self, check_interval=1.0):
+        self.check_interval = check_interval
+        self.entries = {}
+        # Incremented every time a directory is listed again, changed or forgotten
+        self.generation = 0
+        # Incremented only when the content of an already listed directory changed
+        self.revision = 0
+        # Revision each directory last changed at, and the revision everything was forgotten at
+        self.changed = {}
+        self.cleared = 0
+        # Library watcher told about every listed directory, if running
+        self.watcher = None
+
+    @profiled('STAGE')
+    def scan(self, directory):
+        """Return the catalog entry of directory, or None if it can't be read"""
+        if not directory:
+            return None
+
+        directory = os.path.normpath(directory)
+        entry = self.entries.get(directory)
+
+        # Recently checked or watched, trust the cached entry
+        if entry is not None:
+            if time.monotonic() - entry.checked < self.check_interval:
+                return entry
+            if self.watcher is not None and self.watcher.is_watching(directory):
+                return entry
+            # Read from a shared catalog, its folders are checked less often
+            if entry.source is not None and entry.source.trusted and time.monotonic() - entry.checked < entry.source.check_interval:
+                return entry
+
+        try:
+            mtime = fs_stat(directory).st_mtime_ns
+        except OSError:
+            self.forget(directory)
+            return None
+
+        # Nothing added or removed since the last listing
+        if entry is not None and entry.mtime == mtime:
+            entry.checked = time.monotonic()
+            return entry
+
+        # Changed since the prebuild, its shared catalog is out of date
+        if entry is not None and entry.source is not None:
+            entry.source.stale_folders.add(directory)
+
+        return self.list_directory(directory, mtime)
+
+    def list_directory(self, directory, mtime, folder_mtimes=None):
+        """List directory into a new entry, and the modification time of its folders into folder_mtimes"""
+        listing = read_directory(directory, folder_mtimes)
+        if listing is None:
+            self.forget(directory)
+            return None
+
+        return self.add_listing(directory, mtime, *listing)
+
+    def add_listing(self, directory, mtime, folders, images):
+        """Put the folders and images listed in directory, here or in a worker, in a new entry"""
+        # Headers already probed stay valid for the images still there
+        previous = self.entries.get(directory)
+        info = None
+        if previous is not None:
+            self.touch(directory)
+            info = {name: previous.info[name] for name in images if name in previous.info}
+
+        entry = CatalogEntry(directory, mtime, folders, images, info)
+        self.entries[directory] = entry
+        self.generation += 1
+
+        if self.watcher is not None:
+            self.watcher.watch(directory, entry)
+
+        return entry
+
+    @profiled('STAGE')
+    def walk(self, root):
+        """List every folder of the library at root in one pass, returns their entries, root first.
+
+        Folders already listed and unchanged since aren't listed again, the others are
+        listed once each, so navigating the library afterwards needs no listing at all.
+        """
+        return list(self.walk_entries(root))
+
+    def walk_entries(self, root, verify=True):
+        """Same as walk, the entries are yielded as they are listed"""
+        root = os.path.normpath(root)
+        if not fs_isdir(root):
+            self.forget(root)
+            return
+
+        for directory, listing in walk_library(root, self.known_directories(root), verify):
+            entry = self.entries.get(directory) if listing is None else self.add_listing(directory, *listing)
+            if entry is not None:
+                yield entry
+
+    def known_directories(self, root):
+        """Modification time and folders of every listed directory of the library at root"""
+        prefix = os.path.join(root, "")
+        return {directory: (entry.mtime, entry.folders) for directory, entry in self.entries.items()
+            if directory == root or directory.startswith(prefix)}
+
+    def replace_entries(self, root, entries):
+        """Replace the entries of every directory of the library at root by entries listed elsewhere"""
+        prefix = os.path.join(root, "")
+        for directory in [directory for directory in self.entries if directory == root or directory.startswith(prefix)]:
+            del self.entries[directory]
+
+        # Not watched, the catalog checks the folders it shows against their listed modification time
+        for entry in entries:
+            self.entries[entry.directory] = entry
+
+        self.generation += 1
+        self.touch(root)
+
+    def apply_changes(self, directory, folders, images, removed):
+        """Update the entry of directory with the names found (or no longer found) by the watcher"""
+        entry = self.entries.get(directory)
+        if entry is None:
+            return None
+
+        new_folders = set(entry.folders)
+        new_folders.difference_update(removed)
+        new_folders.difference_update(images)
+        new_folders.update(folders)
+
+        new_images = set(entry.images)
+        new_images.difference_update(removed)
+        new_images.difference_update(folders)
+        new_images.update(images)
+
+        # Removed folders are no longer valid entries either
+        for name in removed:
+            self.forget(os.path.join(directory, name))
+
+        # Written images are probed again
+        info = {name: value for name, value in entry.info.items() if name in new_images and name not in images}
+
+        # A new entry, so everything built from the old one is rebuilt
+        entry = CatalogEntry(directory, entry.mtime, sorted(new_folders, key=str.lower), sorted(new_images, key=str.lower), info)
+        self.entries[directory] = entry
+        self.generation += 1
+        self.touch(directory)
+
+        return entry
+
+    def touch(self, directory):
+        """Tell that the content of directory changed"""
+        self.revision += 1
+        self.changed[directory] = self.revision
+
+    def root_revision(self, root):
+        """Revision the library at root last changed at, changes to other libraries don't count"""
+        root = os.path.normpath(root)
+        prefix = os.path.join(root, "")
+        revision = self.cleared
+
+        for directory, changed in self.changed.items():
+            # The directory, one of its folders, or one of its parents
+            if changed > revision and (directory == root or directory.startswith(prefix) or prefix.startswith(os.path.join(directory, ""))):
+                revision = changed
+
+        return revision
+
+    def folders(self, directory):
+        entry = self.scan(directory)
+        return entry.folders if entry is not None else []
+
+    def images(self, directory):
+        entry = self.scan(directory)
+        return entry.images if entry is not None else []
+
+    def refresh(self, *directories):
+        """Check directories for changes and return the catalog generation"""
+        for directory in directories:
+            self.scan(directory)
+
+        return self.generation
+
+    def forget(self, directory):
+        if self.entries.pop(directory, None) is not None:
+            self.generation += 1
+            self.touch(directory)
+
+    def invalidate(self, directory=None):
+        """Forget one directory, or every directory if none is given"""
+        if directory is None:
+            self.entries.clear()
+            self.changed.clear()
+            self.generation += 1
+            self.revision += 1
+            self.cleared = self.revision
+        else:
+            self.forget(os.path.normpath(directory))
+
+library_catalog = LibraryCatalog()
+
+# READ DIRECTORY FUNCTION
+def read_directory(directory, folder_mtimes=None):
+    """Sorted folders and images of directory, or None if it can't be read. Safe in worker threads.
+
+    The modification time of the folders goes into folder_mtimes.
+    """
+    folders = []
+    images = []
+
+    try:
+        with fs_scandir(directory) as dir_entries:
+            for dir_entry in dir_entries:
+                # The entry type comes with the listing, no extra stat needed
+                try:
+                    is_dir = dir_entry.is_dir()
+                    if is_dir and folder_mtimes is not None:
+                        # Comes with the listing too on Windows
+                        folder_mtimes[dir_entry.name] = dir_entry.stat().st_mtime_ns
+                except OSError:
+                    continue
+
+                if is_dir:
+                    # The prebuilt cache isn't a category
+                    if dir_entry.name != shared_cache_folder:
+                        folders.append(dir_entry.name)
+                elif dir_entry.name.lower().endswith(image_extensions):
+                    images.append(dir_entry.name)
+    except OSError:
+        return None
+
+    folders.sort(key=str.lower)
+    images.sort(key=str.lower)
+
+    return folders, images
+
+# WALK LIBRARY FUNCTION
+def walk_library(root, known, verify=True):
+    """Walk the library at root, without touching the catalog. Safe in worker threads.
+
+    Yields (directory, listing) for every folder, root first. known holds the
+    modification time and folders of the directories already listed: those whose
+    time didn't change are yielded with None as listing. Without verify, the folders
+    below an unchanged directory are trusted as they are too, without any file access,
+    the catalog checks them again when they are shown. The other folders are listed
+    once each, their listing is (mtime, folders, images).
+    """
+    pending = [(root, None)]
+
+    while pending:
+        directory, mtime = pending.pop()
+        known_directory = known.get(directory)
+
+        # Only the root, and the folders never listed, are checked before listing them
+        if mtime is None and (known_directory is None or directory == root):
+            try:
+                mtime = fs_stat(directory).st_mtime_ns
+            except OSError:
+                continue
+
+        if known_directory is not None and (mtime is None or known_directory[0] == mtime):
+            for name in reversed(known_directory[1]):
+                folder = os.path.join(directory, name)
+                if not verify:
+                    pending.append((folder, None))
+                    continue
+                try:
+                    pending.append((folder, fs_stat(folder).st_mtime_ns))
+                except OSError:
+                    pass
+            yield directory, None
+            continue
+
+        folder_mtimes = {}
+        listing = read_directory(directory, folder_mtimes)
+        if listing is None:
+            continue
+
+        folders, images = listing
+        pending.extend((os.path.join(directory, name), folder_mtimes.get(name)) for name in reversed(folders))
+        yield directory, (mtime, folders, images)
+
+# LIBRARY WALKER
+class LibraryWalker:
+    """Walks libraries in the worker threads, a timer adds the folders they list to the catalog.
+
+    The panel only lists the folders it shows, while the rest of the library is listed
+    in the background, so navigating it afterwards needs no listing at all.
+    """
+
+    def __init__(self):
+        # Roots being walked
+        self.walking = set()
+        # (root, directory, listing) of every folder listed, and (root, None, None) once a walk is over
+        self.done = SimpleQueue()
+        self.stopped = False
+
+    def request(self, root):
+        root = os.path.normpath(root)
+        if root in self.walking:
+            return
+
+        self.walking.add(root)
+        self.stopped = False
+        # Folders already listed are checked when shown, not here
+        thumbnail_loader.submit(self.walk, root, library_catalog.known_directories(root))
+
+        if not bpy.app.timers.is_registered(drain_library_walks):
+            bpy.app.timers.register(drain_library_walks, first_interval=0.02)
+
+    @profiled('STAGE')
+    def walk(self, root, known):
+        try:
+            for directory, listing in walk_library(root, known, verify=False):
+                if self.stopped:
+                    break
+                if listing is not None:
+                    self.done.put((root, directory, listing))
+        finally:
+            self.done.put((root, None, None))
+
+    def shutdown(self):
+        self.stopped = True
+        self.walking.clear()
+        self.done = SimpleQueue()
+
+library_walker = LibraryWalker()
+
+# DRAIN LIBRARY WALKS FUNCTION
+@profiled('TIMER')
+def drain_library_walks():
+    done = library_walker.done
+    listed = False
+    start = time.monotonic()
+    # Add for a few milliseconds at a time, to keep the interface responsive
+    deadline = start + 0.005
+
+    while not done.empty() and time.monotonic() < deadline:
+        root, directory, listing = done.get()
+
+        if directory is None:
+            library_walker.walking.discard(root)
+            continue
+
+        # Listed meanwhile by the panel, with the same content
+        entry = library_catalog.entries.get(directory)
+        if entry is None or entry.mtime != listing[0]:
+            library_catalog.add_listing(directory, *listing)
+            listed = True
+            if startup.warming:
+                startup.warm_up_folders += 1
+
+    if startup.warming:
+        startup.warm_up_time += time.monotonic() - start
+
+    if listed:
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type in {'PROPERTIES', 'VIEW_3D'}:
+                    area.tag_redraw()
+
+    if library_walker.walking or not done.empty():
+        return 0.02
+
+    return None
+
+#--------------------------------------------------------------------------------------
+# I M A G E    H E A D E R S
+#--------------------------------------------------------------------------------------
+
+# Names of the channel layouts
+channel_names = {1: 'Grayscale', 2: 'Grayscale Alpha', 3: 'RGB', 4: 'RGBA'}
+
+# IMAGE INFO
+class ImageInfo:
+    """Format, size and pixel layout of an image, read from its header"""
+
+    __slots__ = ('format', 'width', 'height', 'bit_depth', 'channels')
+
+    def __init__(self, format, width=0, height=0, bit_depth=0, channels=0):
+        self.format = format
+        self.width = width
+        self.height = height
+        self.bit_depth = bit_depth
+        self.channels = channels
+
+    @property
+    def corrupt(self):
+        return not self.width or not self.height
+
+    @property
+    def resolution(self):
+        return max(self.width, self.height)
+
+    @property
+    def memory(self):
+        """Bytes its pixels take once Blender decodes them, as RGBA bytes or, past 8 bits, floats"""
+        return self.width * self.height * 4 * (4 if self.bit_depth > 8 else 1)
+
+    def describe(self):
+        if self.corrupt:
+            return "%s, unreadable header" % self.format
+
+        layout = channel_names.get(self.channels, "%d Channels" % self.channels)
+        return "%d x %d, %d bit %s %s" % (self.width, self.height, self.bit_depth, layout, self.format)
+
+# PNG channels by color type
+png_channels = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}
+
+# PROBE PNG FUNCTION
+def probe_png(file, header):
+    if header[12:16] != b"IHDR" or len(header) < 26:
+        return ImageInfo('PNG')
+
+    width, height, bit_depth, color_type = struct.unpack(">IIBB", header[16:26])
+    return ImageInfo('PNG', width, height, bit_depth, png_channels.get(color_type, 0))
+
+# PROBE JPEG FUNCTION
+def probe_jpeg(file, header):
+    position = 2
+
+    # Segments are skipped by their length until the frame header
+    while True:
+        file.seek(position)
+        marker = file.read(4)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return ImageInfo('JPEG')
+
+        code = marker[1]
+        if code == 0xFF:
+            # Fill byte
+            position += 1
+            continue
+        if code == 0x01 or 0xD0 <= code <= 0xD8:
+            # Markers without a segment
+            position += 2
+            continue
+        if len(marker) < 4:
+            return ImageInfo('JPEG')
+
+        length = struct.unpack(">H", marker[2:4])[0]
+
+        # Start of frame, except the DHT, JPG and DAC markers in the same range
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            frame = file.read(6)
+            if len(frame) < 6:
+                return ImageInfo('JPEG')
+            bit_depth, height, width, channels = struct.unpack(">BHHB", frame)
+            return ImageInfo('JPEG', width, height, bit_depth, channels)
+
+        # Start of scan, no frame header before the image data
+        if code == 0xDA or length < 2:
+            return ImageInfo('JPEG')
+
+        position += 2 + length
+
+# PROBE TIFF FUNCTION
+def probe_tiff(file, header):
+    order = "<" if header[:2] == b"II" else ">"
+    version, offset = struct.unpack(order + "HI", header[2:8])
+    # BigTIFF isn't read, Blender decides
+    if version != 42:
+        return None
+
+    file.seek(offset)
+    data = file.read(2)
+    if len(data) < 2:
+        return ImageInfo('TIFF')
+
+    count = struct.unpack(order + "H", data)[0]
+    data = file.read(count * 12)
+
+    fields = {}
+    for i in range(len(data) // 12):
+        tag, kind, values, value = struct.unpack(order + "HHI4s", data[i * 12:i * 12 + 12])
+        # Short and long values, only the first one of a list is needed
+        if kind == 3 and values > 2:
+            # Doesn't fit in the entry, the value is the offset of the list
+            fields[tag] = (values, struct.unpack(order + "I", value)[0])
+        elif kind == 3:
+            fields[tag] = (values, struct.unpack(order + "H", value[:2])[0])
+        elif kind == 4:
+            fields[tag] = (values, struct.unpack(order + "I", value)[0])
+
+    width = fields.get(256, (0, 0))[1]
+    height = fields.get(257, (0, 0))[1]
+    samples, bit_depth = fields.get(258, (1, 1))
+    channels = fields.get(277, (1, samples))[1]
+
+    # One bit depth per channel, all the same in practice
+    if samples > 2:
+        file.seek(bit_depth)
+        data = file.read(2)
+        bit_depth = struct.unpack(order + "H", data)[0] if len(data) == 2 else 0
+
+    return ImageInfo('TIFF', width, height, bit_depth, channels)
+
+# PROBE PSD FUNCTION
+def probe_psd(file, header):
+    if len(header) < 26:
+        return ImageInfo('PSD')
+
+    version = struct.unpack(">H", header[4:6])[0]
+    if version not in (1, 2):
+        return ImageInfo('PSD')
+
+    channels, height, width, bit_depth = struct.unpack(">HIIH", header[12:24])
+    return ImageInfo('PSD', width, height, bit_depth, channels)
+
+# File signatures and their parsers
+image_signatures = (
+    (b"\x89PNG\r\n\x1a\n", probe_png),
+    (b"\xff\xd8", probe_jpeg),
+    (b"II*\x00", probe_tiff),
+    (b"MM\x00*", probe_tiff),
+    (b"8BPS", probe_psd),
+)
+
+# PROBE IMAGE FUNCTION
+def probe_image(filepath):
+    """Read the header of the image at filepath, without decoding it.
+
+    Returns its ImageInfo, corrupt if it isn't an image it can be, or None if it
+    can't be read right now or is a variant only Blender knows.
+    """
+    try:
+        with fs_open(filepath, "rb") as file:
+            header = file.read(32)
+            for signature, probe in image_signatures:
+                if header.startswith(signature):
+                    return probe(file, header)
+    except (OSError, struct.error):
+        return None
+
+    return ImageInfo(os.path.splitext(filepath)[1][1:].upper())
+
+# PROBE FOLDER FUNCTION
+@profiled('STAGE')
+def probe_folder(entry):
+    """Probe the images of a catalog entry that weren't probed yet"""
+    info = entry.info
+    for name in entry.images:
+        if name not in info:
+            info[name] = probe_image(os.path.join(entry.directory, name))
+
+# HEADER PROBER
+class HeaderProber:
+    """Reads the headers a sort or filter needs in the thumbnail workers, never in a callback.
+
+    Folders are probed as a whole, once. Until their headers are in, the views use
+    the headers already known, and the folder items are rebuilt when the rest arrive.
+    """
+
+    def __init__(self):
+        # Directories being probed
+        self.pending = set()
+        # Entries probed by the workers, with their headers, waiting for the timer
+        self.done = SimpleQueue()
+
+    def request(self, entry):
+        if entry.directory in self.pending:
+            return
+
+        names = [name for name in entry.images if name not in entry.info]
+        if not names:
+            return
+
+        self.pending.add(entry.directory)
+        thumbnail_loader.submit(self.probe, entry, names)
+
+        if not bpy.app.timers.is_registered(drain_headers):
+            bpy.app.timers.register(drain_headers, first_interval=0.05)
+
+    @profiled('STAGE')
+    def probe(self, entry, names):
+        info = {}
+        try:
+            for name in names:
+                info[name] = probe_image(os.path.join(entry.directory, name))
+        finally:
+            self.done.put((entry, info))
+
+    def shutdown(self):
+        self.pending.clear()
+        self.done = SimpleQueue()
+
+header_prober = HeaderProber()
+
+# DRAIN HEADERS FUNCTION
+@profiled('TIMER')
+def drain_headers():
+    done = header_prober.done
+    probed = False
+
+    while not done.empty():
+        entry, info = done.get()
+        header_prober.pending.discard(entry.directory)
+
+        # Headers read meanwhile by the thumbnail workers are kept
+        for name, image_info in info.items():
+            entry.info.setdefault(name, image_info)
+
+        # Rebuild the items of the folder with every header known
+        for pcoll in preview_pool.collections.values():
+            if pcoll.my_previews_entry is entry:
+                pcoll.my_view = None
+        probed = True
+
+    if probed:
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type in {'PROPERTIES', 'VIEW_3D'}:
+                    area.tag_redraw()
+
+    if header_prober.pending:
+        return 0.05
+
+    return None
+
+# SKIPPED IMAGE FUNCTION
+def skipped_image(info, max_size):
+    """Whether an image is left out of the previews, by its header"""
+    return info is not None and (info.corrupt or (max_size and info.resolution > max_size))
+
+# IMAGE TOOLTIP FUNCTION
+def image_tooltip(name, info):
+    return name if info is None else "%s\n%s" % (name, info.describe())
+
+#--------------------------------------------------------------------------------------
+# L I B R A R Y    W A T C H E R
+#--------------------------------------------------------------------------------------
+
+# LIBRARY CHANGE
+class LibraryChange:
+    """Names that changed in one watched directory since the last poll"""
+
+    __slots__ = ('directory', 'names', 'written')
+
+    def __init__(self, directory):
+        self.directory = directory
+        # Names added, removed or renamed
+        self.names = set()
+        # Files whose content was written
+        self.written = set()
+
+# INOTIFY WATCHER
+class InotifyWatcher:
+    """Follows library directories with Linux inotify, without polling the disk.
+
+    inotify only sees changes made through the local kernel. Directories on network
+    file systems, changed by other computers too, aren't watched at all, the catalog
+    keeps checking their modification time instead.
+    """
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    event_mask = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+
+    # statfs magic numbers of the file systems shared with other computers
+    remote_file_systems = {
+        0x517B,      # SMB
+        0xFF534D42,  # CIFS
+        0xFE534D42,  # SMB2
+        0x6969,      # NFS
+        0x65735546,  # FUSE (sshfs, rclone, ...)
+        0x5346414F,  # AFS
+        0x00C36400,  # Ceph
+        0x01021997,  # 9P
+        0x73757245,  # Coda
+    }
+
+    def __init__(self):
+        import ctypes
+
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self.libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.directories = {}
+        self.descriptors = {}
+        # Whether the file system of each device is local, by device number
+        self.local_devices = {}
+        # Set when the kernel dropped events, everything has to be listed again
+        self.overflowed = False
+
+    def is_local(self, directory):
+        """Whether directory is on a file system inotify sees every change of"""
+        import ctypes
+
+        try:
+            device = fs_stat(directory).st_dev
+        except OSError:
+            return False
+
+        local = self.local_devices.get(device)
+        if local is None:
+            # struct statfs starts with f_type, the buffer is larger than the whole struct
+            buffer = ctypes.create_string_buffer(256)
+            if self.libc.statfs(os.fsencode(directory), buffer) != 0:
+                local = False
+            else:
+                file_system = ctypes.c_ulong.from_buffer(buffer).value & 0xFFFFFFFF
+                local = file_system not in self.remote_file_systems
+            self.local_devices[device] = local
+
+        return local
+
+    def is_watching(self, directory):
+        return directory in self.descriptors
+
+    def watch(self, directory, entry):
+        if directory in self.descriptors or not self.is_local(directory):
+            return
+
+        descriptor = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), self.event_mask)
+        # Not watchable (too many watches, unsupported file system), the catalog keeps checking it
+        if descriptor >= 0:
+            self.directories[descriptor] = directory
+            self.descriptors[directory] = descriptor
+
+    def unwatch(self, directory):
+        descriptor = self.descriptors.pop(directory, None)
+        if descriptor is not None:
+            self.directories.pop(descriptor, None)
+            self.libc.inotify_rm_watch(self.fd, descriptor)
+
+    def poll(self):
+        changes = {}
+
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except (BlockingIOError, InterruptedError):
+                break
+
+            position = 0
+            while position + 16 <= len(data):
+                descriptor, mask, cookie, length = struct.unpack_from("iIII", data, position)
+                name = os.fsdecode(data[position + 16:position + 16 + length].rstrip(b"\0"))
+                position += 16 + length
+
+                if mask & self.IN_Q_OVERFLOW:
+                    self.overflowed = True
+                    continue
+
+                directory = self.directories.get(descriptor)
+                if directory is None:
+                    continue
+
+                # The watched directory itself is gone
+                if mask & (self.IN_IGNORED | self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+                    self.directories.pop(descriptor, None)
+                    self.descriptors.pop(directory, None)
+                    library_catalog.forget(directory)
+                    continue
+
+                change = changes.get(directory)
+                if change is None:
+                    change = changes[directory] = LibraryChange(directory)
+
+                if mask & self.IN_CLOSE_WRITE:
+                    change.written.add(name)
+                else:
+                    change.names.add(name)
+
+        return list(changes.values())
+
+    def close(self):
+        os.close(self.fd)
+        self.directories.clear()
+        self.descriptors.clear()
+
+# POLLING WATCHER
+class PollingWatcher:
+    """Follows library directories by comparing stats, where inotify isn't available.
+
+    Only the folders with loaded previews are polled, so a poll costs at most one
+    stat per pooled folder however large the library is, which is enough to see
+    files being added or removed. The other folders aren't watched, the catalog
+    checks them when they are shown. Files written in place don't change their
+    directory, so the images of the pooled folders are also compared, but only
+    every modified_interval seconds.
+    """
+
+    def __init__(self, modified_interval=10.0):
+        self.modified_interval = modified_interval
+        self.last_modified_check = time.monotonic()
+        # Directory modification times and names, by directory
+        self.directories = {}
+        # Image stats of the folders with loaded previews, by directory
+        self.image_stats = {}
+        self.overflowed = False
+
+    def is_watching(self, directory):
+        return directory in self.directories and directory in preview_pool.collections
+
+    def watch(self, directory, entry):
+        self.directories[directory] = (entry.mtime, set(entry.folders) | set(entry.images))
+
+    def unwatch(self, directory):
+        self.directories.pop(directory, None)
+        self.image_stats.pop(directory, None)
+
+    def poll(self):
+        changes = []
+
+        for directory in list(preview_pool.collections):
+            watched = self.directories.get(directory)
+            if watched is None:
+                continue
+
+            mtime, names = watched
+            try:
+                new_mtime = fs_stat(directory).st_mtime_ns
+            except OSError:
+                self.unwatch(directory)
+                library_catalog.forget(directory)
+                continue
+
+            if new_mtime == mtime:
+                continue
+
+            try:
+                with fs_scandir(directory) as dir_entries:
+                    new_names = {dir_entry.name for dir_entry in dir_entries}
+            except OSError:
+                continue
+
+            change = LibraryChange(directory)
+            change.names = names ^ new_names
+            self.directories[directory] = (new_mtime, new_names)
+            if change.names:
+                changes.append(change)
+
+        if time.monotonic() - self.last_modified_check > self.modified_interval:
+            self.last_modified_check = time.monotonic()
+            changes.extend(self.poll_modified())
+
+        return changes
+
+    def poll_modified(self):
+        changes = []
+
+        for directory in list(preview_pool.collections):
+            entry = library_catalog.entries.get(directory)
+            if entry is None:
+                continue
+
+            stats = {}
+            for name in entry.images:
+                try:
+                    stat = fs_stat(os.path.join(directory, name))
+                except OSError:
+                    continue
+                stats[name] = (stat.st_size, stat.st_mtime_ns)
+
+            previous = self.image_stats.get(directory)
+            self.image_stats[directory] = stats
+            if previous is None:
+                continue
+
+            change = LibraryChange(directory)
+            change.written = {name for name, stat in stats.items() if previous.get(name, stat) != stat}
+            if change.written:
+                changes.append(change)
+
+        # Stop comparing folders whose previews were removed
+        for directory in list(self.image_stats):
+            if directory not in preview_pool.collections:
+                del self.image_stats[directory]
+
+        return changes
+
+    def close(self):
+        self.directories.clear()
+        self.image_stats.clear()
+
+# NEW LIBRARY WATCHER FUNCTION
+def new_library_watcher():
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError):
+            pass
+
+    return PollingWatcher()
+
+# APPLY LIBRARY CHANGE FUNCTION
+def apply_library_change(change):
+    directory = change.directory
+    folders = set()
+    images = set()
+    removed = set()
+
+    # Only the changed names are looked at, the rest of the entry is kept as is
+    for name in change.names | change.written:
+        path = os.path.join(directory, name)
+
+        if fs_isdir(path):
+            folders.add(name)
+        elif not fs_exists(path):
+            removed.add(name)
+        elif name.lower().endswith(image_extensions):
+            images.add(name)
+
+    library_catalog.apply_changes(directory, folders, images, removed)
+
+    # The atlas no longer has the thumbnails of images written in place
+    atlas = thumbnail_atlases.atlases.get(directory)
+    if atlas is not None:
+        atlas.discard(change.written | change.names)
+
+    # Reload the previews of images written in place, the others are updated with the enum items
+    pcoll = preview_pool.collections.get(directory)
+    if pcoll is not None:
+        for name in (change.written | change.names) & images:
+            request = pcoll.my_requests.pop(name, None)
+            if request is not None:
+                request.cancelled = True
+            if name in pcoll:
+                del pcoll[name]
+
+# WATCH LIBRARY FUNCTION
+@profiled('TIMER')
+def watch_library():
+    preferences = bpy.context.preferences.addons[__name__].preferences
+
+    if not preferences.use_library_watcher:
+        stop_library_watcher()
+        return 2.0
+
+    # The roots are listed by the warm up first
+    if startup.warming:
+        return 1.0
+
+    watcher = library_catalog.watcher
+    if watcher is None:
+        watcher = library_catalog.watcher = new_library_watcher()
+        # Follow the directories listed before the watcher started, shared catalog folders are checked when shown
+        for directory, entry in list(library_catalog.entries.items()):
+            if entry.source is None:
+                watcher.watch(directory, entry)
+
+    # The configured roots are always followed
+    for path_folder in ('sculpting_texture_directory', 'vertex_paint_texture_directory', 'texture_paint_texture_directory'):
+        root = getattr(preferences, path_folder)
+        if root:
+            library_catalog.scan(root)
+
+    changes = watcher.poll()
+
+    # Too many events were dropped, list everything again
+    if watcher.overflowed:
+        watcher.overflowed = False
+        stop_library_watcher()
+        library_catalog.invalidate()
+        changes = []
+
+    for change in changes:
+        apply_library_change(change)
+
+    if changes or watcher is not library_catalog.watcher:
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type in {'PROPERTIES', 'VIEW_3D'}:
+                    area.tag_redraw()
+
+    return 1.0
+
+# STOP LIBRARY WATCHER FUNCTION
+def stop_library_watcher():
+    watcher = library_catalog.watcher
+    if watcher is not None:
+        library_catalog.watcher = None
+        watcher.close()
+
+#--------------------------------------------------------------------------------------
+# L I B R A R Y    S E A R C H
+#--------------------------------------------------------------------------------------
+
+# Splits labels and file names into searchable words
+search_word_pattern = re.compile(r"[^\W_]+")
+# Search results shown at most, the panel tells when there are more
+search_limit = 500
+
+# SEARCH INDEX
+class SearchIndex:
+    """File names and labels of a whole library, indexed for instant search.
+
+    Words of one or two letters are looked up by prefix in a sorted word list,
+    longer words through the images containing their rarest trigram, keeping
+    those that actually contain the word. Only the most selective query word
+    goes through the index, the others are checked on its matches.
+    """
+
+    def __init__(self, root, paths, revision):
+        self.root = root
+        # Catalog revision of the library the index was built at
+        self.revision = revision
+
+        # Sorted by label once, so matches only need sorting by position
+        labelled = sorted((format_label(os.path.basename(path)), path) for path in paths)
+        self.labels = [label for label, path in labelled]
+        self.paths = [path for label, path in labelled]
+        self.texts = []
+        self.text_words = []
+        words = []
+        self.trigrams = {}
+
+        for i, path in enumerate(self.paths):
+            text = (os.path.basename(path) + " " + self.labels[i]).lower()
+            text_words = tuple(set(search_word_pattern.findall(text)))
+            self.texts.append(text)
+            self.text_words.append(text_words)
+            words.extend((word, i) for word in text_words)
+
+            for trigram in {text[j:j + 3] for j in range(len(text) - 2)}:
+                images = self.trigrams.get(trigram)
+                if images is None:
+                    self.trigrams[trigram] = [i]
+                else:
+                    images.append(i)
+
+        words.sort()
+        self.words = words
+
+    def prefix_matches(self, prefix):
+        matches = set()
+        position = bisect_left(self.words, (prefix, -1))
+
+        while position < len(self.words) and self.words[position][0].startswith(prefix):
+            matches.add(self.words[position][1])
+            position += 1
+
+        return matches
+
+    def trigram_matches(self, word):
+        rarest = min((self.trigrams.get(word[j:j + 3], ()) for j in range(len(word) - 2)), key=len)
+
+        return {i for i in rarest if word in self.texts[i]}
+
+    def matches_word(self, i, word):
+        if len(word) < 3:
+            return any(text_word.startswith(word) for text_word in self.text_words[i])
+        return word in self.texts[i]
+
+    def search(self, query, limit=None):
+        """Return the indices of the images matching every word of query, sorted by label, at most limit of them"""
+        words = search_word_pattern.findall(query.lower())
+        if not words:
+            return []
+
+        # The longest word is usually the most selective one
+        words.sort(key=len, reverse=True)
+        first = words[0]
+        matches = self.prefix_matches(first) if len(first) < 3 else self.trigram_matches(first)
+
+        for word in words[1:]:
+            matches = [i for i in matches if self.matches_word(i, word)]
+
+        return sorted(matches)[:limit]
+
+# LIST LIBRARY FUNCTION
+@profiled('STAGE')
+def list_library(root, known, images):
+    """Paths of every image under root, relative to it. Safe in worker threads.
+
+    known and images hold the modification time, folders and images of the directories
+    in the catalog, those are taken as they are, only the folders never listed are read.
+    """
+    paths = []
+    prefix = os.path.join(root, "")
+
+    for directory, listing in walk_library(root, known, verify=False):
+        folder = "" if directory == root else directory[len(prefix):]
+        names = images.get(directory, ()) if listing is None else listing[2]
+        paths.extend(os.path.join(folder, name) for name in names)
+
+    return paths
+
+# LIBRARY SEARCH
+class LibrarySearch:
+    """Search indexes of the library roots, built in a background thread.
+
+    The images are taken from the catalog, so an index is built once the library
+    walker is done with its root, and rebuilt only when that library changed.
+    While an index is built, the previous one keeps answering queries.
+    """
+
+    def __init__(self):
+        self.indexes = {}
+        self.building = {}
+        self.executor = None
+
+    def get(self, root):
+        """Return the index of root, or None while it's built for the first time"""
+        index = self.indexes.get(root)
+        if root in self.building or os.path.normpath(root) in library_walker.walking:
+            return index
+
+        revision = library_catalog.root_revision(root)
+        if index is None or index.revision != revision:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="textures_manager_search")
+
+            # Entries are replaced, never changed, so the worker can read them as they are now
+            normalized = os.path.normpath(root)
+            prefix = os.path.join(normalized, "")
+            images = {directory: entry.images for directory, entry in library_catalog.entries.items()
+                if directory == normalized or directory.startswith(prefix)}
+            known = library_catalog.known_directories(normalized)
+            self.building[root] = self.executor.submit(lambda: SearchIndex(root, list_library(normalized, known, images), revision))
+
+            if not bpy.app.timers.is_registered(finish_search_indexes):
+                bpy.app.timers.register(finish_search_indexes, first_interval=0.1)
+
+        return index
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        self.building.clear()
+
+library_search = LibrarySearch()
+
+# FINISH SEARCH INDEXES FUNCTION
+@profiled('TIMER')
+def finish_search_indexes():
+    for root, future in list(library_search.building.items()):
+        if future.done():
+            del library_search.building[root]
+            try:
+                library_search.indexes[root] = future.result()
+            except Exception:
+                pass
+
+            for window in bpy.context.window_manager.windows:
+                for area in window.screen.areas:
+                    if area.type in {'PROPERTIES', 'VIEW_3D'}:
+                        area.tag_redraw()
+
+    if library_search.building:
+        return 0.1
+
+    return None
+
+#--------------------------------------------------------------------------------------
+# T H U M B N A I L    C A C H E
+#--------------------------------------------------------------------------------------
+
+# THUMBNAIL CACHE DIRECTORY FUNCTION
+def thumbnail_cache_directory():
+    # The user's cache directory of the platform
+    if sys.platform == "win32":
+        cache = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+    elif sys.platform == "darwin":
+        cache = os.path.join(os.path.expanduser("~"), "Library", "Caches")
+    else:
+        cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+
+    return os.path.join(cache, "blender_textures_manager", "thumbnails")
+
+# WRITE PNG FUNCTION
+def write_png(filepath, width, height, rgba):
+    """Write 8 bit RGBA pixels, stored bottom row first like Blender does, to a PNG file"""
+    stride = width * 4
+    # Every PNG row starts with its filter type, rows go from top to bottom
+    rows = b"".join(b"\x00" + rgba[y * stride:(y + 1) * stride] for y in reversed(range(height)))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+    png = (b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows, 6))
+        + chunk(b"IEND", b""))
+
+    # Write next to the final file first, so a thumbnail is never read half written
+    temp_path = filepath + ".tmp"
+    with fs_open(temp_path, "wb") as file:
+        file.write(png)
+    os.replace(temp_path, filepath)
+
+# THUMBNAIL CACHE
+class ThumbnailCache:
+    """Small copies of the library previews, kept on disk and reused across sessions.
+
+    A thumbnail is named after a hash of its source path followed by a hash of the
+    source size and modification time. A changed source never matches its old
+    thumbnail, and the old one is removed by the next prune, together with the
+    least recently used thumbnails once the cache is over its size budget.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.budget = 256 * 1024 * 1024
+        # Names of the thumbnail files, listed once on first use
+        self.files = None
+        # Thumbnails already marked as used in this session
+        self.touched = set()
+        # Previews waiting to be written to the cache
+        self.pending = deque()
+
+    def thumbnail_path(self, filepath, stat):
+        source = os.path.normcase(os.path.abspath(filepath))
+        path_hash = hashlib.sha1(source.encode("utf-8", "surrogateescape")).hexdigest()[:20]
+        stamp = "%d:%d" % (stat.st_size, stat.st_mtime_ns)
+        stamp_hash = hashlib.sha1(stamp.encode()).hexdigest()[:12]
+
+        return os.path.join(self.directory, path_hash + "_" + stamp_hash + ".png")
+
+    def list_files(self):
+        if self.files is None:
+            try:
+                self.files = {name for name in fs_listdir(self.directory) if name.endswith(".png")}
+            except OSError:
+                self.files = set()
+
+        return self.files
+
+    def lookup(self, filepath):
+        """Return the cached thumbnail of filepath (or None) and the stat of filepath"""
+        try:
+            stat = fs_stat(filepath)
+        except OSError:
+            return None, None
+
+        thumbnail = self.thumbnail_path(filepath, stat)
+        name = os.path.basename(thumbnail)
+
+        if name not in self.list_files():
+            return None, stat
+
+        # Used thumbnails are the last ones to be removed
+        if name not in self.touched:
+            self.touched.add(name)
+            try:
+                os.utime(thumbnail)
+            except OSError:
+                self.files.discard(name)
+                return None, stat
+
+        return thumbnail, stat
+
+    def store(self, preview, filepath, stat):
+        """Write the pixels of a loaded preview as the thumbnail of filepath"""
+        width, height = preview.image_size
+        if not width or not height:
+            return None
+
+        pixels = array('i', bytes(width * height * 4))
+        preview.image_pixels.foreach_get(pixels)
+
+        thumbnail = self.thumbnail_path(filepath, stat)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            write_png(thumbnail, width, height, pixels.tobytes())
+        except OSError:
+            return None
+
+        name = os.path.basename(thumbnail)
+        self.list_files().add(name)
+        self.touched.add(name)
+
+        return thumbnail
+
+    def queue(self, pcoll, name, filepath, stat):
+        self.pending.append((pcoll, name, filepath, stat))
+
+        # Previews can't be read back while the panel is drawn, write them a bit later
+        if not bpy.app.timers.is_registered(flush_thumbnail_cache):
+            bpy.app.timers.register(flush_thumbnail_cache, first_interval=0.5)
+
+    def remove(self, entry):
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+        if self.files is not None:
+            self.files.discard(entry.name)
+
+    def prune(self):
+        """Remove outdated thumbnails, then the least recently used ones while over budget"""
+        try:
+            with fs_scandir(self.directory) as dir_entries:
+                thumbnails = []
+                for entry in dir_entries:
+                    if entry.name.endswith(".png"):
+                        stat = entry.stat()
+                        thumbnails.append((stat.st_mtime, stat.st_size, entry))
+        except OSError:
+            return
+
+        # Most recently used first
+        thumbnails.sort(key=lambda thumbnail: thumbnail[0], reverse=True)
+
+        kept = []
+        sources = set()
+        for mtime, size, entry in thumbnails:
+            path_hash = entry.name.split("_")[0]
+            # An older thumbnail of a source that changed since
+            if path_hash in sources:
+                self.remove(entry)
+            else:
+                sources.add(path_hash)
+                kept.append((size, entry))
+
+        total_size = sum(size for size, entry in kept)
+        while kept and total_size > self.budget:
+            size, entry = kept.pop()
+            self.remove(entry)
+            total_size -= size
+
+    def clear(self):
+        self.pending.clear()
+        self.touched.clear()
+        try:
+            with fs_scandir(self.directory) as dir_entries:
+                for entry in dir_entries:
+                    if entry.name.endswith((".png", ".tmp")):
+                        self.remove(entry)
+        except OSError:
+            pass
+        self.files = set()
+
+thumbnail_cache = ThumbnailCache(thumbnail_cache_directory())
+
+# FLUSH THUMBNAIL CACHE FUNCTION
+@profiled('TIMER')
+def flush_thumbnail_cache():
+    pending = thumbnail_cache.pending
+    # Write for a few milliseconds at a time, to keep the interface responsive
+    deadline = time.monotonic() + 0.01
+
+    while pending and time.monotonic() < deadline:
+        pcoll, name, filepath, stat = pending.popleft()
+        preview = pcoll.get(name)
+        # The preview collection was removed meanwhile
+        if preview is not None:
+            thumbnail_cache.store(preview, filepath, stat)
+
+    if pending:
+        return 0.05
+
+    preferences = bpy.context.preferences.addons[__name__].preferences
+    thumbnail_cache.budget = preferences.thumbnail_cache_size * 1024 * 1024
+    thumbnail_cache.prune()
+
+    return None
+
+# READ PNG FUNCTION
+def read_png(filepath):
+    """Read a thumbnail written by write_png, returns (width, height, rgba) or None"""
+    with fs_open(filepath, "rb") as file:
+        data = file.read()
+
+    if data[:8] != b"\x89PNG\r\n\x1a\n":
+        return None
+
+    width = height = 0
+    compressed = []
+    position = 8
+    while position + 8 <= len(data):
+        length, tag = struct.unpack(">I4s", data[position:position + 8])
+        body = data[position + 8:position + 8 + length]
+        position += length + 12
+
+        if tag == b"IHDR":
+            width, height, bit_depth, color_type = struct.unpack(">IIBB", body[:10])
+            # Only the 8 bit RGBA files the cache writes itself
+            if bit_depth != 8 or color_type != 6:
+                return None
+        elif tag == b"IDAT":
+            compressed.append(body)
+        elif tag == b"IEND":
+            break
+
+    try:
+        raw = zlib.decompress(b"".join(compressed))
+    except zlib.error:
+        return None
+
+    stride = width * 4
+    if not width or len(raw) != (stride + 1) * height:
+        return None
+
+    rows = []
+    for y in range(height):
+        start = y * (stride + 1)
+        # Unfiltered rows only
+        if raw[start] != 0:
+            return None
+        rows.append(raw[start + 1:start + 1 + stride])
+
+    # Blender stores the bottom row first
+    rows.reverse()
+
+    return width, height, b"".join(rows)
+
+# SCALE PIXELS FUNCTION
+def scale_pixels(width, height, pixels, size):
+    """Nearest neighbour scale of packed RGBA pixels to fit in size x size"""
+    scale = size / max(width, height)
+    new_width = max(1, round(width * scale))
+    new_height = max(1, round(height * scale))
+
+    scaled = array('i', bytes(new_width * new_height * 4))
+    for y in range(new_height):
+        row = int(y / scale) * width
+        for x in range(new_width):
+            scaled[y * new_width + x] = pixels[row + int(x / scale)]
+
+    return new_width, new_height, scaled
+
+# THUMBNAIL REQUEST
+class ThumbnailRequest:
+    """One preview waiting for its thumbnail"""
+
+    __slots__ = ('pcoll', 'name', 'filepath', 'use_cache', 'expected', 'cancelled', 'stale', 'stat', 'image', 'icon', 'info')
+
+    def __init__(self, pcoll, name, filepath, use_cache, expected=None):
+        self.pcoll = pcoll
+        self.name = name
+        self.filepath = filepath
+        self.use_cache = use_cache
+        # Size and modification time of the source, if its preview was filled from an atlas
+        self.expected = expected
+        self.cancelled = False
+        # Filled by the worker
+        self.stale = False
+        self.stat = None
+        self.image = None
+        self.icon = None
+        self.info = None
+
+# THUMBNAIL LOADER
+class ThumbnailLoader:
+    """Prepares thumbnails in worker threads and fills the previews from a timer.
+
+    Workers do the slow part: the stat of the source (a network round trip on shared
+    libraries), the thumbnail cache lookup and the decoding of cached thumbnails.
+    The timer, on Blender's main thread, only copies the decoded pixels into the
+    preview, or loads the source with pcoll.load when it wasn't cached yet, and then
+    puts the real icon in place of the placeholder of the enum item.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self.executor = None
+        # Requests prepared by the workers, waiting for the timer
+        self.done = SimpleQueue()
+        self.outstanding = 0
+
+    def submit(self, function, *args):
+        """Run function in the workers"""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="textures_manager")
+
+        return self.executor.submit(function, *args)
+
+    def request(self, pcoll, name, filepath, use_cache, expected=None):
+        request = ThumbnailRequest(pcoll, name, filepath, use_cache, expected)
+        pcoll.my_requests[name] = request
+        self.outstanding += 1
+        # Prepared into the current queue, a shutdown meanwhile drops the result with it
+        self.submit(self.prepare, request, self.done)
+
+        if not bpy.app.timers.is_registered(drain_thumbnails):
+            bpy.app.timers.register(drain_thumbnails, first_interval=0.02)
+
+        return request
+
+    @profiled('STAGE')
+    def prepare(self, request, done):
+        try:
+            # Filled from an atlas, only check that the source didn't change since
+            if not request.cancelled and request.expected is not None:
+                try:
+                    stat = fs_stat(request.filepath)
+                except OSError:
+                    stat = None
+                if stat is not None and (stat.st_size, stat.st_mtime_ns) == request.expected:
+                    return
+                request.stale = True
+
+            if not request.cancelled and request.use_cache:
+                thumbnail, request.stat = thumbnail_cache.lookup(request.filepath)
+
+                if thumbnail is not None:
+                    image = read_png(thumbnail)
+                    if image is not None:
+                        width, height, rgba = image
+                        pixels = array('i')
+                        pixels.frombytes(rgba)
+                        request.image = (width, height, pixels)
+                        request.icon = scale_pixels(width, height, pixels, 32)
+
+            # Corrupt and oversized images are caught here, before Blender decodes them
+            if not request.cancelled:
+                request.info = probe_image(request.filepath)
+        except Exception:
+            # A missing or broken thumbnail, the timer falls back to the source
+            request.image = request.icon = None
+        finally:
+            done.put(request)
+
+    def cancel(self, pcoll):
+        """Drop the requests of a preview collection that is about to be removed"""
+        for request in pcoll.my_requests.values():
+            request.cancelled = True
+        pcoll.my_requests.clear()
+
+    def shutdown(self):
+        """Stop the workers and drop the requests still running.
+
+        Those put their result in the old queue, so outstanding only counts the requests made since.
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        self.done = SimpleQueue()
+        self.outstanding = 0
+
+thumbnail_loader = ThumbnailLoader()
+
+# Icon shown until the thumbnail is ready
+placeholder_icon = 'FILE_IMAGE'
+
+# FILL PREVIEW FUNCTION
+def fill_preview(request, max_size=0):
+    pcoll = request.pcoll
+    name = request.name
+    info = request.info
+
+    # Keep the header in the catalog, for sorting, filtering and the tooltip
+    folder, file_name = os.path.split(request.filepath)
+    entry = library_catalog.entries.get(folder)
+    if entry is not None and info is not None:
+        entry.info[file_name] = info
+    set_item_description(pcoll, name, image_tooltip(name, info))
+
+    if skipped_image(info, max_size):
+        # An empty preview, so it isn't requested again
+        pcoll.new(name)
+        set_item_icon(pcoll, name, 'ERROR')
+        return
+
+    if request.image is not None:
+        # Decoded by the worker, copy the pixels in a new preview
+        preview = pcoll.new(name)
+        width, height, pixels = request.image
+        preview.image_size = (width, height)
+        preview.image_pixels.foreach_set(pixels)
+        width, height, pixels = request.icon
+        preview.icon_size = (width, height)
+        preview.icon_pixels.foreach_set(pixels)
+    else:
+        preview = pcoll.load(name, request.filepath, 'IMAGE')
+        # Cache the preview once Blender made it
+        if request.use_cache and request.stat is not None:
+            thumbnail_cache.queue(pcoll, name, request.filepath, request.stat)
+
+    set_item_icon(pcoll, name, preview.icon_id)
+
+# SET ITEM ICON FUNCTION
+def set_item_icon(pcoll, name, icon_id):
+    # Replace the placeholder of the enum item, in the folder items and on the page shown
+    for items, items_index in ((pcoll.my_items, pcoll.my_items_index), (pcoll.my_previews, pcoll.my_previews_index)):
+        index = items_index.get(name)
+        if index is not None:
+            identifier, label, description, icon, number = items[index]
+            items[index] = (identifier, label, description, icon_id, number)
+
+# SET ITEM DESCRIPTION FUNCTION
+def set_item_description(pcoll, name, description):
+    for items, items_index in ((pcoll.my_items, pcoll.my_items_index), (pcoll.my_previews, pcoll.my_previews_index)):
+        index = items_index.get(name)
+        if index is not None:
+            identifier, label, old_description, icon, number = items[index]
+            items[index] = (identifier, label, description, icon, number)
+
+# DRAIN THUMBNAILS FUNCTION
+@profiled('TIMER')
+def drain_thumbnails():
+    done = thumbnail_loader.done
+    filled = False
+    addon = bpy.context.preferences.addons.get(__name__)
+    max_size = addon.preferences.max_image_size if addon is not None else 0
+    # Fill for a few milliseconds at a time, to keep the interface responsive
+    deadline = time.monotonic() + 0.008
+
+    while not done.empty() and time.monotonic() < deadline:
+        request = done.get()
+        thumbnail_loader.outstanding -= 1
+
+        if request.cancelled:
+            continue
+
+        pcoll = request.pcoll
+        if request.name in pcoll:
+            # Filled from an atlas and still up to date
+            if not request.stale:
+                pcoll.my_requests.pop(request.name, None)
+                continue
+            del pcoll[request.name]
+
+        fill_preview(request, max_size)
+        pcoll.my_requests.pop(request.name, None)
+        filled = True
+
+    if filled:
+        # Show the new thumbnails
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type in {'PROPERTIES', 'VIEW_3D'}:
+                    area.tag_redraw()
+
+    if thumbnail_loader.outstanding > 0:
+        return 0.02
+
+    return None
+
+#--------------------------------------------------------------------------------------
+# T H U M B N A I L    A T L A S
+#--------------------------------------------------------------------------------------
+
+# THUMBNAIL ATLAS
+class ThumbnailAtlas:
+    """The thumbnails of one folder, packed in a single file and mapped in memory.
+
+    The file starts with a header (magic, offset and length of the index), followed
+    by the raw pixels of every thumbnail and of its icon, as Blender's packed RGBA
+    integers, and ends with a JSON index. The index holds, by image name, the size
+    and modification time of the source, and the size and offset of both pixel
+    blocks. Previews are filled straight from the mapped file, one open for the
+    whole folder instead of one per thumbnail.
+    """
+
+    magic = b"TMATLAS1"
+    header = struct.Struct("<8sQQQ")
+
+    def __init__(self, file, buffer, entries):
+        self.file = file
+        self.buffer = buffer
+        self.entries = entries
+
+    @classmethod
+    def open(cls, filepath):
+        """The atlas at filepath, or None if there is none or it can't be read"""
+        try:
+            file = fs_open(filepath, "rb")
+        except OSError:
+            return None
+
+        try:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            file.close()
+            return None
+
+        try:
+            magic, index_offset, index_length, reserved = cls.header.unpack_from(buffer, 0)
+            if magic != cls.magic:
+                raise ValueError(filepath)
+            entries = json.loads(buffer[index_offset:index_offset + index_length].decode("utf-8"))["entries"]
+        except (struct.error, ValueError, KeyError, TypeError):
+            buffer.close()
+            file.close()
+            return None
+
+        return cls(file, buffer, entries)
+
+    def stamp(self, name):
+        """Size and modification time of the source of the thumbnail of name"""
+        entry = self.entries.get(name)
+        return (entry[0], entry[1]) if entry is not None else None
+
+    def fill(self, pcoll, key, name):
+        """Make the preview key of pcoll from the thumbnail of name, or return None if there's none"""
+        entry = self.entries.get(name)
+        if entry is None:
+            return None
+
+        size, mtime, width, height, offset, icon_width, icon_height, icon_offset = entry
+
+        preview = pcoll.new(key)
+        with memoryview(self.buffer) as buffer:
+            with buffer[offset:offset + width * height * 4].cast('i') as pixels:
+                preview.image_size = (width, height)
+                preview.image_pixels.foreach_set(pixels)
+            with buffer[icon_offset:icon_offset + icon_width * icon_height * 4].cast('i') as pixels:
+                preview.icon_size = (icon_width, icon_height)
+                preview.icon_pixels.foreach_set(pixels)
+
+        return preview
+
+    def discard(self, names):
+        for name in names:
+            self.entries.pop(name, None)
+
+    def close(self):
+        self.buffer.close()
+        self.file.close()
+
+# THUMBNAIL ATLASES
+class ThumbnailAtlases:
+    """The atlas of every folder, opened on first use and kept open"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        # Atlas of each folder, None for folders without one
+        self.atlases = {}
+
+    def atlas_path(self, folder):
+        source = os.path.normcase(os.path.abspath(folder))
+        return os.path.join(self.directory, hashlib.sha1(source.encode("utf-8", "surrogateescape")).hexdigest()[:20] + ".atlas")
+
+    def get(self, folder):
+        if folder not in self.atlases:
+            atlas = ThumbnailAtlas.open(self.atlas_path(folder))
+            # Then the one prebuilt next to the library, if any
+            if atlas is None:
+                library = shared_library_for(folder)
+                if library is not None:
+                    atlas = ThumbnailAtlas.open(library.atlas_path(folder))
+            self.atlases[folder] = atlas
+        return self.atlases[folder]
+
+    def forget(self, folder):
+        atlas = self.atlases.pop(folder, None)
+        if atlas is not None:
+            atlas.close()
+
+    def forget_library(self, library):
+        for folder in [folder for folder in self.atlases if library.contains(folder)]:
+            self.forget(folder)
+
+    def clear(self, remove_files=False):
+        for atlas in self.atlases.values():
+            if atlas is not None:
+                atlas.close()
+        self.atlases.clear()
+
+        if remove_files:
+            try:
+                with fs_scandir(self.directory) as dir_entries:
+                    for entry in dir_entries:
+                        if entry.name.endswith((".atlas", ".tmp")):
+                            os.remove(entry.path)
+            except OSError:
+                pass
+
+thumbnail_atlases = ThumbnailAtlases(os.path.join(os.path.dirname(thumbnail_cache.directory), "atlases"))
+
+# THUMBNAIL PIXELS FUNCTION
+def thumbnail_pixels(pcoll, name, filepath):
+    """Thumbnail and icon of the image at filepath, as (width, height, pixels) pairs, or None"""
+    # Thumbnails already in the cache aren't decoded from the source again
+    thumbnail, stat = thumbnail_cache.lookup(filepath)
+    image = read_png(thumbnail) if thumbnail is not None else None
+
+    if image is not None:
+        width, height, rgba = image
+        pixels = array('i')
+        pixels.frombytes(rgba)
+        return (width, height, pixels), scale_pixels(width, height, pixels, 32)
+
+    # Blender makes the preview when its size is asked for
+    preview = pcoll.load(name, filepath, 'IMAGE')
+    try:
+        width, height = preview.image_size
+        icon_width, icon_height = preview.icon_size
+        if not width or not height or not icon_width or not icon_height:
+            return None
+
+        pixels = array('i', bytes(width * height * 4))
+        preview.image_pixels.foreach_get(pixels)
+        icon = array('i', bytes(icon_width * icon_height * 4))
+        preview.icon_pixels.foreach_get(icon)
+    finally:
+        del pcoll[name]
+
+    return (width, height, pixels), (icon_width, icon_height, icon)
+
+# BUILD THUMBNAIL ATLAS FUNCTION
+@profiled('STAGE')
+def build_thumbnail_atlas(folder, names, filepath=None, read_pixels=thumbnail_pixels):
+    """Write the thumbnails of the images names of folder to the atlas of folder, returns how many were written"""
+    if filepath is None:
+        filepath = thumbnail_atlases.atlas_path(folder)
+    temp_path = filepath + ".tmp"
+    header = ThumbnailAtlas.header
+    pcoll = bpy.utils.previews.new()
+    entries = {}
+
+    try:
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+        with fs_open(temp_path, "wb") as file:
+            # The header is written last, once the index offset is known
+            file.write(bytes(header.size))
+            offset = header.size
+
+            for name in names:
+                source = os.path.join(folder, name)
+                try:
+                    stat = fs_stat(source)
+                    pixels = read_pixels(pcoll, name, source)
+                except (OSError, RuntimeError):
+                    continue
+                if pixels is None:
+                    continue
+
+                (width, height, image), (icon_width, icon_height, icon) = pixels
+                file.write(image.tobytes())
+                file.write(icon.tobytes())
+
+                icon_offset = offset + width * height * 4
+                entries[name] = [stat.st_size, stat.st_mtime_ns, width, height, offset, icon_width, icon_height, icon_offset]
+                offset = icon_offset + icon_width * icon_height * 4
+
+            index = json.dumps({"directory": folder, "entries": entries}).encode("utf-8")
+            file.write(index)
+            file.seek(0)
+            file.write(header.pack(ThumbnailAtlas.magic, offset, len(index), 0))
+
+        # A mapped file can't be replaced on Windows
+        thumbnail_atlases.forget(folder)
+        os.replace(temp_path, filepath)
+    except OSError:
+        return 0
+    finally:
+        bpy.utils.previews.remove(pcoll)
+
+    return len(entries)
+
+# LIBRARY FOLDERS FUNCTION
+def library_folders(root):
+    """Every folder of the library at root with its catalog entry, root first"""
+    return [(entry.directory, entry) for entry in library_catalog.walk(root)]
+
+#--------------------------------------------------------------------------------------
+# S H A R E D    L I B R A R Y    C A C H E
+#--------------------------------------------------------------------------------------
+
+# Folder of the prebuilt cache, at the root of the library
+shared_cache_folder = ".textures_manager"
+
+# SHARED LIBRARY
+class SharedLibrary:
+    """Catalog and thumbnail atlases prebuilt for a whole library, stored next to it.
+
+    Everything is keyed by paths relative to the library root, so the cache is valid
+    wherever the library is mounted. The catalog file holds a generation, raised by
+    every prebuild, a checksum of its folders and the modification time of each folder.
+    Clients check the catalog file and the library root every check_interval seconds,
+    and read the catalog again once its generation changed. A folder shown is checked
+    against its modification time at most every check_interval seconds too, and listed
+    again if it changed. Once the root changed since the prebuild, or the catalog is
+    missing or broken, the folders are checked and listed as usual. Thumbnails are
+    always checked by the size and time of their image.
+    """
+
+    version = 2
+    check_interval = 5.0
+
+    def __init__(self, root):
+        self.root = os.path.normpath(root)
+        self.directory = os.path.join(self.root, shared_cache_folder)
+        # Generation of the catalog read, and size and modification time of its file
+        self.generation = 0
+        self.stamp = None
+        # Modification time of the root folder at the prebuild
+        self.root_mtime = None
+        self.checked = 0.0
+        self.loaded = False
+        # Whether the folders of the catalog are only checked every check_interval seconds
+        self.trusted = False
+        # Folders found changed since the prebuild
+        self.stale_folders = set()
+
+    @property
+    def catalog_path(self):
+        return os.path.join(self.directory, "catalog.json")
+
+    def relative_path(self, folder):
+        path = os.path.relpath(folder, self.root)
+        return "" if path == os.curdir else path.replace(os.sep, "/")
+
+    def contains(self, folder):
+        folder = os.path.normcase(os.path.normpath(folder))
+        root = os.path.normcase(self.root)
+        return folder == root or folder.startswith(root.rstrip(os.sep) + os.sep)
+
+    def atlas_path(self, folder):
+        name = hashlib.sha1(self.relative_path(folder).encode("utf-8", "surrogateescape")).hexdigest()[:20]
+        return os.path.join(self.directory, "atlases", name + ".atlas")
+
+    @staticmethod
+    def checksum(folders):
+        return hashlib.sha1(json.dumps(folders, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+    def read_catalog(self):
+        """The catalog file, or None if it's missing, of another version or broken"""
+        try:
+            with fs_open(self.catalog_path, "r", encoding="utf-8") as file:
+                catalog = json.load(file)
+            if catalog.get("version") != self.version:
+                return None
+            # Written by a prebuild that didn't finish, or damaged on the way
+            if catalog["checksum"] != self.checksum(catalog["folders"]):
+                return None
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+        return catalog
+
+    def catalog_entries(self, catalog):
+        """Catalog entries of the folders of catalog, or None if they can't be read"""
+        try:
+            entries = []
+            for path, folder in catalog["folders"].items():
+                directory = os.path.normpath(os.path.join(self.root, *path.split("/")))
+                info = {name: ImageInfo(*values) for name, values in folder["info"].items() if values is not None}
+                entry = CatalogEntry(directory, folder["mtime"], folder["folders"], folder["images"], info, folder["labels"])
+                entry.source = self
+                entries.append(entry)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+        return entries
+
+    def catalog_stamp(self):
+        try:
+            stat = fs_stat(self.catalog_path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def update(self):
+        """Read the catalog again if its file changed, only one stat of it and one of the root otherwise"""
+        self.checked = time.monotonic()
+        stamp = self.catalog_stamp()
+
+        if stamp != self.stamp:
+            self.stamp = stamp
+            catalog = self.read_catalog() if stamp is not None else None
+            entries = self.catalog_entries(catalog) if catalog is not None else None
+
+            if entries is None:
+                # The folders are checked and listed as usual
+                self.loaded = self.trusted = False
+                return
+
+            # Rewritten with the same content, nothing to read again
+            if not self.loaded or catalog["generation"] != self.generation:
+                self.generation = catalog["generation"]
+                self.root_mtime = catalog["folders"].get("", {}).get("mtime")
+                library_catalog.replace_entries(self.root, entries)
+                thumbnail_atlases.forget_library(self)
+                self.stale_folders.clear()
+            self.loaded = True
+
+        if self.loaded:
+            # Categories added or removed since the prebuild, the catalog is stale
+            try:
+                self.trusted = fs_stat(self.root).st_mtime_ns == self.root_mtime
+            except OSError:
+                self.trusted = False
+
+    @property
+    def stale(self):
+        """Whether the library changed since the prebuild"""
+        return self.loaded and (not self.trusted or bool(self.stale_folders))
+
+    def write_catalog(self, entries):
+        previous = self.read_catalog()
+        generation = previous["generation"] + 1 if previous is not None else 1
+
+        catalog = {"version": self.version, "generation": generation, "created": time.time(), "folders": {}}
+        for entry in entries:
+            catalog["folders"][self.relative_path(entry.directory)] = {
+                "mtime": entry.mtime,
+                "folders": entry.folders,
+                "images": entry.images,
+                "labels": entry.labels,
+                "info": {name: [info.format, info.width, info.height, info.bit_depth, info.channels] if info is not None else None
+                    for name, info in entry.info.items()},
+            }
+
+        catalog["checksum"] = self.checksum(catalog["folders"])
+
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = self.catalog_path + ".tmp"
+        with fs_open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(catalog, file)
+        os.replace(temp_path, self.catalog_path)
+
+# Shared cache of every library root looked at, loaded or not
+shared_libraries = {}
+
+# SHARED LIBRARY FUNCTION
+@profiled('STAGE')
+def shared_library(root):
+    """The prebuilt cache of the library at root, its catalog in the library catalog, or None"""
+    root = os.path.normpath(root)
+    library = shared_libraries.get(root)
+
+    if library is None:
+        library = shared_libraries[root] = SharedLibrary(root)
+        library.update()
+    elif time.monotonic() - library.checked >= library.check_interval:
+        library.update()
+
+    return library if library.loaded else None
+
+# SHARED LIBRARY FOR FUNCTION
+def shared_library_for(folder):
+    for library in shared_libraries.values():
+        if library.loaded and library.contains(folder):
+            return library
+    return None
+
+# LOAD LIBRARY FUNCTION
+def load_library(root):
+    """List the library at root the first time it's shown, from its shared catalog if it has one.
+
+    Otherwise only the root is listed here, the rest of the library in the background.
+    """
+    if shared_library(root) is None and os.path.normpath(root) not in library_catalog.entries:
+        library_catalog.scan(root)
+        library_walker.request(root)
+
+# DECODE THUMBNAIL PIXELS FUNCTION
+def decode_thumbnail_pixels(pcoll, name, filepath, size=128):
+    """Thumbnail and icon of the image at filepath, decoded by Blender without the interface"""
+    import numpy
+
+    image = bpy.data.images.load(filepath, check_existing=False)
+    try:
+        width, height = image.size
+        if not width or not height:
+            return None
+
+        if max(width, height) > size:
+            scale = size / max(width, height)
+            image.scale(max(1, round(width * scale)), max(1, round(height * scale)))
+            width, height = image.size
+
+        values = numpy.empty(width * height * 4, dtype=numpy.float32)
+        image.pixels.foreach_get(values)
+        pixels = array('i')
+        pixels.frombytes((numpy.clip(values, 0.0, 1.0) * 255.0 + 0.5).astype(numpy.uint8).tobytes())
+    finally:
+        bpy.data.images.remove(image)
+
+    return (width, height, pixels), scale_pixels(width, height, pixels, 32)
+
+# PREBUILD FOLDERS FUNCTION
+def prebuild_folders(library, entries):
+    """Probe the images and build the atlas of every folder of entries, returns how many thumbnails were written"""
+    written = 0
+    for entry in entries:
+        probe_folder(entry)
+        written += build_thumbnail_atlas(entry.directory, entry.images, library.atlas_path(entry.directory), decode_thumbnail_pixels)
+    return written
+
+# PREBUILD LIBRARY FUNCTION
+def prebuild_library(root, jobs=1, shard=None):
+    """Write the catalog and thumbnail atlases of the library at root next to it.
+
+    With more than one job, the folders are shared between as many background
+    Blender processes, each one building its part (shard) of the atlases and
+    headers, then the catalog is written once all of them are done. Only this
+    process walks the library, the shards read their folders from a manifest.
+    """
+    start = time.perf_counter()
+    library = SharedLibrary(os.path.abspath(root))
+    shards_directory = os.path.join(library.directory, "shards")
+    manifest_path = os.path.join(shards_directory, "manifest.json")
+
+    if shard is not None:
+        index, count = shard
+        try:
+            with fs_open(manifest_path, "r", encoding="utf-8") as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            print("Shard %d/%d: no folder manifest" % (index + 1, count))
+            sys.exit(1)
+
+        part = [CatalogEntry(os.path.normpath(os.path.join(library.root, *relative.split("/"))) if relative else library.root, mtime, [], images)
+            for relative, mtime, images in manifest[index]]
+        written = prebuild_folders(library, part)
+
+        # Headers go back to the main process through a file
+        os.makedirs(shards_directory, exist_ok=True)
+        with fs_open(os.path.join(shards_directory, "%d.json" % index), "w", encoding="utf-8") as file:
+            json.dump({"written": written, "info": {library.relative_path(entry.directory):
+                {name: [info.format, info.width, info.height, info.bit_depth, info.channels] for name, info in entry.info.items() if info is not None}
+                for entry in part}}, file)
+
+        print("Shard %d/%d: %d thumbnails in %d folders, %.1f s" % (index + 1, count, written, len(part), time.perf_counter() - start))
+        return
+
+    # Made before the walk, so the root modification time in the catalog stays valid
+    os.makedirs(library.directory, exist_ok=True)
+    entries = library_catalog.walk(library.root)
+
+    if jobs > 1 and bpy.app.binary_path:
+        # Largest folders first, dealt round robin
+        ordered = sorted(entries, key=lambda entry: (-len(entry.images), entry.directory))
+        os.makedirs(shards_directory, exist_ok=True)
+        with fs_open(manifest_path, "w", encoding="utf-8") as file:
+            json.dump([[[library.relative_path(entry.directory), entry.mtime, entry.images] for entry in ordered[index::jobs]]
+                for index in range(jobs)], file)
+
+        processes = [subprocess.Popen([bpy.app.binary_path, "--background", "--factory-startup", "--python", os.path.abspath(__file__),
+            "--", "--prebuild", library.root, "--shard", "%d/%d" % (index, jobs)]) for index in range(jobs)]
+        failed = sum(1 for process in processes if process.wait() != 0)
+
+        written = 0
+        for index in range(jobs):
+            path = os.path.join(shards_directory, "%d.json" % index)
+            try:
+                with fs_open(path, "r", encoding="utf-8") as file:
+                    shard_result = json.load(file)
+                os.remove(path)
+            except (OSError, ValueError):
+                continue
+
+            written += shard_result["written"]
+            for entry in entries:
+                folder_info = shard_result["info"].get(library.relative_path(entry.directory))
+                if folder_info is not None:
+                    entry.info.update((name, ImageInfo(*values)) for name, values in folder_info.items())
+
+        try:
+            os.remove(manifest_path)
+        except OSError:
+            pass
+
+        if failed:
+            print("%d of %d processes failed" % (failed, jobs))
+    else:
+        written = prebuild_folders(library, entries)
+
+    library.write_catalog(entries)
+
+    print("Library %s prebuilt: %d folders, %d images, %d thumbnails, %.1f s" % (library.root, len(entries),
+        sum(len(entry.images) for entry in entries), written, time.perf_counter() - start))
+
+# PREBUILD MAIN FUNCTION
+def prebuild_main(arguments):
+    parser = argparse.ArgumentParser(prog="blender --background --python textures_manager.py --",
+        description="Prebuild the catalog and thumbnails of a texture library, stored next to it")
+    parser.add_argument("--prebuild", metavar="ROOT", required=True, help="root folder of the library")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="background Blender processes")
+    parser.add_argument("--shard", help=argparse.SUPPRESS)
+    args = parser.parse_args(arguments)
+
+    shard = tuple(int(value) for value in args.shard.split("/")) if args.shard else None
+    prebuild_library(args.prebuild, max(1, args.jobs), shard)
+
+#--------------------------------------------------------------------------------------
+# F O L D E R    F U N C T I O N A L I T I E S
+#--------------------------------------------------------------------------------------
+
+# FOUND SUB CATEGORIES FUNCTION
+def found_sub_categories(self, context):
+    state = texture_state(self, context)
+
+    if 'found_sub_categories' not in state.memo:
+        # Check for folders in selected category
+        state.memo['found_sub_categories'] = len(library_catalog.folders(state.category_directory)) != 0
+
+    return state.memo['found_sub_categories']
+             
+# TEXTURE CATEGORIES FOLDER ITEMS FUNCTION
+@profiled('ITEMS')
+def preview_folders_textures(self, context):
+    state = texture_state(self, context)
+
+    if 'folders' in state.memo:
+        return state.memo['folders']
+                
+    categories = []       
+    no_items_in_folder = [(no_folder, 'None', 'None')]    
+                    
+    path = state.lib_path
+
+    if not path:
+        return no_items_in_folder
+
+    else:
+        # The whole library is listed at once the first time, its folders are then known at any depth
+        load_library(path)
+        entry = library_catalog.scan(path)
+
+        # Append the categories and their labels, named as their folders so they can be joined to paths
+        if entry is not None:
+            if 'folders' not in entry.items:
+                entry.items['folders'] = [(name, entry.labels[name], "") for name in entry.folders]
+            categories = entry.items['folders']
+                                             
+    state.memo['folders'] = categories
+    return categories
+
+
+# TEXTURE CATEGORIES SUB FOLDER ITEMS FUNCTION
+@profiled('ITEMS')
+def preview_sub_folders_textures(self, context):
+    state = texture_state(self, context)
+
+    if 'sub_folders' in state.memo:
+        return state.memo['sub_folders']
+
+    sub_categories = []          
+    no_items_in_folder = [(no_folder, 'None', 'None')]    
+                    
+    if not state.lib_path:
+        return no_items_in_folder
+                  
+    else:
+        # The selected category path                                
+        entry = library_catalog.scan(state.category_directory)
+
+        # If selected category path is empty, return None 
+        if entry is None or (not entry.folders and not entry.images):
+            sub_categories = no_items_in_folder
+        elif 'sub_folders' in entry.items:
+            sub_categories = entry.items['sub_folders']
+        else:
+            # The selected category itself is always the default sub category
+            sub_categories.append((no_folder, format_label('None'), ""))
+
+            # Append the folders in the selected category and their labels
+            for name in entry.folders:
+                sub_categories.append((name, entry.labels[name], ""))
+
+            entry.items['sub_folders'] = sub_categories
+            
+    state.memo['sub_folders'] = sub_categories
+    return sub_categories
+
+# TEXTURE FOLDERS BELOW THE SUB CATEGORY ITEMS FUNCTION
+@profiled('ITEMS')
+def preview_child_folders(self, context):
+    state = texture_state(self, context)
+
+    if 'child_folders' in state.memo:
+        return state.memo['child_folders']
+
+    child_folders = [(no_folder, 'None', 'None')]
+
+    # Only below a sub category, the category folders are the sub categories
+    if state.lib_path and state.sub_category not in (no_folder, state.category):
+        entry = library_catalog.scan(state.directory)
+
+        if entry is not None and entry.folders:
+            if 'child_folders' not in entry.items:
+                entry.items['child_folders'] = child_folders + [(name, entry.labels[name], "") for name in entry.folders]
+            child_folders = entry.items['child_folders']
+
+    state.memo['child_folders'] = child_folders
+    return child_folders
+                        
+#--------------------------------------------------------------------------------------
+# P R E V I E W    F U N C T I O N A L I T I E S
+#--------------------------------------------------------------------------------------
+            
+# PREVIEW POOL
+class PreviewPool:
+    """Preview collections of the recently shown folders, one per folder.
+
+    Going back to a folder reuses its previews instead of loading them again. When
+    the pool holds too many collections or previews, the least recently shown
+    collections are removed, never the one currently shown.
+    """
+
+    def __init__(self):
+        self.collections = OrderedDict()
+        # Collection of the folder currently shown in the panel
+        self.current = None
+
+    def get(self, directory):
+        pcoll = self.collections.get(directory)
+        if pcoll is not None:
+            self.collections.move_to_end(directory)
+            self.current = pcoll
+
+        return pcoll
+
+    def add(self, directory, pcoll):
+        self.collections[directory] = pcoll
+        self.collections.move_to_end(directory)
+        self.current = pcoll
+
+    def item_count(self):
+        # Loaded previews only, images of pages never shown cost nothing
+        return sum(len(pcoll) for pcoll in self.collections.values())
+
+    def trim(self, max_collections, max_items):
+        """Remove least recently used collections until the pool is within budget"""
+        while len(self.collections) > 1:
+            if len(self.collections) <= max_collections and self.item_count() <= max_items:
+                break
+
+            directory, pcoll = next(iter(self.collections.items()))
+            self.remove(directory)
+
+    def remove(self, directory):
+        pcoll = self.collections.pop(directory, None)
+        if pcoll is not None:
+            thumbnail_loader.cancel(pcoll)
+            bpy.utils.previews.remove(pcoll)
+            if pcoll is self.current:
+                self.current = None
+
+    def clear(self):
+        for directory in list(self.collections):
+            self.remove(directory)
+
+preview_pool = PreviewPool()
+
+# NEW TEXTURE PREVIEWS FUNCTION
+def new_texture_previews():
+    pcoll = bpy.utils.previews.new()
+    pcoll.my_previews_dir = ""
+    # Catalog entry the enum items were built from
+    pcoll.my_previews_entry = None
+    # Enum items of every image in the folder, and the position of each image
+    pcoll.my_items = []
+    pcoll.my_items_index = {}
+    # Enum items shown (all items, or only the current page), and the position of each image
+    pcoll.my_previews = ()
+    pcoll.my_previews_index = {}
+    # Sort and filter the items were built with
+    pcoll.my_view = None
+    # Page shown, as (page, page size), and the number of pages
+    pcoll.my_page = None
+    pcoll.my_page_count = 1
+    # Thumbnails still being loaded, by image name
+    pcoll.my_requests = {}
+    # Matches of the search shown, for search results only
+    pcoll.my_search_total = 0
+
+    return pcoll
+
+# BUILD CATEGORY ITEMS FUNCTION
+@profiled('STAGE')
+def build_category_items(pcoll, entry, view=None):
+    # Adds a NONE item
+    enum_items = [('NONE', 'None', 'None', 'TEXTURE', 0)]
+    items_index = {}
+
+    image_paths = entry.images if entry is not None else []
+    images = sorted_images(entry, view) if entry is not None else []
+    positions = {name: i for i, name in enumerate(image_paths)}
+    max_size = view.max_size if view is not None else 0
+
+    for name in images:
+        info = entry.info.get(name)
+        # Corrupt and oversized images aren't shown at all
+        if skipped_image(info, max_size):
+            continue
+
+        thumb = pcoll.get(name)
+        # Show a placeholder, until the thumbnail is loaded in the background
+        icon = thumb.icon_id if thumb is not None else placeholder_icon
+
+        # Since we added a NONE item, we have to add 1 to the identifier,
+        # the position in the folder keeps it the same whatever the sort and filter
+        identifier = positions[name] + 1
+        items_index[name] = len(enum_items)
+        enum_items.append((name, entry.labels[name], image_tooltip(name, info), icon, identifier))
+
+    # Forget the previews of images removed from the folder
+    for name in list(pcoll.keys()):
+        if name not in items_index:
+            del pcoll[name]
+
+    pcoll.my_items = enum_items
+    pcoll.my_items_index = items_index
+    pcoll.my_previews_entry = entry
+    pcoll.my_view = view
+
+# IMAGE VIEW
+class ImageView:
+    """How the images of a folder are sorted and filtered"""
+
+    __slots__ = ('sort_by', 'channels', 'min_resolution', 'max_size')
+
+    def __init__(self, sort_by='NAME', channels='ALL', min_resolution=0, max_size=0):
+        self.sort_by = sort_by
+        self.channels = channels
+        self.min_resolution = min_resolution
+        self.max_size = max_size
+
+    @property
+    def needs_headers(self):
+        return self.sort_by != 'NAME' or self.channels != 'ALL' or self.min_resolution > 0
+
+    def __eq__(self, other):
+        return isinstance(other, ImageView) and all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __ne__(self, other):
+        return not self == other
+
+# Channel counts of the channel filters
+channel_filters = {'GRAYSCALE': (1, 2), 'RGB': (3,), 'RGBA': (4,)}
+
+# Sort keys of the sort options, images without a header come last
+image_sort_keys = {
+    'RESOLUTION': lambda info: (info.width * info.height, info.resolution),
+    'BIT_DEPTH': lambda info: (info.bit_depth, info.channels),
+    'CHANNELS': lambda info: (info.channels, info.bit_depth),
+    'FORMAT': lambda info: (info.format,),
+}
+
+# SORTED IMAGES FUNCTION
+def sorted_images(entry, view):
+    """Names of the images of entry, filtered and sorted as the view asks"""
+    if view is None or not view.needs_headers:
+        return entry.images
+
+    # Probed in the background once per image, the headers are kept in the catalog
+    header_prober.request(entry)
+    info = entry.info
+
+    # Images not probed yet stay until their header tells, unreadable ones are left out
+    names = entry.images
+    channels = channel_filters.get(view.channels)
+    if channels is not None:
+        names = [name for name in names if name not in info or (info[name] is not None and info[name].channels in channels)]
+    if view.min_resolution:
+        names = [name for name in names if name not in info or (info[name] is not None and info[name].resolution >= view.min_resolution)]
+
+    sort_key = image_sort_keys.get(view.sort_by)
+    if sort_key is not None:
+        # Stable sort, images alike stay sorted by name, images without a header go last
+        names = sorted(names, key=lambda name: (info.get(name) is None, sort_key(info[name]) if info.get(name) is not None else ()))
+
+    return names
+
+# REQUEST THUMBNAILS FUNCTION
+def request_thumbnails(pcoll, items, use_cache):
+    for item in items:
+        name = item[0]
+        if name not in pcoll and name not in pcoll.my_requests:
+            filepath = os.path.join(pcoll.my_previews_dir, name)
+            folder, file_name = os.path.split(filepath)
+            atlas = thumbnail_atlases.get(folder) if use_cache else None
+            preview = atlas.fill(pcoll, name, file_name) if atlas is not None else None
+
+            if preview is None:
+                thumbnail_loader.request(pcoll, name, filepath, use_cache)
+            else:
+                # Shown right away, the source is checked for changes in the background
+                set_item_icon(pcoll, name, preview.icon_id)
+                thumbnail_loader.request(pcoll, name, filepath, use_cache, atlas.stamp(file_name))
+
+# SHOW CATEGORY PAGE FUNCTION
+def show_category_page(pcoll, page, page_size, use_cache):
+    enum_items = pcoll.my_items
+    images = enum_items[1:]
+
+    # Without paging, every image is shown
+    if not page_size:
+        pcoll.my_page_count = 1
+        pcoll.my_previews = enum_items
+        pcoll.my_previews_index = pcoll.my_items_index
+        request_thumbnails(pcoll, images, use_cache)
+    else:
+        page_count = max(1, (len(images) + page_size - 1) // page_size)
+        page = min(max(page, 0), page_count - 1)
+        start = page * page_size
+
+        # The NONE item stays on every page
+        shown = images[start:start + page_size]
+        pcoll.my_page_count = page_count
+        pcoll.my_previews = [enum_items[0]] + shown
+        pcoll.my_previews_index = {item[0]: i + 1 for i, item in enumerate(shown)}
+
+        # Thumbnails of the shown page first, then of its neighbours
+        request_thumbnails(pcoll, shown, use_cache)
+        request_thumbnails(pcoll, images[start + page_size:start + 2 * page_size], use_cache)
+        request_thumbnails(pcoll, images[max(0, start - page_size):start], use_cache)
+
+# BUILD SEARCH ITEMS FUNCTION
+@profiled('STAGE')
+def build_search_items(pcoll, index, query):
+    # Adds a NONE item
+    enum_items = [('NONE', 'None', 'None', 'TEXTURE', 0)]
+    items_index = {}
+
+    hits = index.search(query) if index is not None else []
+
+    for i in hits[:search_limit]:
+        path = index.paths[i]
+        thumb = pcoll.get(path)
+        icon = thumb.icon_id if thumb is not None else placeholder_icon
+
+        # Identifiers are the paths in the library, numbers their position in the index
+        items_index[path] = len(enum_items)
+        enum_items.append((path, index.labels[i], path, icon, i + 1))
+
+    # Previews of older searches are kept while within the budget
+    if len(pcoll) > len(items_index) + 1000:
+        for path in list(pcoll.keys()):
+            if path not in items_index:
+                del pcoll[path]
+
+    pcoll.my_items = enum_items
+    pcoll.my_items_index = items_index
+    pcoll.my_previews_entry = (index, query)
+    # Matches found, more than the items when there are more than search_limit
+    pcoll.my_search_total = len(hits)
+
+# SEARCH ITEMS PREVIEW FUNCTION
+def search_category_items(self, context, state, page, page_size):
+    preferences = context.preferences.addons[__name__].preferences
+    index = library_search.get(state.lib_path)
+
+    # One virtual category for the search results of each library
+    key = ('SEARCH', state.lib_path)
+    pcoll = preview_pool.get(key)
+
+    if pcoll is None:
+        pcoll = new_texture_previews()
+        pcoll.my_previews_dir = state.lib_path
+        preview_pool.add(key, pcoll)
+        preview_pool.trim(preferences.preview_pool_size, preferences.preview_pool_items)
+    # If nothing is changed, show current results
+    elif pcoll.my_previews_entry == (index, state.search) and pcoll.my_page == (page, page_size):
+        return pcoll.my_previews
+
+    if pcoll.my_previews_entry != (index, state.search):
+        build_search_items(pcoll, index, state.search)
+
+    show_category_page(pcoll, page, page_size, preferences.use_thumbnail_cache)
+    pcoll.my_page = (page, page_size)
+
+    return pcoll.my_previews
+
+# TEXTURE ITEMS PREVIEW FUNCTION
+@profiled('ITEMS')
+def preview_category_items(self, context):
+    enum_items = []
+    
+    if context is None:        
+        return enum_items
+
+    state = texture_state(self, context)
+
+    if 'category_items' in state.memo:
+        return state.memo['category_items']
+
+    preferences = context.preferences.addons[__name__].preferences
+
+    # Path of the selected sub category, or of the category if no other sub category is selected
+    directory = state.directory
+    entry = library_catalog.scan(directory)
+
+    page_size = preferences.page_size if preferences.use_paging else 0
+    page = state.brush.brush_texture.page if page_size else 0
+    brush_texture = state.brush.brush_texture
+    view = ImageView(brush_texture.sort_by, brush_texture.channels, brush_texture.min_resolution, preferences.max_image_size)
+
+    # Search results, instead of the selected folder
+    if state.search and state.lib_path:
+        state.memo['category_items'] = search_category_items(self, context, state, page, page_size)
+        return state.memo['category_items']
+
+    # Previews of this folder, if it was shown recently
+    pcoll = preview_pool.get(directory)
+
+    if pcoll is None:
+        pcoll = new_texture_previews()
+        pcoll.my_previews_dir = directory
+        preview_pool.add(directory, pcoll)
+        preview_pool.trim(preferences.preview_pool_size, preferences.preview_pool_items)
+    # If nothing is changed, show current previews                
+    elif pcoll.my_previews_entry is entry and pcoll.my_view == view and pcoll.my_page == (page, page_size):
+        state.memo['category_items'] = pcoll.my_previews
+        return pcoll.my_previews
+
+    # Items of the whole folder, only rebuilt if the folder, the sort or the filter changed
+    if pcoll.my_previews_entry is not entry or pcoll.my_view != view or not pcoll.my_items:
+        build_category_items(pcoll, entry, view)
+
+    show_category_page(pcoll, page, page_size, preferences.use_thumbnail_cache)
+    pcoll.my_page = (page, page_size)
+
+    state.memo['category_items'] = pcoll.my_previews
+    return pcoll.my_previews
+    
+# PROCEDURAL TEXTURES
+class ProceduralTextures:
+    """Tracks the procedural textures of the blend file for the procedural enum items.
+
+    The items are only rebuilt once textures were added, removed, renamed or changed
+    type: depsgraph updates of textures, message bus notifications of texture names
+    and types and loading another file mark them as stale. The texture count is
+    compared on every call too, removing a texture doesn't always reach the depsgraph.
+    """
+
+    def __init__(self):
+        self.stale = True
+        self.count = -1
+
+    def invalidate(self, *args):
+        self.stale = True
+
+    def changed(self):
+        count = len(bpy.data.textures)
+        if self.stale or count != self.count:
+            self.stale = False
+            self.count = count
+            return True
+        return False
+
+    def subscribe(self):
+        # Subscriptions are dropped when another file is loaded
+        bpy.msgbus.clear_by_owner(self)
+        for key in ((bpy.types.Texture, "name"), (bpy.types.Texture, "type")):
+            bpy.msgbus.subscribe_rna(key=key, owner=self, args=(), notify=self.invalidate)
+
+procedural_textures = ProceduralTextures()
+
+# PROCEDURAL TEXTURES DEPSGRAPH HANDLER
+@bpy.app.handlers.persistent
+def procedural_textures_depsgraph(scene, depsgraph=None):
+    # Before 2.81 handlers don't get the depsgraph, any update may have changed textures
+    if depsgraph is None or depsgraph.id_type_updated('TEXTURE'):
+        procedural_textures.invalidate()
+
+# PROCEDURAL TEXTURES LOAD HANDLER
+@bpy.app.handlers.persistent
+def procedural_textures_load(*args):
+    procedural_textures.invalidate()
+    procedural_textures.subscribe()
+
+# PREVIEW PROCEDURAL TEXTURE ITEMS FUNCTION
+@profiled('ITEMS')
+def preview_procedural_items(self, context):
+    
+    enum_items = []   
+
+    if context is None:
+        return enum_items
+    
+    if "procedural" not in preview_collections_textures:
+        ptcoll = bpy.utils.previews.new()        
+        ptcoll.my_previews = ()
+        preview_collections_textures["procedural"] = ptcoll
+        procedural_textures.invalidate()
+    else:    
+        ptcoll = preview_collections_textures["procedural"]
+
+    # Same textures as last time
+    if not procedural_textures.changed():
+        return ptcoll.my_previews
+
+    # Adds a NONE item
+    enum_items.append(('NONE', 'None', 'None', 'TEXTURE', 0))
+
+    # Gets all textures that the type is not image
+    tex_type = [t for t in bpy.data.textures if t.type != 'IMAGE' and t.type != 'NONE']
+                                      
+    for i, tex in enumerate(tex_type):
+        
+        # Since we added a NONE item, we have to add 1 to the identifier
+        identifier = i + 1                                       
+        enum_items.append((tex.name, tex.name, tex.name, tex.preview.icon_id, identifier))
+                              
+    ptcoll.my_previews = enum_items                     
+    return ptcoll.my_previews
+
+#--------------------------------------------------------------------------------------
+# I M A G E    P O O L
+#--------------------------------------------------------------------------------------
+
+# IMAGE POOL
+class ImagePool:
+    """Library images loaded by the add-on, least recently picked first.
+
+    Picking a pooled image again only rebinds the brush texture to it, nothing is
+    loaded or freed. Once the pool holds more images than its size, the least
+    recently picked ones that nothing uses anymore are removed from the blend data.
+    Past the memory budget, the least recently picked images no brush uses are
+    freed too: removed if nothing uses them, or else only their pixels, which
+    Blender loads again when they are needed. Images are kept by name and checked
+    before use, so an image removed or replaced since (by a file load for
+    instance) is never touched.
+    """
+
+    def __init__(self):
+        # Image name, by image file path
+        self.images = OrderedDict()
+
+    def lookup(self, filepath):
+        name = self.images.get(filepath)
+        if name is None:
+            return None
+
+        image = bpy.data.images.get(name)
+        if image is None or os.path.normpath(bpy.path.abspath(image.filepath)) != filepath:
+            del self.images[filepath]
+            return None
+
+        return image
+
+    def get(self, filepath):
+        filepath = os.path.normpath(filepath)
+        image = self.lookup(filepath)
+
+        if image is None:
+            image = bpy.data.images.load(filepath, check_existing=True)
+            self.images[filepath] = image.name
+
+        self.images.move_to_end(filepath)
+
+        return image
+
+    def trim(self, size):
+        for filepath in list(self.images):
+            if len(self.images) <= size:
+                break
+
+            image = self.lookup(filepath)
+            # Images still used by a texture stay loaded
+            if image is not None and image.users == 0:
+                bpy.data.images.remove(image)
+                del self.images[filepath]
+
+    def footprint(self):
+        """Count and memory of the loaded images, by folder"""
+        folders = {}
+        for filepath in list(self.images):
+            image = self.lookup(filepath)
+            # Images whose pixels aren't loaded use next to no memory
+            if image is not None and image.has_data:
+                count, size = folders.get(os.path.dirname(filepath), (0, 0))
+                folders[os.path.dirname(filepath)] = (count + 1, size + image_bytes(image))
+        return folders
+
+    def free(self, budget):
+        """Free the least recently picked images no brush uses, until the loaded ones fit in budget bytes"""
+        total = sum(size for count, size in self.footprint().values())
+        if total <= budget:
+            return 0
+
+        used = brush_image_names()
+        freed = 0
+
+        for filepath in list(self.images):
+            if total <= budget:
+                break
+
+            image = self.lookup(filepath)
+            if image is None or not image.has_data or image.name in used:
+                continue
+
+            size = image_bytes(image)
+            # Still used by a texture (with a fake user, of another brush mode, ...), keep the datablock
+            if image.users > 0:
+                image.buffers_free()
+            else:
+                bpy.data.images.remove(image)
+                del self.images[filepath]
+
+            total -= size
+            freed += size
+
+        return freed
+
+    def clear(self):
+        self.images.clear()
+
+image_pool = ImagePool()
+
+# BRUSH IMAGE NAMES FUNCTION
+def brush_image_names():
+    """Names of the images on the textures of any brush"""
+    names = set()
+    for brush in bpy.data.brushes:
+        for texture in (brush.texture, brush.mask_texture):
+            if texture is not None and texture.type == 'IMAGE' and texture.image is not None:
+                names.add(texture.image.name)
+    return names
+
+# FREE IMAGE MEMORY FUNCTION
+def free_image_memory(context):
+    preferences = context.preferences.addons[__name__].preferences
+    return image_pool.free(preferences.image_memory_budget * 1024 * 1024)
+
+# DRAW IMAGE MEMORY FUNCTION
+def draw_image_memory(layout, context, budget):
+    folders = sorted(image_pool.footprint().items(), key=lambda folder: folder[1][1], reverse=True)
+    total = sum(size for count, size in dict(folders).values())
+
+    box = layout.box()
+    col = box.column(align=True)
+    col.label(text="%.1f MB of %d MB used by %d images" % (total / 1048576.0, budget, sum(count for count, size in dict(folders).values())))
+
+    # Folders shown relative to their library
+    preferences = context.preferences.addons[__name__].preferences
+    roots = [os.path.normpath(getattr(preferences, path_folder)) for path_folder in
+        ('sculpting_texture_directory', 'vertex_paint_texture_directory', 'texture_paint_texture_directory')
+        if getattr(preferences, path_folder)]
+
+    for directory, (count, size) in folders:
+        name = directory
+        for root in roots:
+            if os.path.normcase(directory).startswith(os.path.normcase(root) + os.sep):
+                name = os.path.relpath(directory, root)
+                break
+
+        row = col.row()
+        row.label(text=name, icon='FILE_FOLDER')
+        row.label(text="%d images" % count)
+        row.label(text="%.1f MB" % (size / 1048576.0))
+
+# IMAGE BYTES FUNCTION
+def image_bytes(image):
+    """Memory used by the pixels of a loaded image"""
+    width, height = image.size
+    return width * height * image.channels * (4 if image.is_float else 1)
+
+# IMAGE PREFETCHER
+class ImagePrefetcher:
+    """Loads the images around the picked one ahead of time, nearest first.
+
+    A worker thread reads each file once, so it comes from the system's file cache
+    afterwards, and its header for the memory it will take, then a timer loads it
+    into the image pool on Blender's main thread, one image per call. Prefetching stops once the images loaded ahead and not
+    picked yet would use more than the memory budget.
+    """
+
+    def __init__(self):
+        self.executor = None
+        # File path and read future of the images to load, nearest first
+        self.queue = deque()
+        # Images loaded ahead and not picked yet, by file path
+        self.prefetched = {}
+
+    def schedule(self, filepaths):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="textures_manager_prefetch")
+
+        self.cancel()
+
+        for filepath in filepaths:
+            filepath = os.path.normpath(filepath)
+            if image_pool.lookup(filepath) is None:
+                self.queue.append((filepath, self.executor.submit(self.read, filepath)))
+
+        if self.queue and not bpy.app.timers.is_registered(prefetch_images):
+            bpy.app.timers.register(prefetch_images, first_interval=0.05)
+
+    @staticmethod
+    def read(filepath):
+        """Read the file through, returns the bytes its pixels will take once decoded"""
+        size = 0
+        try:
+            with fs_open(filepath, "rb") as file:
+                while True:
+                    data = file.read(1 << 20)
+                    if not data:
+                        break
+                    size += len(data)
+        except OSError:
+            pass
+
+        # Without a readable header, the file size is the nearest guess
+        info = probe_image(filepath)
+        return info.memory if info is not None and not info.corrupt else size
+
+    def picked(self, filepath):
+        self.prefetched.pop(os.path.normpath(filepath), None)
+
+    def prefetched_bytes(self):
+        size = 0
+        for filepath in list(self.prefetched):
+            image = image_pool.lookup(filepath)
+            if image is None:
+                del self.prefetched[filepath]
             else:
-                thumb = pcoll[name]                
-                                                                        
-            cap_name = fix_labels(self, context, current_labels=name)
-            
-            # Since we added a NONE item, we have to add 1 to the identifier
-            identifier = i + 1               
-            enum_items.append((name, cap_name, name, thumb.icon_id, identifier))
+                size += self.prefetched[filepath]
+        return size
 
-                                                        
-    pcoll.my_previews = enum_items
-    pcoll.my_previews_dir = directory
-    return pcoll.my_previews
-    
-# PREVIEW PROCEDURAL TEXTURE ITEMS FUNCTION
-def preview_procedural_items(self, context):
-    
-    enum_items = []   
+    def cancel(self):
+        for filepath, future in self.queue:
+            future.cancel()
+        self.queue.clear()
 
-    if context is None:
-        return enum_items
+    def shutdown(self):
+        self.cancel()
+        self.prefetched.clear()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
 
-    # Adds a NONE item
-    enum_items.append(('NONE', 'None', 'None', 'TEXTURE', 0))
-    
-    if "procedural" not in preview_collections_textures:
-        ptcoll = bpy.utils.previews.new()        
-        ptcoll.my_previews = ()
-        preview_collections_textures["procedural"] = ptcoll
-    else:    
-        ptcoll = preview_collections_textures["procedural"]
+image_prefetcher = ImagePrefetcher()
 
-    # Gets all textures that the type is not image
-    tex_type = [t for t in bpy.data.textures if t.type != 'IMAGE' and t.type != 'NONE']
-                                      
-    for i, tex in enumerate(tex_type):
-        
-        # Since we added a NONE item, we have to add 1 to the identifier
-        identifier = i + 1                                       
-        enum_items.append((tex.name, tex.name, tex.name, tex.preview.icon_id, identifier))
-                              
-    ptcoll.my_previews = enum_items                     
-    return ptcoll.my_previews
+# PREFETCH IMAGES FUNCTION
+@profiled('TIMER')
+def prefetch_images():
+    queue = image_prefetcher.queue
+
+    if not queue:
+        return None
+
+    filepath, future = queue[0]
+    # Still read by the worker
+    if not future.done():
+        return 0.02
+
+    queue.popleft()
+    preferences = bpy.context.preferences.addons[__name__].preferences
+
+    if image_pool.lookup(filepath) is None:
+        if image_prefetcher.prefetched_bytes() >= preferences.prefetch_budget * 1024 * 1024:
+            image_prefetcher.cancel()
+            return None
+
+        try:
+            image_pool.get(filepath)
+        except RuntimeError:
+            # Not readable as an image
+            return 0.0 if queue else None
+
+        # From the header, image.size would decode the pixels right here
+        image_prefetcher.prefetched[filepath] = future.result()
+        free_image_memory(bpy.context)
+
+    return 0.0 if queue else None
+
+# NEIGHBOUR IMAGES FUNCTION
+def neighbour_images(directory, selected_item, count):
+    """File paths of the count images before and after selected_item in the folder shown, nearest first"""
+    pcoll = preview_pool.current
+    if pcoll is None or count <= 0:
+        return []
+
+    index = pcoll.my_items_index.get(selected_item)
+    if index is None:
+        return []
+
+    items = pcoll.my_items
+    filepaths = []
+    for distance in range(1, count + 1):
+        for neighbour in (index + distance, index - distance):
+            # The first item is NONE
+            if 1 <= neighbour < len(items):
+                filepaths.append(os.path.join(directory, items[neighbour][0]))
+
+    return filepaths
+
+# Labels of the paint modes, in the names of the brush textures
+mode_labels = {'SCULPT': "Sculpt", 'VERTEX_PAINT': "Vertex Paint", 'TEXTURE_PAINT': "Texture Paint"}
+
+# Names of the brush textures, by brush name and paint mode
+brush_texture_names = {}
+
+# PERSISTENT BRUSH TEXTURE FUNCTION
+def persistent_brush_texture(brush, mode):
+    """The image texture of brush in mode, made on first use and reused from then on"""
+    key = (brush.name, mode)
+
+    def is_brush_texture(texture):
+        return (texture is not None and texture.type == 'IMAGE'
+            and texture.get("textures_manager_brush") == brush.name and texture.get("textures_manager_mode") == mode)
+
+    texture = bpy.data.textures.get(brush_texture_names.get(key, ""))
+
+    if not is_brush_texture(texture):
+        # Made in an earlier session, or renamed since
+        texture = next((texture for texture in bpy.data.textures if is_brush_texture(texture)), None)
+
+        if texture is None:
+            texture = bpy.data.textures.new("%s %s Texture" % (brush.name, mode_labels.get(mode, mode.title())), 'IMAGE')
+            texture["textures_manager_brush"] = brush.name
+            texture["textures_manager_mode"] = mode
+
+        brush_texture_names[key] = texture.name
+
+    return texture
+
+# TEXTURE IMAGE NAME FUNCTION
+def texture_image_name(texture):
+    """Name of the image of texture, or of the image a proxy stands in for"""
+    image = texture.image
+    if image is None:
+        return ""
+
+    source = image.get("textures_manager_proxy")
+    return os.path.basename(source) if source else image.name
+
+# TEXTURE LABEL FUNCTION
+def texture_label(texture):
+    # Brush textures are reused for every image, so show the image instead
+    if texture.type == 'IMAGE' and texture.image is not None:
+        return format_label(texture_image_name(texture))
+    return texture.name
+
+#--------------------------------------------------------------------------------------
+# P R O X Y    T E X T U R E S
+#--------------------------------------------------------------------------------------
+
+# Proxy caches, by proxy size
+proxy_caches = {}
+# Images with more pixels get no proxy, copying them would stall Blender, their thumbnail stands in
+proxy_max_pixels = 4096 * 4096
+# Seconds without picks before the proxies of the swapped images are saved
+proxy_save_delay = 1.0
+
+# PROXY CACHE FUNCTION
+def proxy_cache(size):
+    cache = proxy_caches.get(size)
+    if cache is None:
+        # Next to the thumbnails, one folder per proxy size
+        directory = os.path.join(os.path.dirname(thumbnail_cache.directory), "proxies", str(size))
+        cache = proxy_caches[size] = ThumbnailCache(directory)
+    return cache
+
+# LOAD PROXY IMAGE FUNCTION
+def load_proxy_image(filepath, size):
+    """A small copy of the image at filepath, or None if there is none on disk yet"""
+    proxy, stat = proxy_cache(size).lookup(filepath)
+
+    # Until a proxy is made, the cached thumbnail of the panel stands in
+    if proxy is None and stat is not None:
+        proxy, stat = thumbnail_cache.lookup(filepath)
+
+    if proxy is None:
+        return None
+
+    try:
+        image = bpy.data.images.load(proxy)
+    except RuntimeError:
+        return None
+
+    image.name = os.path.basename(filepath) + " Proxy"
+    image["textures_manager_proxy"] = filepath
+
+    return image
+
+# SAVE PROXY IMAGE FUNCTION
+def save_proxy_image(image, filepath, size):
+    """Save a copy of image scaled down to size as the proxy of filepath, if there is none yet"""
+    cache = proxy_cache(size)
+    proxy, stat = cache.lookup(filepath)
+
+    if proxy is not None or stat is None:
+        return
+
+    width, height = image.size
+    scale = size / max(width, height, 1)
+    # Images that small are loaded quickly enough
+    if scale >= 1.0 or width * height > proxy_max_pixels:
+        return
+
+    proxy = cache.thumbnail_path(filepath, stat)
+    copy = image.copy()
+    try:
+        copy.scale(max(1, round(width * scale)), max(1, round(height * scale)))
+        os.makedirs(cache.directory, exist_ok=True)
+        copy.filepath_raw = proxy
+        copy.file_format = 'PNG'
+        copy.save()
+    except (RuntimeError, OSError):
+        return
+    finally:
+        bpy.data.images.remove(copy)
+
+    cache.list_files().add(os.path.basename(proxy))
+
+    preferences = bpy.context.preferences.addons[__name__].preferences
+    cache.budget = preferences.thumbnail_cache_size * 1024 * 1024
+    cache.prune()
+
+# REMOVE PROXY IMAGE FUNCTION
+def remove_proxy_image(proxy):
+    if proxy is not None and proxy.users == 0 and "textures_manager_proxy" in proxy:
+        bpy.data.images.remove(proxy)
+
+# PROXY LOADER
+class ProxyLoader:
+    """Swaps the proxies put on the brush textures for their full resolution images.
+
+    A worker thread reads the full file once, so it comes from the system's file
+    cache afterwards, then a timer loads it into the image pool on Blender's main
+    thread, puts it in place of the proxy and removes the proxy. Proxies replaced
+    by another pick meanwhile are removed without loading their image.
+
+    The proxies of the swapped images are saved later, one per timer call, once
+    no pick happened for proxy_save_delay seconds.
+    """
+
+    def __init__(self):
+        self.executor = None
+        # Texture name, proxy name, file path and read future of every proxy in use
+        self.pending = deque()
+        # Image name, file path and proxy size of every proxy still to save
+        self.unsaved = deque()
+        # perf_counter of the last swap
+        self.swapped = 0.0
+
+    def request(self, texture, proxy, filepath):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="textures_manager_proxy")
+
+        future = self.executor.submit(ImagePrefetcher.read, filepath)
+        self.pending.append((texture.name, proxy.name, filepath, future))
+
+        if not bpy.app.timers.is_registered(swap_proxy_images):
+            # Let the panel show the proxy first
+            bpy.app.timers.register(swap_proxy_images, first_interval=0.1)
+
+    def save_later(self, image, filepath, size):
+        self.unsaved.append((image.name, filepath, size))
+        self.swapped = time.perf_counter()
+
+        if not bpy.app.timers.is_registered(save_proxy_images):
+            bpy.app.timers.register(save_proxy_images, first_interval=proxy_save_delay)
+
+    def shutdown(self):
+        for texture_name, proxy_name, filepath, future in self.pending:
+            future.cancel()
+        self.pending.clear()
+        self.unsaved.clear()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+proxy_loader = ProxyLoader()
+
+# SWAP PROXY IMAGES FUNCTION
+@profiled('TIMER')
+def swap_proxy_images():
+    pending = proxy_loader.pending
+
+    if not pending:
+        return None
+
+    texture_name, proxy_name, filepath, future = pending[0]
+    # Still read by the worker
+    if not future.done():
+        return 0.02
+
+    pending.popleft()
+    texture = bpy.data.textures.get(texture_name)
+    proxy = bpy.data.images.get(proxy_name)
+
+    # Still on the brush texture, swap in the full image
+    if texture is not None and proxy is not None and texture.image == proxy:
+        preferences = bpy.context.preferences.addons[__name__].preferences
+
+        try:
+            image = image_pool.get(filepath)
+        except RuntimeError:
+            # Not readable as an image, keep the proxy
+            return 0.0 if pending else None
+
+        texture.image = image
+        proxy_loader.save_later(image, filepath, preferences.proxy_size)
+        free_image_memory(bpy.context)
+
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type in {'PROPERTIES', 'VIEW_3D'}:
+                    area.tag_redraw()
+
+    remove_proxy_image(proxy)
+
+    return 0.0 if pending else None
+
+# SAVE PROXY IMAGES FUNCTION
+@profiled('TIMER')
+def save_proxy_images():
+    unsaved = proxy_loader.unsaved
+
+    if not unsaved:
+        return None
+
+    # Not while textures are being picked
+    idle = time.perf_counter() - proxy_loader.swapped
+    if proxy_loader.pending or idle < proxy_save_delay:
+        return max(proxy_save_delay - idle, 0.1)
+
+    image_name, filepath, size = unsaved.popleft()
+    image = bpy.data.images.get(image_name)
+
+    # Removed since, or replaced by another file of the same name
+    if image is not None and os.path.normpath(bpy.path.abspath(image.filepath)) == os.path.normpath(filepath):
+        save_proxy_image(image, filepath, size)
+
+    return 0.1 if unsaved else None
+
+#--------------------------------------------------------------------------------------
+# B U L K    I M P O R T
+#--------------------------------------------------------------------------------------
+
+# PROBE IMAGE FILE FUNCTION
+def probe_image_file(filepath):
+    """Header and file size of the image at filepath, returns (info, size)"""
+    info = probe_image(filepath)
+    try:
+        size = fs_stat(filepath).st_size
+    except OSError:
+        size = 0
+
+    return info, size
+
+# IMPORT IMAGES FUNCTION
+@profiled('STAGE')
+def import_images(filepaths, max_size=0, use_fake_user=True):
+    """Create the image and texture datablocks of every file of filepaths in one pass.
+
+    Worker threads probe the headers of all the files at once, so only images that are
+    readable and within the size limit are added. Adding an image decodes nothing,
+    Blender decodes it once, when it's first shown or used.
+
+    Textures are named by texture_name, like the ones assign_texture makes without Reuse
+    Brush Texture, so picking an imported image then reuses its texture. With Reuse
+    Brush Texture, picking puts the imported image on the brush texture instead, and
+    the imported textures are only kept for use elsewhere. Returns the totals and
+    timings of both stages.
+    """
+    report = {'images': 0, 'reused': 0, 'textures': 0, 'skipped': 0, 'conflicts': 0, 'bytes': 0}
+    start = time.perf_counter()
+
+    workers = min(8, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="textures_manager_import") as executor:
+        headers = list(executor.map(probe_image_file, filepaths))
+
+    report['probe_time'] = time.perf_counter() - start
+    start = time.perf_counter()
+
+    for filepath, (info, size) in zip(filepaths, headers):
+        if skipped_image(info, max_size):
+            report['skipped'] += 1
+            continue
+
+        name = texture_name(filepath)
+        texture = bpy.data.textures.get(name)
+
+        # Already imported, or picked before
+        if texture is not None and texture.type == 'IMAGE' and texture.image is not None:
+            report['reused'] += 1
+            continue
+
+        # The name is taken by a procedural texture, which can't hold an image
+        if texture is not None and texture.type != 'IMAGE':
+            report['conflicts'] += 1
+            continue
+
+        report['bytes'] += size
+
+        images_count = len(bpy.data.images)
+        image = bpy.data.images.load(filepath, check_existing=True)
+        if len(bpy.data.images) > images_count:
+            report['images'] += 1
+
+        if texture is None:
+            texture = bpy.data.textures.new(name, 'IMAGE')
+            report['textures'] += 1
+        texture.image = image
+        texture.use_fake_user = use_fake_user
+
+    report['add_time'] = time.perf_counter() - start
+
+    return report
+
+#--------------------------------------------------------------------------------------
+# D U P L I C A T E S
+#--------------------------------------------------------------------------------------
+
+# Side of the grayscale image a perceptual hash is made from
+hash_image_size = 32
+# Thumbnails hashed in one batch
+hash_batch_size = 1024
+# Groups shown in the preferences, the others are only counted
+max_shown_duplicate_groups = 25
+
+# IMAGE HASHES
+class ImageHashes:
+    """Perceptual hash of every analysed image, kept on disk so only new or changed images are hashed again.
+
+    A hash is stored with the size and modification time of its source, and only
+    used while both still match.
+    """
+
+    version = 1
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        # [size, mtime, hash] by image path, read on first use
+        self.hashes = None
+        self.changed = False
+
+    def load(self):
+        if self.hashes is None:
+            try:
+                with fs_open(self.filepath, "r", encoding="utf-8") as file:
+                    data = json.load(file)
+                self.hashes = data["hashes"] if data.get("version") == self.version else {}
+            except (OSError, ValueError, KeyError, TypeError, AttributeError):
+                self.hashes = {}
+        return self.hashes
+
+    def get(self, filepath, stamp):
+        entry = self.load().get(filepath)
+        if entry is not None and (entry[0], entry[1]) == stamp:
+            return int(entry[2], 16)
+        return None
+
+    def put(self, filepath, stamp, value):
+        self.load()[filepath] = [stamp[0], stamp[1], "%016x" % value]
+        self.changed = True
+
+    def keep(self, roots, filepaths):
+        """Forget the hashes of the images below roots that aren't in filepaths anymore"""
+        prefixes = tuple(os.path.join(root, "") for root in roots)
+        hashes = self.load()
+        for filepath in [filepath for filepath in hashes if filepath.startswith(prefixes) and filepath not in filepaths]:
+            del hashes[filepath]
+            self.changed = True
+
+    def save(self):
+        if not self.changed:
+            return
+
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        # Write next to the final file first, so the hashes are never read half written
+        temp_path = self.filepath + ".tmp"
+        with fs_open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": self.version, "hashes": self.hashes}, file)
+        os.replace(temp_path, self.filepath)
+        self.changed = False
+
+image_hashes = ImageHashes(os.path.join(os.path.dirname(thumbnail_cache.directory), "hashes.json"))
+
+# LIBRARY DUPLICATES
+class LibraryDuplicates:
+    """Result of the last library analysis, shown in the preferences for review"""
+
+    def __init__(self):
+        self.analysed = False
+        # Groups of near duplicates, each a list of (filepath, file size, ImageInfo or None), largest first
+        self.groups = []
+        self.images = 0
+        self.hashed = 0
+        self.missing = 0
+        self.elapsed = 0.0
+        # Analysis running in the workers, if any
+        self.analysis = None
+
+    def reclaimable(self):
+        """Bytes used by every image of a group but its largest one"""
+        return sum(size for group in self.groups for filepath, size, info in group[1:])
+
+library_duplicates = LibraryDuplicates()
+
+# CACHED THUMBNAIL FUNCTION
+def cached_thumbnail(filepath, stat, atlas):
+    """Pixels of the cached thumbnail of filepath, from its atlas or the thumbnail cache, or None if it has none"""
+    import numpy
+
+    name = os.path.basename(filepath)
+    if atlas is not None and atlas.stamp(name) == (stat.st_size, stat.st_mtime_ns):
+        size, mtime, width, height, offset = atlas.entries[name][:5]
+        # Copied, the atlas can't be closed while its buffer is in use
+        return numpy.frombuffer(atlas.buffer, numpy.uint8, width * height * 4, offset).reshape(height, width, 4).copy()
+
+    thumbnail = thumbnail_cache.thumbnail_path(filepath, stat)
+    if os.path.basename(thumbnail) not in thumbnail_cache.list_files():
+        return None
+
+    try:
+        image = read_png(thumbnail)
+    except OSError:
+        return None
+    if image is None:
+        return None
+
+    width, height, rgba = image
+    return numpy.frombuffer(rgba, numpy.uint8).reshape(height, width, 4)
+
+# SHRINK AXIS FUNCTION
+def shrink_axis(pixels, size, axis):
+    """Average pixels down to size along axis, or repeat them up to size if there are fewer"""
+    import numpy
+
+    length = pixels.shape[axis]
+    starts = numpy.arange(size) * length // size
+
+    if length < size:
+        return numpy.take(pixels, starts, axis=axis)
+
+    counts = numpy.diff(numpy.append(starts, length)).astype(numpy.float32)
+    sums = numpy.add.reduceat(pixels, starts, axis=axis)
+    return sums / (counts[:, None] if axis == 0 else counts[None, :])
+
+# PERCEPTUAL HASHES FUNCTION
+def perceptual_hashes(thumbnails):
+    """64 bit DCT hash of every thumbnail, as an array of unsigned integers.
+
+    Every thumbnail is shrunk to a small grayscale image, whose lowest frequencies
+    are compared to their median. Renamed, converted or resized copies of an image
+    get the same hash, or one only a few bits apart.
+    """
+    import numpy
+
+    size = hash_image_size
+    grays = numpy.empty((len(thumbnails), size, size), numpy.float32)
+    luminance = numpy.array((0.2126, 0.7152, 0.0722), numpy.float32)
+
+    for i, rgba in enumerate(thumbnails):
+        pixels = rgba.astype(numpy.float32)
+        # Transparent areas count as black, like they do in a brush alpha
+        gray = (pixels[..., :3] @ luminance) * (pixels[..., 3] / 255.0)
+        grays[i] = shrink_axis(shrink_axis(gray, size, 0), size, 1)
+
+    # Orthonormal DCT of all the images at once
+    n = numpy.arange(size)
+    dct = numpy.cos(numpy.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size)) * numpy.sqrt(2.0 / size)
+    dct[0] /= numpy.sqrt(2.0)
+    coefficients = (dct.astype(numpy.float32) @ grays @ dct.T.astype(numpy.float32))[:, :8, :8].reshape(len(thumbnails), 64)
+
+    # The average brightness doesn't count in the median
+    medians = numpy.median(coefficients[:, 1:], axis=1)
+    bits = coefficients > medians[:, None]
+
+    return numpy.packbits(bits, axis=1).view(">u8").ravel().astype(numpy.uint64)
+
+# NEAR DUPLICATE GROUPS FUNCTION
+def near_duplicate_groups(hashes, threshold):
+    """Groups of the positions in hashes at most threshold bits apart, from hash to hash.
+
+    Identical hashes are merged first. The others are split in threshold + 1 bands of
+    bits: two hashes at most threshold bits apart have at least one band in common,
+    so only the hashes sharing a band value are compared, never every pair.
+    """
+    import numpy
+
+    count = len(hashes)
+    parents = list(range(count))
+
+    def find(i):
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    def union(i, j):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parents[root_j] = root_i
+
+    # Identical hashes are grouped at once, and compared once
+    unique, first_positions, inverse = numpy.unique(hashes, return_index=True, return_inverse=True)
+    for i, value in enumerate(inverse.tolist()):
+        union(int(first_positions[value]), i)
+
+    popcount = numpy.array([bin(i).count("1") for i in range(256)], numpy.uint8)
+    bands = min(threshold + 1, 64)
+    bounds = [64 * band // bands for band in range(bands + 1)]
+
+    for band in range(bands):
+        low, high = bounds[band], bounds[band + 1]
+        keys = (unique >> numpy.uint64(64 - high)) & numpy.uint64((1 << (high - low)) - 1)
+        order = numpy.argsort(keys, kind='stable')
+        # Runs of hashes with the same value in this band
+        for members in numpy.split(order, numpy.flatnonzero(numpy.diff(keys[order])) + 1):
+            if len(members) < 2:
+                continue
+
+            bucket = unique[members]
+            # Rows compared at once, so the distances fit in a few megabytes
+            chunk = max(1, (1 << 20) // len(bucket))
+            for start in range(0, len(bucket), chunk):
+                block = bucket[start:start + chunk]
+                others = bucket[start:]
+                distances = popcount[(block[:, None] ^ others[None, :]).view(numpy.uint8)].reshape(len(block), len(others), 8).sum(axis=2)
+                first, second = numpy.nonzero(distances <= threshold)
+                for i, j in zip((first + start).tolist(), (second + start).tolist()):
+                    if i < j:
+                        union(int(first_positions[members[i]]), int(first_positions[members[j]]))
+
+    groups = {}
+    for i in range(count):
+        groups.setdefault(find(i), []).append(i)
+
+    return [group for group in groups.values() if len(group) > 1]
+
+# DUPLICATE ANALYSIS
+class DuplicateAnalysis:
+    """An analysis of the libraries at roots for near duplicate images, run in a worker thread.
+
+    The folders in the catalog are taken as they are when the analysis is made, only
+    those never listed are read. Only images with a cached thumbnail (in an atlas or
+    the thumbnail cache) are analysed, the others are counted as missing. Hashes of
+    unchanged images are read back from image_hashes.
+    """
+
+    def __init__(self, roots, threshold, use_atlases=True):
+        self.roots = roots
+        self.threshold = threshold
+        self.use_atlases = use_atlases
+        # Entries are replaced, never changed, so the worker can read them as they are now
+        self.entries = dict(library_catalog.entries)
+        self.known = {root: library_catalog.known_directories(root) for root in roots}
+        self.libraries = [library for library in shared_libraries.values() if library.loaded]
+        self.cancelled = False
+        # (groups, images, hashed, missing, elapsed) once done
+        self.result = None
+
+    def open_atlas(self, folder):
+        """The atlas of folder, opened for the worker alone"""
+        if not self.use_atlases:
+            return None
+
+        atlas = ThumbnailAtlas.open(thumbnail_atlases.atlas_path(folder))
+        if atlas is None:
+            for library in self.libraries:
+                if library.contains(folder):
+                    return ThumbnailAtlas.open(library.atlas_path(folder))
+        return atlas
+
+    def folders(self):
+        """Every folder of the libraries with its images and their known headers"""
+        seen = set()
+        for root in self.roots:
+            for folder, listing in walk_library(root, self.known[root], verify=False):
+                if folder in seen:
+                    continue
+                seen.add(folder)
+
+                if listing is not None:
+                    yield folder, listing[2], {}
+                else:
+                    entry = self.entries.get(folder)
+                    if entry is not None:
+                        yield folder, entry.images, entry.info
+
+    @profiled('STAGE')
+    def run(self):
+        import numpy
+
+        start = time.perf_counter()
+        filepaths = []
+        values = []
+        pending = []
+        missing = 0
+        hashed = 0
+        sizes = {}
+        infos = {}
+
+        for folder, images, info in self.folders():
+            if self.cancelled:
+                return
+
+            atlas = self.open_atlas(folder)
+            try:
+                for name in images:
+                    filepath = os.path.join(folder, name)
+                    try:
+                        stat = fs_stat(filepath)
+                    except OSError:
+                        continue
+                    stamp = (stat.st_size, stat.st_mtime_ns)
+
+                    value = image_hashes.get(filepath, stamp)
+                    if value is None:
+                        rgba = cached_thumbnail(filepath, stat, atlas)
+                        if rgba is None:
+                            missing += 1
+                            continue
+                        pending.append((len(values), filepath, stamp, rgba))
+
+                    sizes[filepath] = stat.st_size
+                    infos[filepath] = info.get(name)
+                    filepaths.append(filepath)
+                    values.append(value)
+            finally:
+                if atlas is not None:
+                    atlas.close()
+
+        # New and changed images are hashed in batches
+        for batch_start in range(0, len(pending), hash_batch_size):
+            if self.cancelled:
+                return
+            batch = pending[batch_start:batch_start + hash_batch_size]
+            for (position, filepath, stamp, rgba), value in zip(batch, perceptual_hashes([item[3] for item in batch]).tolist()):
+                values[position] = value
+                image_hashes.put(filepath, stamp, value)
+            hashed += len(batch)
+
+        image_hashes.keep(self.roots, set(filepaths))
+        try:
+            image_hashes.save()
+        except OSError:
+            pass
+
+        groups = []
+        for group in near_duplicate_groups(numpy.array(values, numpy.uint64), self.threshold):
+            members = []
+            for i in group:
+                filepath = filepaths[i]
+                info = infos[filepath]
+                if info is None:
+                    info = probe_image(filepath)
+                members.append((filepath, sizes[filepath], info))
+            # The copy worth keeping first, the largest one
+            members.sort(key=lambda member: (-(member[2].resolution if member[2] is not None else 0), -member[1], member[0]))
+            groups.append(members)
+
+        groups.sort(key=lambda members: (-len(members), members[0][0]))
+
+        self.result = (groups, len(filepaths), hashed, missing, time.perf_counter() - start)
+
+    def apply(self):
+        """Show the result in the preferences, on Blender's main thread"""
+        groups, images, hashed, missing, elapsed = self.result
+        library_duplicates.analysed = True
+        library_duplicates.groups = groups
+        library_duplicates.images = images
+        library_duplicates.hashed = hashed
+        library_duplicates.missing = missing
+        library_duplicates.elapsed = elapsed
+
+        return library_duplicates
+
+# FIND DUPLICATES FUNCTION
+def find_duplicates(roots, threshold, use_atlases=True):
+    """Analyse the libraries at roots for near duplicate images, into library_duplicates, right away"""
+    analysis = DuplicateAnalysis(roots, threshold, use_atlases)
+    analysis.run()
+    return analysis.apply()
+
+# DRAW DUPLICATES FUNCTION
+def draw_duplicates(layout):
+    box = layout.box()
+    col = box.column(align=True)
+
+    col.label(text="%d images analysed in %.1f s, %d hashed, %d without a cached thumbnail" % (
+        library_duplicates.images, library_duplicates.elapsed, library_duplicates.hashed, library_duplicates.missing))
+
+    if not library_duplicates.groups:
+        col.label(text="No near duplicates found", icon='CHECKMARK')
+        return
+
+    col.label(text="%d groups of near duplicates, %.1f MB used by all but the largest of each" % (
+        len(library_duplicates.groups), library_duplicates.reclaimable() / 1048576.0), icon='DUPLICATE')
+
+    for members in library_duplicates.groups[:max_shown_duplicate_groups]:
+        col = box.box().column(align=True)
+        for filepath, size, info in members:
+            row = col.row(align=True)
+            row.label(text=os.path.basename(filepath))
+            row.label(text=os.path.basename(os.path.dirname(filepath)))
+            row.label(text="%d x %d" % (info.width, info.height) if info is not None else "Unknown size")
+            row.label(text="%.2f MB" % (size / 1048576.0))
+            row.operator("texture_duplicates.open_folder", text='', icon='FILE_FOLDER').filepath = filepath
+
+    hidden = len(library_duplicates.groups) - max_shown_duplicate_groups
+    if hidden > 0:
+        box.label(text="%d more groups not shown" % hidden)
 
 #--------------------------------------------------------------------------------------
 # T E X T U R E    F U N C T I O N A L I T I E S
 #--------------------------------------------------------------------------------------
 
 # ASSIGN BRUSH TEXTURE
+@profiled('UPDATE')
 def assign_texture(self, context):
-    brush = brush_mode(self, context)
+    # One snapshot for every helper used while assigning
+    state = enter_texture_state(self, context)
+    try:
+        assign_brush_texture(self, context)
+    finally:
+        leave_texture_state(state)
+
+@profiled('STAGE')
+def assign_brush_texture(self, context):
+    preferences = context.preferences.addons[__name__].preferences
+    state = texture_state(self, context)
+    brush = state.brush
 
     previousTexture = None
-    textureImage = None
     
     selected_item = brush.brush_texture.items_in_selected_category
 
     selected_procedural = brush.brush_texture.items_procedural_textures
             
-    is_sub_folders = preview_sub_folders_textures(self, context)
-    is_folders = preview_folders_textures(self, context)
-        
-    category = brush.brush_texture.category
-    sub_category = brush.brush_texture.sub_category
-    
     previews = preview_category_items(self, context)
 
     #none_preview = previews[0][0]
     
     # Check for previews
     if previews:                              
-        # Path if using sub categories
-        if is_sub_folders and category != sub_category and sub_category != 'NONE':                
-            selected_texture_path = os.path.join(lib_path(self, context), category_pointer(self, context), sub_category_pointer(self, context), selected_texture(self, context))                    
-        # Path if using categories        
-        else:
-            selected_texture_path = os.path.join(lib_path(self, context), category_pointer(self, context), selected_texture(self, context))
-
+        # Path of the selected sub category, or of the category if no other sub category is selected
+        selected_texture_path = os.path.join(state.directory, selected_item)
        
-        texname = os.path.splitext(selected_texture(self, context))[0]
-        texname_no_extension = fix_labels(self, context, current_labels=texname)
-                        
         use_procedural = brush.use_procedural_textures
         procedurals = preview_procedural_items(self, context)
 
@@ -489,19 +4682,7 @@ def assign_texture(self, context):
             previousTexture = brush.image_texture
                        
             if selected_item != 'NONE':                                                                
-                # If the selected texture is not found and there's previews, create and assign new texture                       
-                if texname_no_extension not in bpy.data.textures:        
-                    bpy.data.images.load(selected_texture_path, check_existing=True)
-                    image_to_texture = bpy.data.textures.new(texname_no_extension, 'IMAGE')
-                    image_to_texture.image = bpy.data.images[selected_texture(self, context)]            
-                    brush.texture = bpy.data.textures[texname_no_extension]
-                    brush.image_texture = bpy.data.textures[texname_no_extension]
-                # If the selected texture is already found            
-                else:                                                                                                                                                                                          
-                # If image_texture is not None, previews found and category != sub category, update texture and image_texture             
-                    if brush.image_texture is not None:                    
-                        brush.texture = bpy.data.textures[texname_no_extension]
-                        brush.image_texture = bpy.data.textures[texname_no_extension]                                                             
+                assign_image_file(context, brush, state.mode, selected_texture_path, state.directory, selected_item)
                         
             # Remove texture, if None is selected                       
             else:
@@ -521,20 +4702,189 @@ def assign_texture(self, context):
                     brush.texture = bpy.data.textures[selected_procedural]        
                     brush.procedural_texture = bpy.data.textures[selected_procedural]                        
 
-            # Remove texture, if None is selected                       
-            else:
-                brush.texture = None
-                brush.procedural_texture = None
+            # Remove texture, if None is selected                       
+            else:
+                brush.texture = None
+                brush.procedural_texture = None
+
+    release_previous_texture(brush, previousTexture)
+
+    # Keep the images loaded from the library within their memory budget
+    free_image_memory(context)
+
+# ASSIGN IMAGE FILE FUNCTION
+def assign_image_file(context, brush, mode, filepath, directory=None, selected_item=None):
+    """Put the image at filepath on the brush texture, the images around selected_item in directory are loaded ahead"""
+    preferences = context.preferences.addons[__name__].preferences
+    filepath = os.path.normpath(filepath)
+
+    # Search results are named by their path in the library
+    texname_no_extension = texture_name(filepath)
+
+    # Only the image of the brush texture changes, no datablock is made or removed
+    if preferences.use_persistent_texture:
+        proxy = None
+
+        # A small copy goes on the brush until the full image is loaded
+        if preferences.use_proxy_textures and image_pool.lookup(filepath) is None:
+            proxy = load_proxy_image(filepath, preferences.proxy_size)
+
+        image = proxy if proxy is not None else image_pool.get(filepath)
+        image_prefetcher.picked(filepath)
+        texture = persistent_brush_texture(brush, mode)
+
+        if texture.image != image:
+            texture.image = image
+        if brush.texture != texture:
+            brush.texture = texture
+        if brush.image_texture != texture:
+            brush.image_texture = texture
+
+        if proxy is not None:
+            proxy_loader.request(texture, proxy, filepath)
+
+        # Room for the picked images and the ones loaded ahead
+        image_pool.trim(max(preferences.image_pool_size, 2 * preferences.prefetch_count + 1))
+
+        # Load the images around this one while the artist looks at it
+        if directory is not None:
+            image_prefetcher.schedule(neighbour_images(directory, selected_item, preferences.prefetch_count))
+    # If the selected texture is not found and there's previews, create and assign new texture                       
+    elif texname_no_extension not in bpy.data.textures:        
+        image = image_pool.get(filepath)
+        image_to_texture = bpy.data.textures.new(texname_no_extension, 'IMAGE')
+        image_to_texture.image = image            
+        brush.texture = bpy.data.textures[texname_no_extension]
+        brush.image_texture = bpy.data.textures[texname_no_extension]
+    # If the selected texture is already found            
+    else:                                                                                                                                                                                          
+    # If image_texture is not None, previews found and category != sub category, update texture and image_texture             
+        if brush.image_texture is not None:                    
+            brush.texture = bpy.data.textures[texname_no_extension]
+            brush.image_texture = bpy.data.textures[texname_no_extension]                                                             
+
+    # Kept for quick access
+    remember_texture(preferences.recents, filepath, preferences.recent_count)
+
+# RELEASE PREVIOUS TEXTURE FUNCTION
+def release_previous_texture(brush, previousTexture):
+    textureImage = None
+
+    # Unlink texture and image
+    if previousTexture:
+        # Unlink previous texture, if no users, brush textures are kept for the next image
+        if brush.image_texture != previousTexture and previousTexture.users == 0 and "textures_manager_brush" not in previousTexture:
+            textureImage = bpy.data.textures[previousTexture.name].image
+            bpy.data.textures.remove(bpy.data.textures[previousTexture.name], do_unlink=True, do_id_user=True, do_ui_user=True)
+        # Unlink texture image, if no users        
+        if textureImage is not None and textureImage.users == 0:
+            bpy.data.images.remove(bpy.data.images[textureImage.name], do_unlink=True, do_id_user=True, do_ui_user=True)                
+
+#--------------------------------------------------------------------------------------
+# Q U I C K    A C C E S S
+#--------------------------------------------------------------------------------------
+
+# Whether the library was browsed in this session, until then only the quick access thumbnails are loaded
+library_browsed = False
+
+# REMEMBER TEXTURE FUNCTION
+def remember_texture(shortcuts, filepath, limit):
+    """Put filepath first in shortcuts, keeping at most limit of them"""
+    for i, shortcut in enumerate(shortcuts):
+        if shortcut.filepath == filepath:
+            if i == 0:
+                return
+            shortcuts.remove(i)
+            break
+
+    if limit <= 0:
+        return
+
+    shortcuts.add().filepath = filepath
+    shortcuts.move(len(shortcuts) - 1, 0)
+
+    while len(shortcuts) > limit:
+        shortcuts.remove(len(shortcuts) - 1)
+
+# QUICK ACCESS PATHS FUNCTION
+def quick_access_paths(preferences):
+    """Favorites first, then the recent textures that aren't favorites"""
+    favorites = [shortcut.filepath for shortcut in preferences.favorites]
+    favorite_set = set(favorites)
+    return favorites + [shortcut.filepath for shortcut in preferences.recents if shortcut.filepath not in favorite_set]
+
+# QUICK ACCESS PENDING FUNCTION
+def quick_access_pending(preferences):
+    """Whether the library wasn't browsed yet, and there are quick access textures to show instead"""
+    return (not library_browsed and preferences.use_quick_access
+        and bool(len(preferences.favorites) or len(preferences.recents)))
+
+# QUICK ACCESS ONLY FUNCTION
+def quick_access_only(context, brush):
+    """Whether the panel only shows the quick access textures, without listing the library"""
+    preferences = context.preferences.addons[__name__].preferences
+
+    return (quick_access_pending(preferences) and brush is not None
+        and brush.use_library_preview and not brush.use_procedural_textures)
+
+# QUICK ACCESS ITEMS FUNCTION
+@profiled('ITEMS')
+def preview_quick_items(self, context):
+    if context is None:
+        return []
+
+    preferences = context.preferences.addons[__name__].preferences
+
+    if "quick" not in preview_collections_textures:
+        preview_collections_textures["quick"] = new_texture_previews()
+    pcoll = preview_collections_textures["quick"]
 
-    # Unlink texture and image
-    if previousTexture:
-        # Unlink previous texture, if no users        
-        if brush.image_texture != previousTexture and previousTexture.users == 0:
-            textureImage = bpy.data.textures[previousTexture.name].image
-            bpy.data.textures.remove(bpy.data.textures[previousTexture.name], do_unlink=True, do_id_user=True, do_ui_user=True)
-        # Unlink texture image, if no users        
-        if textureImage is not None and textureImage.users == 0:
-            bpy.data.images.remove(bpy.data.images[textureImage.name], do_unlink=True, do_id_user=True, do_ui_user=True)                
+    # Numbers from the path, so the selection survives the recent textures moving around
+    enum_items = [('NONE', 'None', 'None', 'TEXTURE', 0)]
+    for filepath in quick_access_paths(preferences):
+        thumb = pcoll.get(filepath)
+        icon = thumb.icon_id if thumb is not None else placeholder_icon
+        label = format_label(os.path.basename(filepath))
+        enum_items.append((filepath, label, filepath, icon, zlib.crc32(filepath.encode("utf-8", "surrogateescape")) & 0x7fffffff or 1))
+
+    # Only these thumbnails are loaded, their folders aren't listed
+    pcoll.my_items = pcoll.my_previews = enum_items
+    pcoll.my_items_index = pcoll.my_previews_index = {item[0]: i for i, item in enumerate(enum_items)}
+    request_thumbnails(pcoll, enum_items[1:], preferences.use_thumbnail_cache)
+
+    return enum_items
+
+# UPDATE QUICK ITEM FUNCTION
+@profiled('UPDATE')
+def update_quick_item(self, context):
+    # Resetting the selector below calls this again
+    if self.quick_item == 'NONE':
+        return
+
+    state = enter_texture_state(self, context)
+    try:
+        brush = brush_mode(self, context)
+        previousTexture = brush.image_texture
+        filepath = self.quick_item
+
+        assign_image_file(context, brush, texture_state(self, context).mode, filepath)
+        release_previous_texture(brush, previousTexture)
+        free_image_memory(context)
+    finally:
+        leave_texture_state(state)
+
+    self.quick_item = 'NONE'
+
+# DRAW QUICK ACCESS FUNCTION
+def draw_quick_access(layout, category_pointer, preferences):
+    if not preferences.use_quick_access or not (len(preferences.favorites) or len(preferences.recents)):
+        return
+
+    col = layout.column(align=True)
+    col.label(text='Quick Access:')
+    row = col.row(align=True)
+    row.scale_y = 2.0
+    row.prop(category_pointer, "quick_item", expand=True, icon_only=True)
 
 #--------------------------------------------------------------------------------------
 # P R O P E R T Y    P O L L S
@@ -547,14 +4897,11 @@ def procedural_items(self, object):
 # ONLY PREVIEW TEXTURES POLL
 def category_items(self, object):
                                     
-    preview_textures = []
-        
-    preview_items = preview_collections_textures["textures"]
-        
-    for item in preview_items:
-        preview_textures.append(item)       
+    # Images of the folder currently shown
+    pcoll = preview_pool.current
+    preview_textures = pcoll.my_items_index if pcoll is not None else {}
                                                             
-    return object.type == 'IMAGE' and object.users >= 1 and object.image.name in preview_textures
+    return object.type == 'IMAGE' and object.users >= 1 and texture_image_name(object) in preview_textures
                                         
 #--------------------------------------------------------------------------------------
 # T E X T U R E   R E D R A W    R E G I S T E R
@@ -577,7 +4924,35 @@ iconLive = False
 propToggle = True
                                                 
 # REDRAW NEW TEXTURE SETTINGS ON REGISTER           
+@timed_first_call('First Panel Draw')
+@profiled('DRAW')
 def texture_register_draw(self, context):
+    # Until the library is browsed, only the quick access thumbnails are loaded
+    brush = brush_mode(self, context)
+    if quick_access_only(context, brush):
+        quick_access_draw(self, context, brush)
+        return
+
+    # One snapshot for every helper used while drawing
+    state = begin_texture_draw(self, context)
+    try:
+        texture_settings_draw(self, context)
+    finally:
+        leave_texture_state(state)
+
+def quick_access_draw(self, context, brush):
+    preferences = context.preferences.addons[__name__].preferences
+    layout = self.layout
+
+    draw_quick_access(layout, brush.brush_texture, preferences)
+
+    row = layout.row(align=alignLayout)
+    row.operator("texture_library.browse", icon='ASSET_MANAGER')
+
+    col = layout.column()
+    brush_texture_settings(col, brush, context.sculpt_object)
+
+def texture_settings_draw(self, context):
     preferences = context.preferences.addons[__name__].preferences
 
     showLabels = preferences.show_labels
@@ -585,32 +4960,21 @@ def texture_register_draw(self, context):
     iconScale = (iconTemplateScale + 3)   
     iconScaleLabel = (iconScale - 4)
                                        
-    settings = self.paint_settings(context)
-    brush = settings.brush
-    mode = context.object.mode
-    tool = context.tool_settings          
+    state = texture_state(self, context)
+    brush = state.brush
     texture = brush.texture
     procedurals = preview_procedural_items(self, context)
     is_sub_folders = preview_sub_folders_textures(self, context)
-    path_folder = lib_path_folder(self, context)
+    path_folder = state.lib_path_folder
     items = preview_category_items(self, context)                
-    path = lib_path(self, context)
+    path = state.lib_path
                                    
     layout = self.layout                         
 
-    brush = brush_mode(self, context)
-    
     category_pointer = brush.brush_texture
 
-    category = brush.brush_texture.category
-    sub_category = brush.brush_texture.sub_category
-
-    
-    if is_sub_folders and sub_category != 'NONE': 
-        texture_category = brush.brush_texture.sub_category                               
-    else: 
-        texture_category = brush.brush_texture.category  
-
+    category = state.category
+    sub_category = state.sub_category
 
     # Text and icon, if using / not using library preview
     if not brush.use_library_preview:
@@ -655,11 +5019,16 @@ def texture_register_draw(self, context):
             # Settings if path found                        
             if path:
                 sub_cats_found = found_sub_categories(self, context)                
+
+                draw_quick_access(col, category_pointer, preferences)
+                row = col.row(align=alignLayout)
                                 
                 # Texture categories settings                
                 row.label(text='Categories:')                                      
                 row.prop(category_pointer, "category", text='')
                 row.operator("texture_category.open", text='', icon='FILE_FOLDER')
+                row.operator("texture_category.import", text='', icon='IMPORT')
+                row.operator("texture_category.import", text='', icon='FILEBROWSER').use_selection = True
 
                 # If sub folders found and items found in selected category                           
                 if is_sub_folders is not None and items and sub_cats_found:                        
@@ -670,7 +5039,7 @@ def texture_register_draw(self, context):
 
                     # Check to see if open sub category folder operator setting can be enabled                    
                     row_enabled = row.row(align=alignLayout)                                         
-                    if sub_category == 'NONE':
+                    if sub_category == no_folder:
                         row_enabled.enabled = False
                     elif sub_category == category:
                         row_enabled.enabled = False
@@ -678,6 +5047,56 @@ def texture_register_draw(self, context):
                         row_enabled.enabled = True                                               
                                                                                                                                                
                     row_enabled.operator("texture_sub_category.open", text='', icon='FILE_FOLDER')
+
+                    # Folders picked below the sub category, each one goes back to its level
+                    parts = folder_path_parts(state.folder_path)
+                    if parts:
+                        row = col.row(align=alignLayout)
+                        row.label(text='Path:')
+                        crumbs = row.row(align=True)
+                        props = crumbs.operator("texture_folder.select", text=format_label(sub_category), icon='FILE_PARENT')
+                        props.folder_path = ""
+                        for i, part in enumerate(parts):
+                            props = crumbs.operator("texture_folder.select", text=format_label(part))
+                            props.folder_path = "/".join(parts[:i + 1])
+
+                    # Folders below the selected one
+                    if len(preview_child_folders(self, context)) > 1:
+                        row = col.row(align=alignLayout)
+                        row.label(text='Folders:')
+                        row.prop(category_pointer, "child_folder", text='')
+
+                # The library changed since its cache was prebuilt, the changed folders are listed here
+                library = shared_library_for(state.directory)
+                if library is not None and library.stale:
+                    row = col.row(align=alignLayout)
+                    row.alignment = 'CENTER'
+                    row.label(text='Shared catalog out of date, prebuild it again', icon='ERROR')
+
+                # Library search settings
+                row = col.row(align=alignLayout)
+                row.prop(category_pointer, "search", text='', icon='VIEWZOOM')
+
+                # Sort and filter settings, from the image headers
+                if not state.search:
+                    row = col.row(align=alignLayout)
+                    row.prop(category_pointer, "sort_by", text='')
+                    row.prop(category_pointer, "channels", text='')
+                    row.prop(category_pointer, "min_resolution")
+
+                if state.search:
+                    row = col.row(align=alignLayout)
+                    row.alignment = 'CENTER'
+                    # Not made current by the lookup, the panel may show another folder
+                    search_pcoll = preview_pool.collections.get(('SEARCH', state.lib_path))
+                    if library_search.indexes.get(path) is None:
+                        row.label(text='Indexing library...')
+                    elif search_pcoll is None or search_pcoll.my_previews_entry is None:
+                        row.label(text='Searching...')
+                    elif search_pcoll.my_search_total > search_limit:
+                        row.label(text='%d+ results, first %d shown' % (search_limit, search_limit))
+                    else:
+                        row.label(text='%d results' % search_pcoll.my_search_total)
                     
             # Path setting, if path not found                                            
             else:
@@ -688,6 +5107,28 @@ def texture_register_draw(self, context):
             # Preview setting, if items found in selected category                                                    
             if len(items) >= 2:                                       
                 col.template_icon_view(category_pointer, "items_in_selected_category", show_labels=showLabels, scale=iconTemplateScale)                                                     
+
+                # Favorite setting of the selected texture
+                selected_item = category_pointer.items_in_selected_category
+                if selected_item != 'NONE':
+                    filepath = os.path.normpath(os.path.join(state.directory, selected_item))
+                    favorite = any(shortcut.filepath == filepath for shortcut in preferences.favorites)
+                    row = col.row(align=alignLayout)
+                    row.alignment = 'CENTER'
+                    row.operator("texture_favorites.toggle", text='Favorite', icon='SOLO_ON' if favorite else 'SOLO_OFF', depress=favorite)
+
+                # Page settings, if the category has more than one page
+                pcoll = preview_pool.current
+                if preferences.use_paging and pcoll is not None and pcoll.my_page_count > 1:
+                    page = min(category_pointer.page, pcoll.my_page_count - 1)
+                    row = col.row(align=alignLayout)
+                    row_enabled = row.row(align=alignLayout)
+                    row_enabled.enabled = page > 0
+                    row_enabled.operator("texture_page.previous", text='', icon='TRIA_LEFT')
+                    row.label(text='Page %d / %d' % (page + 1, pcoll.my_page_count))
+                    row_enabled = row.row(align=alignLayout)
+                    row_enabled.enabled = page < pcoll.my_page_count - 1
+                    row_enabled.operator("texture_page.next", text='', icon='TRIA_RIGHT')
             else:
                 # Preview setting, if only NONE item found                                                                
                 if path and len(items) == 1:                     
@@ -703,7 +5144,7 @@ def texture_register_draw(self, context):
             if texture:
                 row = col.row(align=alignLayout)
                 row.alignment = 'LEFT'                             
-                row.label(text=brush.image_texture.name, icon='TEXTURE')                
+                row.label(text=texture_label(brush.image_texture) if brush.image_texture else texture.name, icon='TEXTURE')                
                                                                                                                        
                 col = layout.column()             
                 brush_texture_settings(col, brush, context.sculpt_object)            
@@ -797,25 +5238,457 @@ class OpenSubCategoryFolder(Operator):
 
     def execute(self, context):              
         
-        brush = brush_mode(self, context)
-        
-        #category = brush.brush_texture.category
-        sub_category = brush.brush_texture.sub_category
+        # The folder shown, at any depth below the category
+        directory = texture_state(self, context).directory
                                    
         if sys.platform == "win32":
-            if sub_category == 'NONE':
-                os.startfile(os.path.join(lib_path(self, context), category_pointer(self, context)))
+            os.startfile(directory)
+        else:
+            opener = "open" if sys.platform == "darwin" else "xdg-open"
+            subprocess.call([opener, directory])
+                    
+        return {'FINISHED'}
+
+# TOGGLE FAVORITE TEXTURE
+class ToggleFavoriteTexture(Operator):
+    bl_idname = "texture_favorites.toggle"
+    bl_label = "Toggle Favorite"
+    bl_description = "Add the selected texture to the favorites, or remove it"
+    bl_options = {'INTERNAL'}
+
+    def execute(self, context):
+
+        preferences = context.preferences.addons[__name__].preferences
+        state = texture_state(self, context)
+        selected_item = state.brush.brush_texture.items_in_selected_category
+
+        if selected_item == 'NONE':
+            return {'CANCELLED'}
+
+        filepath = os.path.normpath(os.path.join(state.directory, selected_item))
+        for i, shortcut in enumerate(preferences.favorites):
+            if shortcut.filepath == filepath:
+                preferences.favorites.remove(i)
+                break
+        else:
+            preferences.favorites.add().filepath = filepath
+
+        return {'FINISHED'}
+
+# CLEAR RECENT TEXTURES
+class ClearRecentTextures(Operator):
+    bl_idname = "texture_quick.clear_recents"
+    bl_label = "Clear Recent Textures"
+    bl_description = "Forget the recently picked textures, the favorites are kept"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+
+        context.preferences.addons[__name__].preferences.recents.clear()
+
+        return {'FINISHED'}
+
+# BROWSE LIBRARY
+class BrowseTextureLibrary(Operator):
+    bl_idname = "texture_library.browse"
+    bl_label = "Browse Library"
+    bl_description = "Show the categories and textures of the library"
+    bl_options = {'INTERNAL'}
+
+    def execute(self, context):
+        global library_browsed
+
+        library_browsed = True
+
+        return {'FINISHED'}
+
+# IMPORT CATEGORY IMAGES
+class ImportCategoryImages(Operator):
+    bl_idname = "texture_category.import"
+    bl_label = "Import Category"
+    bl_description = "Create the images and textures of every texture shown in the selected folder at once"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    use_selection: BoolProperty(
+        name="Select Images",
+        description="Pick the images to import in the file browser, instead of importing the whole folder",
+        default=False,
+        options={'SKIP_SAVE'},
+    )
+
+    use_fake_user: BoolProperty(
+        name="Fake User",
+        description="Keep the imported textures in the blend file, even when no brush uses them",
+        default=True,
+    )
+
+    files: CollectionProperty(
+        type=OperatorFileListElement,
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+
+    directory: StringProperty(
+        subtype='DIR_PATH',
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+
+    filter_image: BoolProperty(
+        default=True,
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+
+    def invoke(self, context, event):
+        if not self.use_selection:
+            return self.execute(context)
+
+        self.directory = texture_state(self, context).directory
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+
+        preferences = context.preferences.addons[__name__].preferences
+
+        if self.use_selection:
+            filepaths = [os.path.join(self.directory, file.name) for file in self.files if file.name]
+        else:
+            # The images the panel shows, with its sort and filter
+            directory = texture_state(self, context).directory
+            pcoll = preview_pool.collections.get(directory)
+            if pcoll is not None and pcoll.my_items:
+                names = [item[0] for item in pcoll.my_items[1:]]
             else:
-                os.startfile(os.path.join(lib_path(self, context), category_pointer(self, context), sub_category_pointer(self, context)))
-                                
+                names = library_catalog.images(directory)
+            filepaths = [os.path.join(directory, name) for name in names]
+
+        if not filepaths:
+            self.report({'WARNING'}, "No images to import")
+            return {'CANCELLED'}
+
+        report = import_images(filepaths, preferences.max_image_size, self.use_fake_user)
+
+        self.report({'INFO'}, "%d textures and %d images created, %d reused, %d skipped, %d names taken by other textures, probed in %.2f s, %.1f MB of images added in %.2f s, decoded when first used" % (
+            report['textures'], report['images'], report['reused'], report['skipped'], report['conflicts'],
+            report['probe_time'], report['bytes'] / 1048576.0, report['add_time']))
+
+        return {'FINISHED'}
+
+# SELECT FOLDER
+class SelectTextureFolder(Operator):
+    bl_idname = "texture_folder.select"
+    bl_label = "Select Folder"
+    bl_description = "Show the textures of this folder"
+    bl_options = {'INTERNAL'}
+
+    folder_path: StringProperty(options={'SKIP_SAVE'})
+
+    def execute(self, context):
+
+        brush = brush_mode(self, context)
+        brush.brush_texture.folder_path = self.folder_path
+        update_single_item_preview(brush.brush_texture, context)
+
+        return {'FINISHED'}
+
+# NEXT TEXTURE PAGE
+class NextTexturePage(Operator):
+    bl_idname = "texture_page.next"
+    bl_label = "Next Page"
+    bl_description = "Show the next page of textures"
+    bl_options = {'INTERNAL'}
+
+    def execute(self, context):
+
+        brush = brush_mode(self, context)
+        pcoll = preview_pool.current
+        page_count = pcoll.my_page_count if pcoll is not None else 1
+
+        brush.brush_texture.page = min(brush.brush_texture.page + 1, page_count - 1)
+
+        return {'FINISHED'}
+
+# PREVIOUS TEXTURE PAGE
+class PreviousTexturePage(Operator):
+    bl_idname = "texture_page.previous"
+    bl_label = "Previous Page"
+    bl_description = "Show the previous page of textures"
+    bl_options = {'INTERNAL'}
+
+    def execute(self, context):
+
+        brush = brush_mode(self, context)
+        pcoll = preview_pool.current
+        page_count = pcoll.my_page_count if pcoll is not None else 1
+
+        brush.brush_texture.page = max(min(brush.brush_texture.page, page_count - 1) - 1, 0)
+
+        return {'FINISHED'}
+
+# CLEAR THUMBNAIL CACHE
+class ClearThumbnailCache(Operator):
+    bl_idname = "texture_thumbnails.clear_cache"
+    bl_label = "Clear Thumbnail Cache"
+    bl_description = "Remove every cached texture thumbnail from disk"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+
+        thumbnail_cache.clear()
+        thumbnail_atlases.clear(remove_files=True)
+
+        return {'FINISHED'}
+
+# BUILD THUMBNAIL ATLASES
+class BuildThumbnailAtlases(Operator):
+    bl_idname = "texture_thumbnails.build_atlases"
+    bl_label = "Build Thumbnail Atlases"
+    bl_description = "Pack the thumbnails of every library folder in one file per folder, so they are shown without reading the images"
+    bl_options = {'REGISTER'}
+
+    def library_folders(self, context):
+        preferences = context.preferences.addons[__name__].preferences
+        folders = []
+        for path_folder in ('sculpting_texture_directory', 'vertex_paint_texture_directory', 'texture_paint_texture_directory'):
+            root = getattr(preferences, path_folder)
+            if root and fs_isdir(root):
+                folders.extend(library_folders(root))
+
+        # Libraries shared by several modes are packed once
+        return list(dict((folder, entry) for folder, entry in folders).items())
+
+    def invoke(self, context, event):
+        self.folders = self.library_folders(context)
+        self.index = 0
+        self.written = 0
+        self.start = time.perf_counter()
+
+        window_manager = context.window_manager
+        window_manager.progress_begin(0, max(len(self.folders), 1))
+
+        # One folder per timer event, Blender stays responsive in between
+        self.timer = window_manager.event_timer_add(0.01, window=context.window)
+        window_manager.modal_handler_add(self)
+
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            return self.finish(context, {'CANCELLED'})
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        if self.index < len(self.folders):
+            folder, entry = self.folders[self.index]
+            self.written += build_thumbnail_atlas(folder, sorted(entry.images))
+            self.index += 1
+            context.window_manager.progress_update(self.index)
+
+        if self.index < len(self.folders):
+            return {'RUNNING_MODAL'}
+
+        return self.finish(context, {'FINISHED'})
+
+    def finish(self, context, result):
+        window_manager = context.window_manager
+        window_manager.event_timer_remove(self.timer)
+        window_manager.progress_end()
+
+        self.report({'INFO'}, "%d thumbnails packed in %d of %d atlases in %.1f s" % (
+            self.written, self.index, len(self.folders), time.perf_counter() - self.start))
+
+        return result
+
+    def execute(self, context):
+        # From scripts, the whole library at once
+        start = time.perf_counter()
+        folders = self.library_folders(context)
+        written = sum(build_thumbnail_atlas(folder, sorted(entry.images)) for folder, entry in folders)
+
+        self.report({'INFO'}, "%d thumbnails packed in %d atlases in %.1f s" % (written, len(folders), time.perf_counter() - start))
+
+        return {'FINISHED'}
+
+# FIND DUPLICATE TEXTURES
+class FindDuplicateTextures(Operator):
+    bl_idname = "texture_library.find_duplicates"
+    bl_label = "Find Duplicates"
+    bl_description = "Compare the cached thumbnails of every library folder and list the images that are near duplicates of each other"
+    bl_options = {'REGISTER'}
+
+    def library_roots(self, context):
+        preferences = context.preferences.addons[__name__].preferences
+        roots = []
+        for path_folder in ('sculpting_texture_directory', 'vertex_paint_texture_directory', 'texture_paint_texture_directory'):
+            root = getattr(preferences, path_folder)
+            if root and fs_isdir(root) and os.path.normpath(root) not in roots:
+                roots.append(os.path.normpath(root))
+        return roots
+
+    def new_analysis(self, context):
+        """The analysis of the libraries, or None if it can't run"""
+        try:
+            import numpy
+        except ImportError:
+            self.report({'ERROR'}, "Finding duplicates needs NumPy, which comes with Blender 2.80 and later")
+            return None
+
+        if library_duplicates.analysis is not None:
+            self.report({'WARNING'}, "The libraries are already being analysed")
+            return None
+
+        preferences = context.preferences.addons[__name__].preferences
+        return DuplicateAnalysis(self.library_roots(context), preferences.duplicate_threshold, preferences.use_thumbnail_cache)
+
+    def invoke(self, context, event):
+        analysis = self.new_analysis(context)
+        if analysis is None:
+            return {'CANCELLED'}
+
+        # Hashed and compared in a worker, the timer only checks when it's done
+        library_duplicates.analysis = analysis
+        self.future = thumbnail_loader.submit(analysis.run)
+
+        window_manager = context.window_manager
+        self.timer = window_manager.event_timer_add(0.1, window=context.window)
+        window_manager.modal_handler_add(self)
+
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        analysis = library_duplicates.analysis
+
+        if event.type == 'ESC' or analysis is None:
+            if analysis is not None:
+                analysis.cancelled = True
+            return self.finish(context, {'CANCELLED'})
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        if not self.future.done():
+            return {'RUNNING_MODAL'}
+
+        try:
+            self.future.result()
+        except Exception as error:
+            self.report({'ERROR'}, "Finding duplicates failed: %s" % error)
+            return self.finish(context, {'CANCELLED'})
+
+        self.report_duplicates(analysis.apply())
+
+        # Show the groups in the preferences
+        for window in context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type == 'PREFERENCES':
+                    area.tag_redraw()
+
+        return self.finish(context, {'FINISHED'})
+
+    def finish(self, context, result):
+        context.window_manager.event_timer_remove(self.timer)
+        library_duplicates.analysis = None
+        return result
+
+    def execute(self, context):
+        # From scripts, right away
+        analysis = self.new_analysis(context)
+        if analysis is None:
+            return {'CANCELLED'}
+
+        analysis.run()
+        self.report_duplicates(analysis.apply())
+
+        return {'FINISHED'}
+
+    def report_duplicates(self, duplicates):
+        if duplicates.missing:
+            self.report({'WARNING'}, "%d images have no cached thumbnail and were left out, build the thumbnail atlases first" % duplicates.missing)
+        else:
+            self.report({'INFO'}, "%d groups of near duplicates among %d images" % (len(duplicates.groups), duplicates.images))
+
+# OPEN DUPLICATE FOLDER
+class OpenDuplicateFolder(Operator):
+    bl_idname = "texture_duplicates.open_folder"
+    bl_label = "Open Image Folder"
+    bl_description = "Open the folder holding this image"
+    bl_options = {'INTERNAL'}
+
+    filepath: StringProperty(
+        subtype='FILE_PATH',
+    )
+
+    def execute(self, context):
+
+        directory = os.path.dirname(self.filepath)
+
+        if sys.platform == "win32":
+            os.startfile(directory)
         else:
             opener = "open" if sys.platform == "darwin" else "xdg-open"
-            if sub_category == 'NONE':            
-                subprocess.call([opener, os.path.join(lib_path(self, context), category_pointer(self, context))])
-            else:            
-                subprocess.call([opener, os.path.join(lib_path(self, context), category_pointer(self, context), sub_category_pointer(self, context))])
+            subprocess.call([opener, directory])
+
+        return {'FINISHED'}
+
+# FREE UNUSED IMAGES
+class FreeUnusedImages(Operator):
+    bl_idname = "texture_images.free_unused"
+    bl_label = "Free Unused Images"
+    bl_description = "Free the memory of every image loaded from the library that no brush uses"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+
+        freed = image_pool.free(0)
+        self.report({'INFO'}, "%.1f MB freed" % (freed / 1048576.0))
+
+        return {'FINISHED'}
+
+# RESET PROFILE
+class ResetProfile(Operator):
+    bl_idname = "texture_profile.reset"
+    bl_label = "Reset Profile"
+    bl_description = "Forget the recorded callback timings and start recording again"
+    bl_options = {'INTERNAL'}
+
+    def execute(self, context):
+
+        profiler.reset()
+
+        return {'FINISHED'}
+
+# EXPORT PROFILE
+class ExportProfile(Operator):
+    bl_idname = "texture_profile.export"
+    bl_label = "Export Profile"
+    bl_description = "Save the recorded callback timings to a JSON file"
+    bl_options = {'REGISTER'}
+
+    filename_ext = ".json"
+
+    filepath: StringProperty(
+        subtype='FILE_PATH',
+    )
+
+    def invoke(self, context, event):
+        if not self.filepath:
+            self.filepath = "textures_manager_profile.json"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+
+        filepath = bpy.path.ensure_ext(self.filepath, self.filename_ext)
+
+        try:
+            with fs_open(filepath, "w") as file:
+                json.dump(profiler.as_dict(), file, indent=2)
+        except OSError as error:
+            self.report({'ERROR'}, "Cannot write %s: %s" % (filepath, error))
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, "Profile saved to %s" % filepath)
 
-                    
         return {'FINISHED'}
         
 #--------------------------------------------------------------------------------------
@@ -823,8 +5696,12 @@ class OpenSubCategoryFolder(Operator):
 #--------------------------------------------------------------------------------------
 
 # This fixes a issue, where the previous folder had more images than the current folder and preview is blank  
+@profiled('UPDATE')
 def update_single_item_preview(self, context):
     brush = brush_mode(self, context)
+
+    # A new folder starts on its first page
+    brush.brush_texture.page = 0
                     
     if self.sub_category:
         items = preview_category_items(self, context)
@@ -838,21 +5715,53 @@ def update_single_item_preview(self, context):
 
     assign_texture(self, context)
     
+@profiled('UPDATE')
+def update_sub_category(self, context):
+    # A new sub category starts at its own folder
+    self.folder_path = ""
+    update_single_item_preview(self, context)
+
+@profiled('UPDATE')
+def update_child_folder(self, context):
+    # Resetting the selector below calls this again
+    if self.child_folder == no_folder:
+        return
+
+    self.folder_path = "/".join(folder_path_parts(self.folder_path) + [self.child_folder])
+    self.child_folder = no_folder
+    update_single_item_preview(self, context)
+
+@profiled('UPDATE')
 def update_single_folder_preview(self, context):
     brush = brush_mode(self, context)         
+    self.folder_path = ""
                 
     if self.category:
         sub_folders = preview_sub_folders_textures(self, context)
-        # Checks for the NONE folder and at least one other folder       
+        # Checks for the None item and at least one other folder       
         if len(sub_folders) >= 2:
             # Assign the sub folder to the second item                  
             brush.brush_texture.sub_category = sub_folders[1][0]        
-        # Assign the sub folder to NONE, if only one sub folder found      
+        # Assign the None item, if it is the only one      
         elif len(sub_folders) == 1:                   
             brush.brush_texture.sub_category = sub_folders[0][0]
             
     assign_texture(self, context)
                 
+@profiled('UPDATE')
+def update_search(self, context):
+    brush = brush_mode(self, context)
+
+    # New results start on their first page
+    brush.brush_texture.page = 0
+
+@profiled('UPDATE')
+def update_image_view(self, context):
+    brush = brush_mode(self, context)
+
+    # A new order starts on its first page
+    brush.brush_texture.page = 0
+
 class BrushTexture(PropertyGroup):
 
     # TEXTURES AND MASK FOLDER CATEGORIES               
@@ -866,8 +5775,23 @@ class BrushTexture(PropertyGroup):
     sub_category: EnumProperty(
                 name='Sub Categories', 
                 items=preview_sub_folders_textures,
-                update=update_single_item_preview,                                                                           
+                update=update_sub_category,                                                                           
+                )                
+
+    # FOLDERS BELOW THE SUB CATEGORY
+    child_folder: EnumProperty(
+                name='Folders', 
+                description='Show the textures of a folder inside the selected one',
+                items=preview_child_folders,
+                update=update_child_folder,
                 )                
+
+    # PATH OF THE SELECTED FOLDER BELOW THE SUB CATEGORY
+    folder_path: StringProperty(
+                name='Folder Path',
+                default='',
+                options={'HIDDEN'},
+                )
                                 
     # TEXTURES AND MASK    
     items_in_selected_category: EnumProperty(
@@ -877,22 +5801,99 @@ class BrushTexture(PropertyGroup):
                 update=assign_texture,                             
                 )                
                 
+    # FAVORITE AND RECENT TEXTURES
+    quick_item: EnumProperty(
+                name='Quick Access', 
+                description='Favorite and recent textures',
+                items=preview_quick_items,
+                update=update_quick_item,
+                )                
+
     # PROCEDURAL TEXTURES AND MASK
     items_procedural_textures: EnumProperty(
                 name='Procedural textures', 
                 items=preview_procedural_items, 
                 update=assign_texture,
                 )                
+
+    # SEARCH IN THE WHOLE LIBRARY
+    search: StringProperty(
+                name='Search',
+                description='Search textures by name in the whole library, results are shown instead of the selected category',
+                options={'TEXTEDIT_UPDATE'},
+                update=update_search,
+                )
+
+    # SORT OF THE IMAGES IN THE SELECTED FOLDER
+    sort_by: EnumProperty(
+                name='Sort By',
+                description='Order of the textures in the selected folder, from the image headers',
+                items=[
+                    ('NAME', 'Name', 'Sort by name', 'SORTALPHA', 0),
+                    ('RESOLUTION', 'Resolution', 'Sort by resolution, smallest first', 'FULLSCREEN_ENTER', 1),
+                    ('BIT_DEPTH', 'Bit Depth', 'Sort by bits per channel', 'IMAGE_DATA', 2),
+                    ('CHANNELS', 'Channels', 'Sort by number of channels', 'IMAGE_RGB_ALPHA', 3),
+                    ('FORMAT', 'Format', 'Sort by file format', 'FILE_IMAGE', 4),
+                ],
+                default='NAME',
+                update=update_image_view,
+                )
+
+    # CHANNELS OF THE IMAGES SHOWN
+    channels: EnumProperty(
+                name='Channels',
+                description='Only show the textures with these channels',
+                items=[
+                    ('ALL', 'All Channels', 'Show every texture'),
+                    ('GRAYSCALE', 'Grayscale', 'Only grayscale textures, with or without alpha'),
+                    ('RGB', 'RGB', 'Only color textures without alpha'),
+                    ('RGBA', 'RGBA', 'Only color textures with alpha'),
+                ],
+                default='ALL',
+                update=update_image_view,
+                )
+
+    # SMALLEST RESOLUTION OF THE IMAGES SHOWN
+    min_resolution: IntProperty(
+                name='Min Size',
+                description='Only show the textures at least this wide or tall, 0 for all',
+                min=0,
+                default=0,
+                subtype='PIXEL',
+                update=update_image_view,
+                )
+
+    # PAGE OF THE SELECTED CATEGORY, IF USING PAGING
+    page: IntProperty(
+                name='Page',
+                min=0,
+                default=0,
+                )
                                                                                                                                                                                                      
 #--------------------------------------------------------------------------------------
 # R E G I S T R Y
 #--------------------------------------------------------------------------------------
                 
 classes = (
+    TextureShortcut,
     PreferencesTextureFilePaths,
     ProceduralTexture,    
     OpenCategoryFolder,
     OpenSubCategoryFolder,          
+    SelectTextureFolder,
+    ImportCategoryImages,
+    ToggleFavoriteTexture,
+    ClearRecentTextures,
+    BrowseTextureLibrary,
+    NextTexturePage,
+    PreviousTexturePage,
+    ClearThumbnailCache,
+    BuildThumbnailAtlases,
+    FindDuplicateTextures,
+    OpenDuplicateFolder,
+    FreeUnusedImages,
+    ResetProfile,
+    ExportProfile,
     BrushTexture,                   
 )
 
@@ -901,6 +5902,8 @@ preview_collections_textures = {}
 
 
 def register():  
+    started = time.perf_counter()
+    startup.begin()
             
     bpy.types.USERPREF_PT_file_paths_data.append(texture_file_paths)       
     bpy.types.VIEW3D_PT_tools_brush_texture.draw = texture_register_draw
@@ -935,6 +5938,24 @@ def register():
                             description='Toggle between library or default preview', 
                             default=True,                                                                                 
                             )
+
+    bpy.app.timers.register(watch_library, first_interval=1.0, persistent=True)
+
+    # The library is listed once Blender is up, not while it starts
+    bpy.app.timers.register(warm_up_library, first_interval=warm_up_delay, persistent=True)
+
+    # Procedural items are only rebuilt when textures change
+    bpy.app.handlers.depsgraph_update_post.append(procedural_textures_depsgraph)
+    bpy.app.handlers.load_post.append(procedural_textures_load)
+    procedural_textures.invalidate()
+    procedural_textures.subscribe()
+
+    # Profiling stays enabled across sessions, if the preference says so
+    addon = bpy.context.preferences.addons.get(__name__)
+    if addon is not None:
+        profiler.set_enabled(addon.preferences.use_profiling)
+
+    startup.end(started)
    
 def unregister():
                 
@@ -953,11 +5974,71 @@ def unregister():
     del Brush.use_library_preview               
 
                 
+    if bpy.app.timers.is_registered(flush_thumbnail_cache):
+        bpy.app.timers.unregister(flush_thumbnail_cache)
+    thumbnail_cache.pending.clear()
+
+    if bpy.app.timers.is_registered(watch_library):
+        bpy.app.timers.unregister(watch_library)
+    stop_library_watcher()
+
+    if bpy.app.timers.is_registered(warm_up_library):
+        bpy.app.timers.unregister(warm_up_library)
+    startup.stop()
+
+    if bpy.app.timers.is_registered(finish_search_indexes):
+        bpy.app.timers.unregister(finish_search_indexes)
+    library_search.shutdown()
+
+    if bpy.app.timers.is_registered(drain_thumbnails):
+        bpy.app.timers.unregister(drain_thumbnails)
+
+    if bpy.app.timers.is_registered(drain_headers):
+        bpy.app.timers.unregister(drain_headers)
+    header_prober.shutdown()
+
+    if library_duplicates.analysis is not None:
+        library_duplicates.analysis.cancelled = True
+        library_duplicates.analysis = None
+
+    if bpy.app.timers.is_registered(drain_library_walks):
+        bpy.app.timers.unregister(drain_library_walks)
+    library_walker.shutdown()
+    thumbnail_loader.shutdown()
+
+    if bpy.app.timers.is_registered(prefetch_images):
+        bpy.app.timers.unregister(prefetch_images)
+    image_prefetcher.shutdown()
+
+    if bpy.app.timers.is_registered(swap_proxy_images):
+        bpy.app.timers.unregister(swap_proxy_images)
+    if bpy.app.timers.is_registered(save_proxy_images):
+        bpy.app.timers.unregister(save_proxy_images)
+    proxy_loader.shutdown()
+
+    preview_pool.clear()
+    thumbnail_atlases.clear()
+    image_pool.clear()
+    brush_texture_names.clear()
+
+    profiler.set_enabled(False)
+
+    if procedural_textures_depsgraph in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(procedural_textures_depsgraph)
+    if procedural_textures_load in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(procedural_textures_load)
+    bpy.msgbus.clear_by_owner(procedural_textures)
+
     for pcoll in preview_collections_textures.values():
         bpy.utils.previews.remove(pcoll)
     preview_collections_textures.clear()
     
         
 if __name__ == "__main__":
-    register()
+    # blender --background --python textures_manager.py -- --prebuild ROOT
+    arguments = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if "--prebuild" in arguments:
+        prebuild_main(arguments)
+    else:
+        register()
   
\ No newline at end of file